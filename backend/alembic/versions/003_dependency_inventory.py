@@ -0,0 +1,54 @@
+"""add dependency inventory table
+
+Revision ID: 003
+Revises: 45c2f6932d46
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '45c2f6932d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dependencyinventory',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('scan_id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('project', sa.String(255), nullable=False),
+        sa.Column('ecosystem', sa.String(50), nullable=False),
+        sa.Column('package_name', sa.String(255), nullable=False),
+        sa.Column('version', sa.String(100), nullable=False),
+        sa.Column('location', sa.String(500), nullable=True),
+        sa.Column('scanner_name', sa.String(50), nullable=True),
+        sa.Column('is_latest', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.ForeignKeyConstraint(['scan_id'], ['scan.id']),
+        sa.ForeignKeyConstraint(['organization_id'], ['organization.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_dependencyinventory_id', 'dependencyinventory', ['id'])
+    op.create_index('ix_dependencyinventory_scan_id', 'dependencyinventory', ['scan_id'])
+    op.create_index(
+        'ix_dependencyinventory_lookup', 'dependencyinventory',
+        ['ecosystem', 'package_name', 'version', 'is_latest'],
+    )
+    op.create_index(
+        'ix_dependencyinventory_project', 'dependencyinventory',
+        ['organization_id', 'project', 'is_latest'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dependencyinventory_project', table_name='dependencyinventory')
+    op.drop_index('ix_dependencyinventory_lookup', table_name='dependencyinventory')
+    op.drop_index('ix_dependencyinventory_scan_id', table_name='dependencyinventory')
+    op.drop_index('ix_dependencyinventory_id', table_name='dependencyinventory')
+    op.drop_table('dependencyinventory')
@@ -0,0 +1,46 @@
+"""add scan job queue table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scanjob',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('scan_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sa.String(100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['scan_id'], ['scan.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_scanjob_id', 'scanjob', ['id'])
+    op.create_index('ix_scanjob_scan_id', 'scanjob', ['scan_id'])
+    op.create_index('ix_scanjob_claim', 'scanjob', ['status', 'available_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scanjob_claim', table_name='scanjob')
+    op.drop_index('ix_scanjob_scan_id', table_name='scanjob')
+    op.drop_index('ix_scanjob_id', table_name='scanjob')
+    op.drop_table('scanjob')
@@ -0,0 +1,45 @@
+"""add scan stage checkpoint table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scanstage',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('scan_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(30), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('findings', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('output', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['scan_id'], ['scan.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scan_id', 'name', name='uq_scanstage_scan_name'),
+    )
+    op.create_index('ix_scanstage_id', 'scanstage', ['id'])
+    op.create_index('ix_scanstage_scan_id', 'scanstage', ['scan_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scanstage_scan_id', table_name='scanstage')
+    op.drop_index('ix_scanstage_id', table_name='scanstage')
+    op.drop_table('scanstage')
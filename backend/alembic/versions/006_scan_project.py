@@ -0,0 +1,23 @@
+"""add scan project column
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('scan', sa.Column('project', sa.String(255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scan', 'project')
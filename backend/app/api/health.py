@@ -1,12 +1,15 @@
 """
 Health check API routes.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_current_user
 from app.core.config import get_settings
 from app.db.session import get_db
+from app.models.models import User, UserRole
+from app.services.http_client import http_client
 
 settings = get_settings()
 router = APIRouter(prefix=f"{settings.API_V1_STR}/health", tags=["health"])
@@ -36,3 +39,17 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
         "database": db_status,
         "version": settings.VERSION,
     }
+
+
+@router.get("/http-pool")
+async def http_pool_stats(current_user: User = Depends(get_current_user)):
+    """
+    Connection pool statistics for the shared scanning HTTP client.
+    Admin only: ``by_origin`` lists the hosts every organization is scanning.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="HTTP pool statistics require an admin role",
+        )
+    return http_client.stats()
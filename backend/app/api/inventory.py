@@ -0,0 +1,54 @@
+"""
+Dependency inventory API routes — fleet-wide "which projects ship package X" queries.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import get_db
+from app.models.models import User, UserRole
+from app.schemas.inventory import AffectedScansResponse
+from app.api.deps import get_current_user
+from app.services.inventory import (
+    count_affected_scans,
+    find_affected_scans,
+    normalize_ecosystem,
+    normalize_package_name,
+)
+
+settings = get_settings()
+router = APIRouter(prefix=f"{settings.API_V1_STR}/inventory", tags=["inventory"])
+
+
+@router.get("/affected", response_model=AffectedScansResponse)
+async def get_affected_scans(
+    ecosystem: str,
+    package: str,
+    version: Optional[List[str]] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Impact query across all organizations' latest scans.
+    Restricted to admins and security analysts since it spans organizations.
+    """
+    if current_user.role not in (UserRole.ADMIN, UserRole.SECURITY_ANALYST):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Fleet-wide inventory queries require an admin or security analyst role",
+        )
+
+    results = await find_affected_scans(db, ecosystem, package, version, limit=limit)
+    total = await count_affected_scans(db, ecosystem, package, version)
+    eco = normalize_ecosystem(ecosystem)
+    return {
+        "ecosystem": eco,
+        "package": normalize_package_name(eco, package),
+        "versions": version or [],
+        "total_affected": total,
+        "truncated": total > len(results),
+        "results": results,
+    }
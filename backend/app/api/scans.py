@@ -1,11 +1,13 @@
 """
 Scan API routes — CRUD, status polling, summary, false-positive marking, SARIF export.
 """
+import os
+import tempfile
 from datetime import datetime
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -19,7 +21,8 @@ from app.schemas.scan import (
     FalsePositiveRequest,
 )
 from app.api.deps import get_current_user
-from app.services.scanner import run_scan_task_in_background
+from app.services import job_queue
+from app.services.inventory import derive_project
 
 settings = get_settings()
 router = APIRouter(prefix=f"{settings.API_V1_STR}/scans", tags=["scans"])
@@ -28,29 +31,91 @@ router = APIRouter(prefix=f"{settings.API_V1_STR}/scans", tags=["scans"])
 @router.post("", response_model=ScanResponse)
 async def create_scan(
     scan: ScanCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Create a new security scan and start it in the background."""
+    """Create a new security scan and queue it for a scan worker."""
     db_scan = Scan(
         target_url=scan.target_url,
+        project=scan.project or derive_project(scan.target_url, scan.container_image, scan.source_code),
         source_code=scan.source_code,
         scan_type=scan.scan_type,
         user_id=current_user.id,
         organization_id=current_user.organization_id,
     )
     db.add(db_scan)
+    await db.flush()
+
+    # The job commits together with the scan, so an accepted scan is never lost
+    await job_queue.enqueue(db, db_scan, "scan", {
+        "scan_uuid": str(db_scan.uuid),
+        "code": scan.source_code or "",
+        "url": scan.target_url,
+        "container_image": scan.container_image,
+        "refresh_container_cache": scan.refresh_container_cache,
+        "refresh_header_cache": scan.refresh_header_cache,
+    })
     await db.commit()
     await db.refresh(db_scan)
+    job_queue.notify_local_workers()
+
+    return db_scan
+
+
+@router.post("/bulk-headers", response_model=ScanResponse)
+async def create_bulk_header_scan(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Start a header/DOM sweep over a newline-separated URL list sent as the raw
+    request body. The body is spooled to disk as it arrives, so large lists are
+    never held in memory.
+    """
+    max_bytes = settings.BULK_SCAN_MAX_UPLOAD_MB * 1024 * 1024
+    received = 0
+    lines = 0
+    last = b""
+    spool_dir = settings.BULK_SCAN_SPOOL_DIR
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    spool = tempfile.NamedTemporaryFile(delete=False, prefix="vulnalyze-bulk-", suffix=".txt", dir=spool_dir)
+    try:
+        with spool:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"URL list exceeds {settings.BULK_SCAN_MAX_UPLOAD_MB} MB",
+                    )
+                lines += chunk.count(b"\n")
+                spool.write(chunk)
+                last = chunk[-1:] or last
+        if last and last != b"\n":
+            lines += 1
+        if received == 0:
+            raise HTTPException(status_code=400, detail="URL list is empty")
+    except BaseException:
+        os.unlink(spool.name)
+        raise
 
-    # Start scan in background using BackgroundTasks
-    background_tasks.add_task(
-        run_scan_task_in_background,
-        str(db_scan.uuid),
-        scan.source_code or "",
-        scan.target_url,
+    db_scan = Scan(
+        target_url=f"bulk:{min(lines, settings.BULK_SCAN_MAX_URLS)} urls",
+        scan_type="bulk-headers",
+        user_id=current_user.id,
+        organization_id=current_user.organization_id,
     )
+    db.add(db_scan)
+    await db.flush()
+    await job_queue.enqueue(db, db_scan, "bulk-headers", {
+        "scan_uuid": str(db_scan.uuid),
+        "urls_path": spool.name,
+    })
+    await db.commit()
+    await db.refresh(db_scan)
+    job_queue.notify_local_workers()
 
     return db_scan
 
@@ -163,6 +228,7 @@ async def get_scan_status(
     return {
         "status": scan.status,
         "progress": scan.progress if hasattr(scan, "progress") else 0,
+        "results": scan.results,
     }
 
 
@@ -15,6 +15,8 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # CIDRs exempt from SSRF blocking, e.g. ["127.0.0.0/8"] for local test targets
+    SSRF_ALLOWED_NETWORKS: list[str] = Field(default_factory=list)
     OPENROUTER_API_KEY: Optional[str] = None
     
     # Database
@@ -40,7 +42,86 @@ class Settings(BaseSettings):
     ZAP_API_KEY: Optional[str] = None
     ZAP_HOST: str = "localhost"
     ZAP_PORT: int = 8080
+    ZAP_POLL_MAX_SECONDS: float = 30.0
+    ZAP_SCAN_TIMEOUT_SECONDS: int = 3600
+    ZAP_ALERT_PAGE_SIZE: int = 500
+    TRIVY_PATH: str = "trivy"
+    TRIVY_MAX_CONCURRENCY: int = 2
+    TRIVY_TIMEOUT_SECONDS: int = 300
+    # Run scans as clients of a local long-lived `trivy server` (falls back to standalone)
+    TRIVY_SERVER_MODE: bool = False
+    TRIVY_SERVER_ADDR: str = "127.0.0.1:4954"
+    TRIVY_SERVER_STARTUP_TIMEOUT: int = 120
+    CONTAINER_CACHE_ENABLED: bool = True
+    CONTAINER_CACHE_MAX_MB: int = 512
+    CONTAINER_CACHE_MAX_ITEMS: int = 50000  # larger reports are streamed but not cached
+    CONTAINER_SCAN_BATCH_SIZE: int = 500
+    # Offline image tarball scanning (no Trivy needed)
+    ADVISORY_INDEX_PATH: Optional[str] = None
+    LAYER_CACHE_MAX_MB: int = 256
+    NMAP_PATH: str = "nmap"
+    NMAP_TIMEOUT_SECONDS: int = 300
+    NMAP_MAX_WORKERS: int = 4           # parallel nmap processes per worker
+    NMAP_MAX_RATE: int = 2000           # packets/sec budget shared by those processes
+    NETWORK_SCAN_MAX_HOSTS: int = 1024  # cap on hosts after CIDR expansion
+    # Reuse -sV service results for ports that stay open between scans
+    NETWORK_CACHE_ENABLED: bool = True
+    NETWORK_CACHE_TTL_SECONDS: int = 86400
+    NETWORK_CACHE_MAX_MB: int = 64
+    # Built-in TCP connect scanner (used when nmap is not installed)
+    TCP_SCAN_CONCURRENCY: int = 500
+    TCP_SCAN_TIMEOUT_SECONDS: float = 1.5
+    # Wall-clock limit per engine in a combined scan; engines run concurrently (0 = no limit)
+    SCAN_SEMGREP_TIMEOUT_SECONDS: int = 600
+    SCAN_IAC_TIMEOUT_SECONDS: int = 300
+    SCAN_DEPENDENCY_TIMEOUT_SECONDS: int = 300
+    SCAN_DYNAMIC_TIMEOUT_SECONDS: int = 7200
+    SCAN_CONTAINER_TIMEOUT_SECONDS: int = 1800
+    # Durable scan job queue; run `python -m app.worker` for dedicated workers
+    SCAN_WORKER_EMBEDDED: bool = True  # API process also runs a worker
+    SCAN_WORKER_CONCURRENCY: int = 4
+    SCAN_WORKER_POLL_SECONDS: float = 2.0
+    SCAN_JOB_LEASE_SECONDS: int = 120  # a job whose worker stops heartbeating is re-claimed after this
+    SCAN_JOB_MAX_ATTEMPTS: int = 3
+    SCAN_JOB_RETRY_BACKOFF_SECONDS: int = 30
+
+    # Local result caches (SQLite files); defaults to data/cache
+    CACHE_DIR: Optional[str] = None
     
+    # Shared HTTP client for header/DOM scans
+    HTTP_TIMEOUT_SECONDS: float = 15.0
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 100
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_PER_HOST_CONNECTIONS: int = 6
+    # Extra TLS 1.0/1.1-only handshake per HTTPS header scan to detect legacy protocol support
+    HTTP_LEGACY_TLS_PROBE: bool = True
+    # Shared DNS cache (SSRF validation, HTTP client, network scans)
+    DNS_CACHE_TTL_SECONDS: int = 60
+    DNS_NEGATIVE_TTL_SECONDS: int = 10
+    # Response bytes inspected by the DOM rules per page; the rest is not read
+    DOM_SCAN_MAX_BYTES: int = 5 * 1024 * 1024
+    # Repeat header scans send If-None-Match/If-Modified-Since and reuse DOM findings on 304
+    HTTP_CONDITIONAL_CACHE_ENABLED: bool = True
+    HTTP_CONDITIONAL_CACHE_TTL_SECONDS: int = 7 * 86400
+    HTTP_CONDITIONAL_CACHE_MAX_MB: int = 32
+    # Header/DOM results reused by any scan of the same URL within the TTL (0 disables)
+    HTTP_RESULT_CACHE_TTL_SECONDS: int = 300
+    HTTP_RESULT_CACHE_MAX_MB: int = 32
+
+    # Built-in crawler used for the dynamic scan when ZAP is not configured
+    CRAWL_ENABLED: bool = True
+    CRAWL_MAX_DEPTH: int = 3
+    CRAWL_MAX_PAGES: int = 200
+    CRAWL_CONCURRENCY: int = 20
+
+    # Bulk header scans (POST /scans/bulk-headers)
+    BULK_SCAN_CONCURRENCY: int = 150
+    BULK_SCAN_MAX_URLS: int = 50000
+    BULK_SCAN_WRITE_BATCH: int = 500
+    BULK_SCAN_SPOOL_DIR: Optional[str] = None  # must be shared storage when workers run on other hosts
+    BULK_SCAN_MAX_UPLOAD_MB: int = 16
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
     
@@ -67,6 +148,8 @@ class Settings(BaseSettings):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        if not self.CACHE_DIR:
+            self.CACHE_DIR = str((Path(__file__).resolve().parent.parent.parent / "data" / "cache").resolve())
         if not self.SQLALCHEMY_DATABASE_URI:
             if self.POSTGRES_SERVER:
                 self.SQLALCHEMY_DATABASE_URI = (
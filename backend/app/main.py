@@ -2,12 +2,17 @@
 Vulnalyze — Application Security Platform
 FastAPI application factory with modular API routers.
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.db.init_db import init_db
-from app.api import auth, scans, ai, health
+from app.api import auth, scans, ai, health, inventory
+from app.services import container_scanner
+from app.services.http_client import http_client
+from app.worker import ScanWorker
 
 settings = get_settings()
 
@@ -17,6 +22,22 @@ app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
 @app.on_event("startup")
 async def startup_event() -> None:
     await init_db()
+    await http_client.start()
+    if settings.SCAN_WORKER_EMBEDDED:
+        worker = ScanWorker()
+        app.state.scan_worker = worker
+        app.state.scan_worker_task = asyncio.create_task(worker.run())
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    worker = getattr(app.state, "scan_worker", None)
+    if worker is not None:
+        # Running jobs are handed back to the queue for the next worker
+        worker.stop()
+        await app.state.scan_worker_task
+    await container_scanner.shutdown()
+    await http_client.aclose()
 
 
 # ── CORS middleware ──────────────────────────────────────────────────────────
@@ -40,6 +61,7 @@ app.include_router(auth.router)
 app.include_router(scans.router)
 app.include_router(ai.router)
 app.include_router(health.router)
+app.include_router(inventory.router)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, ForeignKey, Enum, JSON, Boolean, Text, Float, Integer
+from sqlalchemy import String, ForeignKey, Enum, JSON, Boolean, Text, Float, Integer, Index, DateTime, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 from uuid import UUID, uuid4
@@ -28,6 +28,13 @@ class ScanStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class VulnerabilitySeverity(str, enum.Enum):
     INFO = "info"
     LOW = "low"
@@ -68,6 +75,8 @@ class Scan(Base):
     uuid: Mapped[UUID] = mapped_column(default=uuid4, unique=True, index=True)
     status: Mapped[ScanStatus] = mapped_column(Enum(ScanStatus), default=ScanStatus.PENDING)
     target_url: Mapped[str] = mapped_column(String(255))
+    # Groups scans of the same project for the dependency inventory (see inventory.project_key)
+    project: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     source_code: Mapped[str] = mapped_column(Text, nullable=True)
     scan_type: Mapped[str] = mapped_column(String(50))  # static, dynamic, hybrid
     results: Mapped[dict] = mapped_column(JSON, nullable=True)
@@ -117,4 +126,78 @@ class AuditLog(Base):
     resource_type: Mapped[str] = mapped_column(String(50))  # scan, vulnerability, user
     resource_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     details: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
-    ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)  # IPv4 or IPv6
\ No newline at end of file
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)  # IPv4 or IPv6
+
+
+class DependencyInventory(Base):
+    """
+    Normalized package inventory recorded by the dependency and container scanners.
+
+    One row per (scan, ecosystem, package, version). Rows from the most recent
+    scan of each (organization, project) carry ``is_latest=True`` so fleet-wide
+    impact queries only touch current inventory through the lookup index.
+    """
+    __table_args__ = (
+        Index("ix_dependencyinventory_lookup", "ecosystem", "package_name", "version", "is_latest"),
+        Index("ix_dependencyinventory_project", "organization_id", "project", "is_latest"),
+    )
+
+    scan_id: Mapped[int] = mapped_column(ForeignKey("scan.id"), index=True)
+    organization_id: Mapped[int] = mapped_column(ForeignKey("organization.id"))
+    project: Mapped[str] = mapped_column(String(255))  # scan target the inventory belongs to
+    ecosystem: Mapped[str] = mapped_column(String(50))  # pypi, npm, debian, alpine, ...
+    package_name: Mapped[str] = mapped_column(String(255))
+    version: Mapped[str] = mapped_column(String(100))
+    location: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    scanner_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    is_latest: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+class ScanJob(Base):
+    """
+    Durable work item for a scan, claimed by workers under a lease.
+
+    A job is claimable when it is queued and due, or when it is running but
+    its lease has expired (the worker holding it died). Workers extend the
+    lease while they run the job; ``attempts`` counts claims so a job that
+    keeps crashing its worker is eventually failed instead of retried forever.
+    """
+    __table_args__ = (
+        Index("ix_scanjob_claim", "status", "available_at"),
+    )
+
+    scan_id: Mapped[int] = mapped_column(ForeignKey("scan.id"), index=True)
+    kind: Mapped[str] = mapped_column(String(50))  # scan, bulk-headers
+    payload: Mapped[dict] = mapped_column(JSON, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default=JobStatus.QUEUED.value)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+class ScanStage(Base):
+    """
+    Checkpoint of one pipeline stage of a scan.
+
+    A stage row is written as ``running`` when the stage starts and finished
+    (``completed``, ``failed`` or ``timeout``) together with its output. When
+    a scan is resumed, finished stages are skipped and their findings kept;
+    a stage still marked ``running`` was interrupted and is run again.
+    """
+    __table_args__ = (
+        UniqueConstraint("scan_id", "name", name="uq_scanstage_scan_name"),
+    )
+
+    scan_id: Mapped[int] = mapped_column(ForeignKey("scan.id"), index=True)
+    name: Mapped[str] = mapped_column(String(30))  # static, container, dynamic, normalize
+    status: Mapped[str] = mapped_column(String(20))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    duration_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    findings: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    output: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
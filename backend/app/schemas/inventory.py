@@ -0,0 +1,28 @@
+"""
+Pydantic schemas for dependency inventory endpoints.
+"""
+from pydantic import BaseModel
+from typing import List
+from datetime import datetime
+from uuid import UUID
+
+
+class AffectedScan(BaseModel):
+    scan_id: UUID
+    project: str
+    organization_id: int
+    organization_name: str
+    ecosystem: str
+    package: str
+    version: str
+    location: str
+    scanned_at: datetime
+
+
+class AffectedScansResponse(BaseModel):
+    ecosystem: str
+    package: str
+    versions: List[str]
+    total_affected: int
+    truncated: bool
+    results: List[AffectedScan]
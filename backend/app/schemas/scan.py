@@ -1,18 +1,39 @@
 """
 Pydantic schemas for scan and vulnerability endpoints.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
 from app.models.models import ScanStatus, VulnerabilitySeverity
+from app.services.container_scanner import is_valid_image_reference
 
 
 class ScanCreate(BaseModel):
     target_url: str
     source_code: Optional[str] = None
     scan_type: str
+    container_image: Optional[str] = None
+    project: Optional[str] = None
+    refresh_container_cache: bool = False
+    refresh_header_cache: bool = False
+
+    @field_validator("project")
+    @classmethod
+    def check_project(cls, value: Optional[str]) -> Optional[str]:
+        value = (value or "").strip() or None
+        if value is not None and len(value) > 255:
+            raise ValueError("project must be at most 255 characters")
+        return value
+
+    @field_validator("container_image")
+    @classmethod
+    def check_container_image(cls, value: Optional[str]) -> Optional[str]:
+        value = (value or "").strip() or None
+        if value is not None and not is_valid_image_reference(value):
+            raise ValueError("container_image must be an image reference like 'registry/name:tag'")
+        return value
 
 
 class VulnerabilityResponse(BaseModel):
@@ -39,6 +60,7 @@ class ScanResponse(BaseModel):
     uuid: UUID
     status: ScanStatus
     target_url: str
+    project: Optional[str] = None
     scan_type: str
     created_at: datetime
     vulnerabilities: List[VulnerabilityResponse]
@@ -0,0 +1,166 @@
+"""
+Advisory Index — local vulnerability advisories for offline package matching.
+
+The index is a JSON file keyed by ecosystem and package name:
+
+    {
+      "debian": {
+        "openssl": [
+          {"id": "CVE-2024-0727", "severity": "MEDIUM", "fixed_version": "3.0.13-1~deb12u1",
+           "introduced": "", "title": "...", "description": "...", "cvss": 5.5}
+        ]
+      },
+      "npm": {"lodash": [{"id": "CVE-2021-23337", "severity": "HIGH", "fixed_version": "4.17.21"}]}
+    }
+
+A package is affected when ``introduced <= installed < fixed_version`` (either
+bound may be omitted), or when its version is listed in ``versions``.
+"""
+import json
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from app.services.inventory import normalize_ecosystem, normalize_package_name
+
+
+_DPKG_ECOSYSTEMS = {"debian", "ubuntu"}
+_TOKEN = re.compile(r"\d+|[A-Za-z]+")
+# Suffixes that sort *after* the bare version (apk -r0, PEP 440 .postN, ...)
+_RELEASE_SUFFIXES = {"r", "p", "pl", "post", "rev"}
+
+
+def _dpkg_order(char: str) -> int:
+    if char == "~":
+        return -1
+    if char.isdigit():
+        return 0
+    if char.isalpha():
+        return ord(char)
+    return ord(char) + 256
+
+
+def _dpkg_part_compare(a: str, b: str) -> int:
+    """dpkg's verrevcmp for an upstream version or revision string."""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _dpkg_order(a[i]) if i < len(a) else 0
+            bc = _dpkg_order(b[j]) if j < len(b) else 0
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == "0":
+            i += 1
+        while j < len(b) and b[j] == "0":
+            j += 1
+        first_diff = 0
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def _split_dpkg(version: str):
+    epoch, _, rest = version.rpartition(":") if ":" in version else ("0", "", version)
+    upstream, _, revision = rest.rpartition("-") if "-" in rest else (rest, "", "")
+    try:
+        epoch_num = int(epoch or 0)
+    except ValueError:
+        epoch_num = 0
+    return epoch_num, upstream, revision
+
+
+def _compare_dpkg(a: str, b: str) -> int:
+    ea, ua, ra = _split_dpkg(a)
+    eb, ub, rb = _split_dpkg(b)
+    if ea != eb:
+        return ea - eb
+    return _dpkg_part_compare(ua, ub) or _dpkg_part_compare(ra, rb)
+
+
+def _compare_generic(a: str, b: str) -> int:
+    """Token-wise comparison: numbers numerically, words lexically, pre-release < release."""
+    ta = [int(t) if t.isdigit() else t.lower() for t in _TOKEN.findall(a)]
+    tb = [int(t) if t.isdigit() else t.lower() for t in _TOKEN.findall(b)]
+    for x, y in zip(ta, tb):
+        if x == y:
+            continue
+        if isinstance(x, int) and isinstance(y, int):
+            return -1 if x < y else 1
+        if isinstance(x, int):
+            return 1
+        if isinstance(y, int):
+            return -1
+        return -1 if x < y else 1
+    if len(ta) == len(tb):
+        return 0
+    longer, sign = (ta, 1) if len(ta) > len(tb) else (tb, -1)
+    extra = longer[min(len(ta), len(tb))]
+    if isinstance(extra, str) and extra not in _RELEASE_SUFFIXES:
+        return -sign  # 1.0.0-beta < 1.0.0
+    return sign
+
+
+def compare_versions(ecosystem: str, a: str, b: str) -> int:
+    """Return <0, 0, >0 as version ``a`` sorts before, equal to, or after ``b``."""
+    if ecosystem in _DPKG_ECOSYSTEMS:
+        return _compare_dpkg(a, b)
+    return _compare_generic(a, b)
+
+
+class AdvisoryIndex:
+    """In-memory advisory index loaded from a JSON file (reloaded when it changes)."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self._mtime = None
+        self._advisories: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            self._advisories = {}
+            return
+        mtime = self.path.stat().st_mtime
+        if mtime == self._mtime:
+            return
+        raw = json.loads(self.path.read_text(encoding="utf-8"))
+        advisories: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for ecosystem, packages in raw.items():
+            eco = normalize_ecosystem(ecosystem)
+            for name, entries in packages.items():
+                advisories.setdefault(eco, {})[normalize_package_name(eco, name)] = entries
+        self._advisories = advisories
+        self._mtime = mtime
+
+    def __bool__(self) -> bool:
+        self._load()
+        return bool(self._advisories)
+
+    def match(self, ecosystem: str, package: str, version: str) -> List[Dict[str, Any]]:
+        """Return advisories affecting ``package@version`` in ``ecosystem``."""
+        self._load()
+        eco = normalize_ecosystem(ecosystem)
+        entries = self._advisories.get(eco, {}).get(normalize_package_name(eco, package), [])
+        return [adv for adv in entries if self._affects(eco, adv, version)]
+
+    @staticmethod
+    def _affects(ecosystem: str, advisory: Dict[str, Any], version: str) -> bool:
+        if advisory.get("versions"):
+            return version in advisory["versions"]
+        introduced = advisory.get("introduced")
+        fixed = advisory.get("fixed_version")
+        if introduced and compare_versions(ecosystem, version, introduced) < 0:
+            return False
+        if fixed and compare_versions(ecosystem, version, fixed) >= 0:
+            return False
+        return True
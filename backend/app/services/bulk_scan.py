@@ -0,0 +1,192 @@
+"""
+Bulk Header Scan — sweeps a large URL list with the header/DOM checks.
+
+The URL list is read from a spooled file in chunks; each chunk is SSRF
+validated as a batch and fed to a fixed pool of workers. Total concurrency
+is capped by BULK_SCAN_CONCURRENCY and per-host concurrency by the shared
+HTTP client, so sweep time scales with the concurrency budget rather than
+the number of URLs. Findings are written in batches as they accumulate and
+progress/throughput is published on ``Scan.results`` while the sweep runs.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.models import Scan, ScanStatus
+from app.services.finding_writer import FindingWriter
+from app.services.http_client import pin_addresses
+from app.services.scanner import ScannerService
+from app.services.ssrf_protection import resolve_many
+
+settings = get_settings()
+
+_VALIDATION_CHUNK = 500
+_PROGRESS_INTERVAL = 5.0
+
+
+def iter_url_file(path: str, max_urls: int) -> Iterator[str]:
+    """Yield distinct URLs from a newline-separated file (``#`` comments allowed)."""
+    seen = set()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith("#"):
+                continue
+            if "://" not in url:
+                url = f"https://{url}"
+            if url in seen:
+                continue
+            seen.add(url)
+            yield url
+            if len(seen) >= max_urls:
+                return
+
+
+def _blocked_finding(url: str, reason: str) -> Dict[str, Any]:
+    return {
+        "title": "SSRF Protection — Target Blocked",
+        "description": f"Target URL {url} was blocked by Server-Side Request Forgery protection: {reason}",
+        "severity": "info",
+        "location": url,
+        "evidence": reason,
+        "metadata": {"cweid": "918", "confidence": "high", "scanner": "ssrf-protection", "owasp": "A10:2021-Server-Side Request Forgery"},
+    }
+
+
+class BulkHeaderScan:
+    """One bulk sweep over the URLs in ``urls_path``, recorded on one Scan."""
+
+    def __init__(self, scan_uuid: str, urls_path: str, concurrency: Optional[int] = None):
+        self.scan_uuid = scan_uuid
+        self.urls_path = urls_path
+        self.concurrency = max(1, concurrency or settings.BULK_SCAN_CONCURRENCY)
+        self.scanner = ScannerService()
+        self.writer = FindingWriter(scan_uuid)
+        self.stats = {"urls_total": 0, "urls_scanned": 0, "urls_blocked": 0, "urls_unreachable": 0}
+        self._pending: List[Dict[str, Any]] = []
+        self._write_lock = asyncio.Lock()
+        self._started = 0.0
+
+    def progress(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        done = self.stats["urls_scanned"] + self.stats["urls_blocked"]
+        return {
+            **self.stats,
+            "elapsed_seconds": round(elapsed, 1),
+            "urls_per_second": round(done / elapsed, 2) if elapsed > 0 else 0.0,
+            "vulnerabilities_count": self.writer.count,
+            "risk_score": self.writer.risk_score,
+        }
+
+    async def _update_scan(self, status: Optional[ScanStatus] = None) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Scan).where(Scan.uuid == UUID(self.scan_uuid)))
+            db_scan = result.scalar_one_or_none()
+            if not db_scan:
+                return
+            if status is not None:
+                db_scan.status = status
+            db_scan.results = self.progress()
+            await db.commit()
+
+    async def _add_findings(self, findings: List[Dict[str, Any]], force: bool = False) -> None:
+        self._pending.extend(findings)
+        if not force and len(self._pending) < settings.BULK_SCAN_WRITE_BATCH:
+            return
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            await self.writer.write(batch)
+
+    async def _produce(self, queue: asyncio.Queue) -> None:
+        """Validate URLs chunk by chunk and queue the allowed ones."""
+        urls = iter_url_file(self.urls_path, settings.BULK_SCAN_MAX_URLS)
+        while True:
+            chunk = [url for _, url in zip(range(_VALIDATION_CHUNK), urls)]
+            if not chunk:
+                break
+            self.stats["urls_total"] += len(chunk)
+            verdicts = await resolve_many(chunk)
+            blocked = []
+            for url, (ok, reason, addresses) in zip(chunk, verdicts):
+                if ok:
+                    await queue.put((url, addresses))
+                else:
+                    blocked.append(_blocked_finding(url, reason))
+            self.stats["urls_blocked"] += len(blocked)
+            await self._add_findings(blocked)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                url, addresses = item
+                with pin_addresses({urlparse(url).hostname: addresses}):
+                    findings = await self.scanner.run_http_header_scan(url)
+                if findings and findings[0]["title"] == "URL Not Reachable":
+                    self.stats["urls_unreachable"] += 1
+                self.stats["urls_scanned"] += 1
+                await self._add_findings(findings)
+            finally:
+                queue.task_done()
+
+    async def _report_progress(self) -> None:
+        while True:
+            await asyncio.sleep(_PROGRESS_INTERVAL)
+            await self._update_scan()
+
+    async def run(self) -> Dict[str, Any]:
+        self._started = time.monotonic()
+        await self._update_scan(ScanStatus.RUNNING)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._work(queue)) for _ in range(self.concurrency)]
+        reporter = asyncio.create_task(self._report_progress())
+        try:
+            await self._produce(queue)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            await self._add_findings([], force=True)
+        finally:
+            reporter.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(reporter, *workers, return_exceptions=True)
+
+        await self._update_scan(ScanStatus.COMPLETED)
+        summary = self.progress()
+        print(
+            f"Bulk header scan {self.scan_uuid}: {summary['urls_total']} URLs in "
+            f"{summary['elapsed_seconds']}s ({summary['urls_per_second']} URLs/s), "
+            f"{summary['vulnerabilities_count']} findings"
+        )
+        return summary
+
+
+async def run_bulk_header_scan(scan_uuid: str, urls_path: str) -> None:
+    """
+    Job handler: run a bulk sweep. Failures propagate so the job queue can
+    retry; the spooled URL file is kept until the job is finished for good
+    (see ``remove_spool_file``).
+    """
+    try:
+        await BulkHeaderScan(scan_uuid, urls_path).run()
+    except Exception as e:
+        print(f"Bulk header scan {scan_uuid} failed: {e}")
+        raise
+
+
+def remove_spool_file(urls_path: str) -> None:
+    """Delete a bulk job's spooled URL list once no attempt can need it again."""
+    try:
+        os.unlink(urls_path)
+    except OSError:
+        pass
@@ -2,64 +2,352 @@
 Container Scanner — Trivy subprocess wrapper for container image/filesystem scanning.
 Graceful no-op when Trivy is not installed.
 """
+import asyncio
 import json
-import subprocess
-from typing import List, Dict, Any
+import re
+import tarfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+
+from app.core.config import get_settings
+from app.services.advisory_index import AdvisoryIndex
+from app.services.image_tarball import LAYER_FORMAT_VERSION, analyze_image_tarball
+from app.services.inventory import make_entry
+from app.services.process_runner import ConcurrencyLimiter, StreamingProcess, run_process
+from app.services.result_cache import PersistentCache
+from app.services.trivy_server import TrivyServer
+from app.services.trivy_stream import TrivyReportStream
+
+settings = get_settings()
+
+# Global cap on concurrent Trivy processes across all scans in this worker
+_trivy_limiter = ConcurrencyLimiter(settings.TRIVY_MAX_CONCURRENCY)
+
+# Optional long-lived local Trivy server (loads the vulnerability DB once)
+_trivy_server: Optional[TrivyServer] = (
+    TrivyServer(settings.TRIVY_PATH, settings.TRIVY_SERVER_ADDR, settings.TRIVY_SERVER_STARTUP_TIMEOUT)
+    if settings.TRIVY_SERVER_MODE else None
+)
+
+# Image scan results keyed by (image digest, Trivy DB version)
+_scan_cache = PersistentCache(
+    str(Path(settings.CACHE_DIR) / "container_scans.db"),
+    max_bytes=settings.CONTAINER_CACHE_MAX_MB * 1024 * 1024,
+)
+
+# Per-layer package extraction results keyed by layer content digest
+_layer_cache = PersistentCache(
+    str(Path(settings.CACHE_DIR) / "image_layers.db"),
+    max_bytes=settings.LAYER_CACHE_MAX_MB * 1024 * 1024,
+)
+
+_advisory_index = AdvisoryIndex(settings.ADVISORY_INDEX_PATH)
+
+# Trivy DB version is re-read at most this often (the DB updates every few hours)
+_DB_VERSION_TTL = 300
+_db_version: Dict[str, Any] = {"value": None, "checked_at": 0.0}
+
+# Image reference grammar of distribution/reference: [registry[:port]/]path[:tag][@digest]
+_DOMAIN_COMPONENT = r"(?:[a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9])"
+_PATH_COMPONENT = r"[a-z0-9]+(?:(?:[._]|__|-+)[a-z0-9]+)*"
+_IMAGE_REFERENCE = re.compile(
+    rf"(?:{_DOMAIN_COMPONENT}(?:\.{_DOMAIN_COMPONENT})*(?::[0-9]+)?/)?"
+    rf"{_PATH_COMPONENT}(?:/{_PATH_COMPONENT})*"
+    r"(?::[\w][\w.-]{0,127})?"
+    r"(?:@[A-Za-z][A-Za-z0-9]*(?:[-_+.][A-Za-z][A-Za-z0-9]*)*:[0-9a-fA-F]{32,})?",
+    re.ASCII,
+)
+_IMAGE_REFERENCE_MAX_LENGTH = 255
+
+# (findings, inventory entries) emitted per streamed batch
+TrivyBatch = Tuple[List[Dict[str, Any]], List[Dict[str, str]]]
+
+
+async def shutdown() -> None:
+    """Stop this process's local Trivy server, if TRIVY_SERVER_MODE started one."""
+    if _trivy_server is not None:
+        await _trivy_server.stop()
+
+
+def is_valid_image_reference(image: str) -> bool:
+    """True if ``image`` is a well-formed image reference (and so cannot be read as an option)."""
+    return len(image) <= _IMAGE_REFERENCE_MAX_LENGTH and _IMAGE_REFERENCE.fullmatch(image) is not None
 
 
 class ContainerScanner:
-    """Scans container images and filesystems for vulnerabilities using Trivy."""
+    """
+    Scans container images and filesystems for vulnerabilities using Trivy.
+
+    ``scan_image``/``scan_filesystem`` collect every package Trivy reports into
+    ``self.inventory`` for the dependency inventory table, so use one instance
+    per scan. The ``iter_*_batches`` variants stream findings and packages in
+    batches instead, for reports too large to hold in memory.
+    """
 
-    def __init__(self, trivy_path: str = "trivy"):
-        self.trivy_path = trivy_path
+    def __init__(self, trivy_path: Optional[str] = None, timeout: Optional[int] = None):
+        self.trivy_path = trivy_path or settings.TRIVY_PATH
+        self.timeout = timeout or settings.TRIVY_TIMEOUT_SECONDS
+        self.inventory: List[Dict[str, str]] = []
+        self._last_run_ok = False
 
-    async def scan_image(self, image: str) -> List[Dict[str, Any]]:
+    async def scan_image(self, image: str, force_refresh: bool = False) -> List[Dict[str, Any]]:
         """
-        Scan a container image with Trivy.
+        Scan a container image with Trivy and return all findings.
+        Packages are collected into ``self.inventory``.
         Graceful no-op if Trivy is not installed.
         """
-        return await self._run_trivy(["image", "--format", "json", image], f"image:{image}")
+        findings = []
+        async for batch, inventory in self.iter_image_batches(image, force_refresh):
+            findings.extend(batch)
+            self.inventory.extend(inventory)
+        return findings
 
     async def scan_filesystem(self, path: str) -> List[Dict[str, Any]]:
         """
-        Scan a filesystem path with Trivy.
+        Scan a filesystem path with Trivy and return all findings.
         Graceful no-op if Trivy is not installed.
         """
-        return await self._run_trivy(["fs", "--format", "json", path], f"fs:{path}")
-
-    async def _run_trivy(self, args: List[str], target_label: str) -> List[Dict[str, Any]]:
-        """Run Trivy with given arguments and parse JSON output."""
         findings = []
+        async for batch, inventory in self.iter_filesystem_batches(path):
+            findings.extend(batch)
+            self.inventory.extend(inventory)
+        return findings
+
+    async def scan_tarball(self, path: str, label: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Scan a ``docker save`` / OCI image tarball without Trivy.
+
+        Packages are extracted layer by layer (cached by the layer's computed
+        sha256, so a shared base image is only parsed once) and matched against the local
+        advisory index at ADVISORY_INDEX_PATH. Packages are collected into
+        ``self.inventory``. Graceful no-op if the archive cannot be read.
+        """
+        label = label or Path(path).name
+
+        def lookup(digest: str) -> Optional[Dict[str, Any]]:
+            return _layer_cache.get_sync(f"layer:{digest}:v{LAYER_FORMAT_VERSION}")
+
+        def store(digest: str, result: Dict[str, Any]) -> None:
+            _layer_cache.set_sync(f"layer:{digest}:v{LAYER_FORMAT_VERSION}", result)
+
         try:
-            cmd = [self.trivy_path] + args + ["--quiet"]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
+            image = await asyncio.to_thread(analyze_image_tarball, path, lookup, store)
+        except (OSError, EOFError, ValueError, KeyError, IndexError, tarfile.TarError, zlib.error) as e:
+            print(f"Could not read image tarball {path}: {e}")
+            return []
+
+        if not _advisory_index:
+            print("ADVISORY_INDEX_PATH not set or empty — tarball packages inventoried but not matched.")
+
+        findings = []
+        for pkg in image["packages"]:
+            self.inventory.append(make_entry(pkg["ecosystem"], pkg["name"], pkg["version"], pkg["location"]))
+            for advisory in _advisory_index.match(pkg["ecosystem"], pkg["name"], pkg["version"]):
+                findings.append(self._vuln_to_finding({
+                    "VulnerabilityID": advisory.get("id", "Unknown"),
+                    "PkgName": pkg["name"],
+                    "InstalledVersion": pkg["version"],
+                    "FixedVersion": advisory.get("fixed_version") or "not available",
+                    "Severity": advisory.get("severity", "UNKNOWN"),
+                    "Title": advisory.get("title", "Known vulnerability in container dependency"),
+                    "Description": advisory.get("description") or advisory.get("title", "Known vulnerability in container dependency"),
+                    "CVSS": {"nvd": {"V3Score": advisory["cvss"]}} if advisory.get("cvss") else {},
+                }, f"{label}: {pkg['location']}", scanner="vulnalyze-image"))
+
+        print(
+            f"Image tarball {label}: {len(image['packages'])} packages in {image['layers']} layers "
+            f"({image['cached_layers']} cached), {len(findings)} vulnerabilities"
+        )
+        return findings
+
+    async def iter_image_batches(
+        self, image: str, force_refresh: bool = False, batch_size: Optional[int] = None
+    ) -> AsyncIterator[TrivyBatch]:
+        """
+        Scan a container image, yielding ``(findings, inventory)`` batches as
+        Trivy's report streams in. Batches are not accumulated on the scanner,
+        so callers can write them out and keep memory bounded.
+
+        Results are cached by (image digest, Trivy DB version), so unchanged
+        images are served from the cache until the vulnerability DB updates.
+        Images whose digest cannot be resolved are always scanned.
+        """
+        if not is_valid_image_reference(image):
+            print(f"Invalid container image reference {image!r} — skipping container scan.")
+            return
+        batch_size = batch_size or settings.CONTAINER_SCAN_BATCH_SIZE
+        cache_key = None
+        if settings.CONTAINER_CACHE_ENABLED:
+            digest, db_version = await asyncio.gather(
+                self._resolve_image_digest(image), self._trivy_db_version()
             )
+            if digest and db_version:
+                cache_key = f"{digest}|{db_version}"
+
+        if cache_key and not force_refresh:
+            cached = await _scan_cache.get(cache_key)
+            if cached is not None:
+                print(f"Container scan cache hit for {image} ({cache_key})")
+                findings, inventory = cached["findings"], cached["inventory"]
+                for offset in range(0, max(len(findings), len(inventory)), batch_size):
+                    yield findings[offset:offset + batch_size], inventory[offset:offset + batch_size]
+                return
+
+        # Keep a copy for the cache only while the report stays small enough
+        to_cache: Optional[Dict[str, list]] = {"findings": [], "inventory": []} if cache_key else None
+        async for findings, inventory in self._iter_trivy(
+            ["image", "--format", "json", "--list-all-pkgs"], image, f"image:{image}", batch_size
+        ):
+            if to_cache is not None:
+                to_cache["findings"].extend(findings)
+                to_cache["inventory"].extend(inventory)
+                if len(to_cache["findings"]) + len(to_cache["inventory"]) > settings.CONTAINER_CACHE_MAX_ITEMS:
+                    to_cache = None
+            yield findings, inventory
+
+        if to_cache is not None and self._last_run_ok:
+            await _scan_cache.set(cache_key, {
+                "image": image,
+                "scanned_at": datetime.utcnow().isoformat(),
+                **to_cache,
+            })
+
+    async def iter_filesystem_batches(
+        self, path: str, batch_size: Optional[int] = None
+    ) -> AsyncIterator[TrivyBatch]:
+        """Scan a filesystem path, yielding ``(findings, inventory)`` batches."""
+        async for batch in self._iter_trivy(
+            ["fs", "--format", "json", "--list-all-pkgs"], path, f"fs:{path}",
+            batch_size or settings.CONTAINER_SCAN_BATCH_SIZE,
+        ):
+            yield batch
+
+    async def _iter_trivy(
+        self, args: List[str], target: str, target_label: str, batch_size: int
+    ) -> AsyncIterator[TrivyBatch]:
+        """
+        Run Trivy on ``target`` and parse its JSON report incrementally from the pipe.
+        Concurrency is bounded by TRIVY_MAX_CONCURRENCY; cancelling the
+        calling task kills the Trivy child process.
+
+        In TRIVY_SERVER_MODE the scan runs as a client of the local Trivy
+        server; if the client fails before producing a report the server is
+        marked unhealthy and the scan is retried with standalone Trivy.
+        """
+        self._last_run_ok = False
+        total = 0
+        findings: List[Dict[str, Any]] = []
+        inventory: List[Dict[str, str]] = []
+        try:
+            server_url = await _trivy_server.ensure_running() if _trivy_server else None
+            modes = ([server_url] if server_url else []) + [None]
+            for server in modes:
+                cmd = [self.trivy_path] + args + ["--quiet"]
+                if server:
+                    cmd += ["--server", server]
+                # The target is user input; after "--" it can never be parsed as an option
+                cmd += ["--", target]
+                stream = TrivyReportStream()
+                received = False
+                async with StreamingProcess(cmd, self.timeout, _trivy_limiter) as proc:
+                    async for chunk in proc.iter_stdout():
+                        received = True
+                        for event in stream.feed(chunk):
+                            self._collect_event(event, target_label, findings, inventory)
+                            if len(findings) >= batch_size or len(inventory) >= batch_size:
+                                total += len(findings)
+                                yield findings, inventory
+                                findings, inventory = [], []
 
-            if not result.stdout:
-                return findings
+                if not received:
+                    if proc.returncode != 0:
+                        print(f"Trivy exited with code {proc.returncode}: {proc.stderr_tail[-200:].decode(errors='replace')}")
+                        if server:
+                            print("Trivy server client failed — retrying with standalone Trivy.")
+                            _trivy_server.mark_unhealthy()
+                            continue
+                    return
 
-            data = json.loads(result.stdout)
-            findings = self._parse_trivy_output(data, target_label)
-            print(f"Trivy found {len(findings)} vulnerabilities in {target_label}")
+                for event in stream.close():
+                    self._collect_event(event, target_label, findings, inventory)
+                total += len(findings)
+                if findings or inventory:
+                    yield findings, inventory
+                self._last_run_ok = proc.returncode == 0
+                print(f"Trivy found {total} vulnerabilities in {target_label}" + (" (server mode)" if server else ""))
+                return
 
         except FileNotFoundError:
             print(f"Trivy not installed at '{self.trivy_path}' — skipping container scan.")
-        except subprocess.TimeoutExpired:
-            print("Trivy timed out — skipping container scan.")
-        except json.JSONDecodeError as e:
+        except asyncio.TimeoutError:
+            print(f"Trivy timed out after {self.timeout}s — skipping container scan.")
+        except ValueError as e:
             print(f"Failed to parse Trivy JSON output: {e}")
         except Exception as e:
             print(f"Container scan error: {e}")
 
-        return findings
+    def _collect_event(
+        self,
+        event: tuple,
+        target_label: str,
+        findings: List[Dict[str, Any]],
+        inventory: List[Dict[str, str]],
+    ) -> None:
+        kind, target, result_type, item = event
+        target = target or target_label
+        if kind == "vulnerability":
+            findings.append(self._vuln_to_finding(item, target))
+        elif item.get("Name") and item.get("Version"):
+            inventory.append(make_entry(result_type, item["Name"], item["Version"], target))
+
+    async def _resolve_image_digest(self, image: str) -> Optional[str]:
+        """
+        Resolve an image reference to a content digest.
+        Pinned references are used as-is; otherwise the local Docker daemon
+        and then the registry (via skopeo) are asked. Returns None if neither works.
+        """
+        if "@sha256:" in image:
+            return image.split("@", 1)[1]
+
+        lookups = (
+            ["docker", "image", "inspect", "--format", "{{.Id}}", "--", image],
+            ["skopeo", "inspect", "--format", "{{.Digest}}", "--", f"docker://{image}"],
+        )
+        for cmd in lookups:
+            try:
+                returncode, stdout, _ = await run_process(cmd, timeout=30)
+            except (FileNotFoundError, asyncio.TimeoutError):
+                continue
+            digest = stdout.decode(errors="replace").strip()
+            if returncode == 0 and digest.startswith("sha256:"):
+                return digest
+        return None
+
+    async def _trivy_db_version(self) -> Optional[str]:
+        """Return the installed Trivy vulnerability DB timestamp (cached briefly)."""
+        now = time.monotonic()
+        if _db_version["value"] and now - _db_version["checked_at"] < _DB_VERSION_TTL:
+            return _db_version["value"]
+
+        try:
+            returncode, stdout, _ = await run_process(
+                [self.trivy_path, "version", "--format", "json"], timeout=30
+            )
+            info = json.loads(stdout) if returncode == 0 and stdout else {}
+        except (FileNotFoundError, asyncio.TimeoutError, json.JSONDecodeError):
+            return None
+
+        db = info.get("VulnerabilityDB") or {}
+        version = f"{db.get('Version', '')}:{db.get('UpdatedAt', '')}" if db.get("UpdatedAt") else None
+        _db_version.update(value=version, checked_at=now)
+        return version
 
     @staticmethod
     def _parse_trivy_output(data: dict, target_label: str) -> List[Dict[str, Any]]:
-        """Parse Trivy JSON output into finding dicts."""
+        """Parse a fully loaded Trivy JSON report into finding dicts."""
         findings = []
 
         # Trivy output format: {"Results": [{"Vulnerabilities": [...]}]}
@@ -69,28 +357,33 @@ class ContainerScanner:
             vulns = result.get("Vulnerabilities") or []
 
             for vuln in vulns:
-                severity = ContainerScanner._map_trivy_severity(vuln.get("Severity", "UNKNOWN"))
-                findings.append({
-                    "title": f"Container Vulnerability: {vuln.get('VulnerabilityID', 'Unknown')} in {vuln.get('PkgName', '?')}",
-                    "description": vuln.get("Description", vuln.get("Title", "Known vulnerability in container dependency")),
-                    "severity": severity,
-                    "location": f"{target}: {vuln.get('PkgName', '?')}@{vuln.get('InstalledVersion', '?')}",
-                    "evidence": f"CVE: {vuln.get('VulnerabilityID', 'N/A')} | Fixed: {vuln.get('FixedVersion', 'not available')}",
-                    "metadata": {
-                        "cweid": "1395",
-                        "confidence": "high",
-                        "scanner": "trivy",
-                        "vuln_id": vuln.get("VulnerabilityID", ""),
-                        "pkg_name": vuln.get("PkgName", ""),
-                        "installed_version": vuln.get("InstalledVersion", ""),
-                        "fixed_version": vuln.get("FixedVersion", ""),
-                        "cvss_score": ContainerScanner._extract_cvss(vuln),
-                        "owasp": "A06:2021-Vulnerable and Outdated Components",
-                    },
-                })
+                findings.append(ContainerScanner._vuln_to_finding(vuln, target))
 
         return findings
 
+    @staticmethod
+    def _vuln_to_finding(vuln: dict, target: str, scanner: str = "trivy") -> Dict[str, Any]:
+        """Convert one Trivy vulnerability object into a finding dict."""
+        severity = ContainerScanner._map_trivy_severity(vuln.get("Severity", "UNKNOWN"))
+        return {
+            "title": f"Container Vulnerability: {vuln.get('VulnerabilityID', 'Unknown')} in {vuln.get('PkgName', '?')}",
+            "description": vuln.get("Description", vuln.get("Title", "Known vulnerability in container dependency")),
+            "severity": severity,
+            "location": f"{target}: {vuln.get('PkgName', '?')}@{vuln.get('InstalledVersion', '?')}",
+            "evidence": f"CVE: {vuln.get('VulnerabilityID', 'N/A')} | Fixed: {vuln.get('FixedVersion', 'not available')}",
+            "metadata": {
+                "cweid": "1395",
+                "confidence": "high",
+                "scanner": scanner,
+                "vuln_id": vuln.get("VulnerabilityID", ""),
+                "pkg_name": vuln.get("PkgName", ""),
+                "installed_version": vuln.get("InstalledVersion", ""),
+                "fixed_version": vuln.get("FixedVersion", ""),
+                "cvss_score": ContainerScanner._extract_cvss(vuln),
+                "owasp": "A06:2021-Vulnerable and Outdated Components",
+            },
+        }
+
     @staticmethod
     def _map_trivy_severity(severity: str) -> str:
         mapping = {
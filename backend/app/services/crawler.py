@@ -0,0 +1,223 @@
+"""
+Crawler — breadth-first same-origin crawl for the built-in DAST fallback.
+
+When ZAP is not configured, the dynamic scan would otherwise only look at
+the root URL. The crawler seeds from the root, ``robots.txt`` sitemaps and
+``/sitemap.xml``, follows ``href`` links level by level up to
+CRAWL_MAX_DEPTH / CRAWL_MAX_PAGES and runs the passive DOM checks on every
+page it fetches. Requests go through the shared HTTP client, so per-host
+concurrency (HTTP_PER_HOST_CONNECTIONS) and keep-alive apply; bodies are
+streamed through the size-capped DOM scanner rather than buffered.
+"""
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+from app.core.config import get_settings
+from app.services.dom_scan import scan_body
+from app.services.http_client import DEFAULT_HEADERS, http_client
+
+settings = get_settings()
+
+_SITEMAP_LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+_SKIP_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".css", ".js", ".map",
+    ".woff", ".woff2", ".ttf", ".pdf", ".zip", ".gz", ".mp4", ".mp3", ".webm",
+)
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_MAX_SITEMAP_BYTES = 2 * 1024 * 1024
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve ``url`` against ``base`` and canonicalize it for the seen-set:
+    lowercase scheme/host, no default port, no fragment, ``/`` for an empty
+    path. Returns None for non-HTTP links (``mailto:``, ``javascript:`` ...).
+    """
+    try:
+        absolute = urljoin(base, url.strip()) if base else url.strip()
+        absolute, _ = urldefrag(absolute)
+        parts = urlsplit(absolute)
+        scheme = parts.scheme.lower()
+        if scheme not in _DEFAULT_PORTS or not parts.hostname:
+            return None
+        host = parts.hostname.lower()
+        if ":" in host:
+            host = f"[{host}]"
+        netloc = host if parts.port in (None, _DEFAULT_PORTS[scheme]) else f"{host}:{parts.port}"
+    except ValueError:
+        return None
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class Crawler:
+    """One crawl of a single origin; ``run`` returns the DOM findings."""
+
+    def __init__(
+        self,
+        root_url: str,
+        max_depth: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.root = normalize_url(root_url) or root_url
+        self.origin = _origin(self.root)
+        self.max_depth = settings.CRAWL_MAX_DEPTH if max_depth is None else max_depth
+        self.max_pages = max_pages or settings.CRAWL_MAX_PAGES
+        self.concurrency = max(1, concurrency or settings.CRAWL_CONCURRENCY)
+        self.robots: Optional[RobotFileParser] = None
+        self.seen: Set[str] = set()
+        self.findings: List[Dict[str, Any]] = []
+        self._finding_keys: Set[Tuple[str, str]] = set()
+        self.stats = {"pages_fetched": 0, "pages_failed": 0, "robots_disallowed": 0}
+
+    def _allowed(self, url: str) -> bool:
+        if self.robots is None:
+            return True
+        if self.robots.can_fetch(DEFAULT_HEADERS["User-Agent"], url):
+            return True
+        self.stats["robots_disallowed"] += 1
+        return False
+
+    def _admit(self, url: str) -> bool:
+        """Add ``url`` to the seen-set if it is in scope and not yet known."""
+        if url in self.seen or len(self.seen) >= self.max_pages:
+            return False
+        if _origin(url) != self.origin or urlsplit(url).path.lower().endswith(_SKIP_EXTENSIONS):
+            return False
+        if not self._allowed(url):
+            return False
+        self.seen.add(url)
+        return True
+
+    async def _fetch_text(self, url: str, max_bytes: int) -> Optional[str]:
+        try:
+            async with http_client.stream("GET", url, follow_redirects=True) as response:
+                if response.status_code != 200:
+                    return None
+                chunks: List[bytes] = []
+                size = 0
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= max_bytes:
+                        break
+                body = b"".join(chunks)[:max_bytes]
+                return body.decode(response.charset_encoding or "utf-8", errors="replace")
+        except Exception:
+            return None
+
+    async def _load_robots(self) -> List[str]:
+        """Parse robots.txt and return the sitemap URLs it lists."""
+        text = await self._fetch_text(f"{self.origin}/robots.txt", 512 * 1024)
+        if text is None:
+            return []
+        robots = RobotFileParser()
+        robots.parse(text.splitlines())
+        self.robots = robots
+        return list(robots.site_maps() or [])
+
+    async def _sitemap_urls(self, sitemaps: List[str]) -> List[str]:
+        urls: List[str] = []
+        pending = list(dict.fromkeys(sitemaps + [f"{self.origin}/sitemap.xml"]))
+        # Sitemap indexes may nest one level of further sitemaps
+        for _ in range(2):
+            nested: List[str] = []
+            for sitemap in pending:
+                sitemap = normalize_url(sitemap, self.root)
+                if not sitemap or _origin(sitemap) != self.origin:
+                    continue
+                text = await self._fetch_text(sitemap, _MAX_SITEMAP_BYTES)
+                if not text:
+                    continue
+                target = nested if "<sitemapindex" in text else urls
+                target.extend(loc.replace("&amp;", "&") for loc in _SITEMAP_LOC_RE.findall(text))
+                if len(urls) >= self.max_pages:
+                    return urls
+            pending = nested
+        return urls
+
+    def _record(self, findings: List[Dict[str, Any]]) -> None:
+        for finding in findings:
+            key = (finding["title"], finding["evidence"])
+            if key not in self._finding_keys:
+                self._finding_keys.add(key)
+                self.findings.append(finding)
+
+    async def _visit(self, url: str) -> List[str]:
+        """Fetch one page, record its DOM findings and return its in-scope links."""
+        try:
+            async with http_client.stream("GET", url, follow_redirects=True) as response:
+                content_type = response.headers.get("content-type", "")
+                final_url = str(response.url)
+                if _origin(normalize_url(final_url) or final_url) != self.origin:
+                    return []
+                if content_type and "html" not in content_type and "javascript" not in content_type:
+                    return []
+                page = await scan_body(
+                    url, response.aiter_bytes(), settings.DOM_SCAN_MAX_BYTES,
+                    response.charset_encoding, collect_links="html" in content_type or not content_type,
+                )
+        except Exception as e:
+            self.stats["pages_failed"] += 1
+            print(f"Crawler: failed to fetch {url}: {str(e)[:120]}")
+            return []
+        self.stats["pages_fetched"] += 1
+        self._record(page["findings"])
+        links = []
+        for link in page["links"]:
+            normalized = normalize_url(link, final_url)
+            if normalized:
+                links.append(normalized)
+        return links
+
+    async def _crawl_level(self, level: List[str]) -> List[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in level:
+            queue.put_nowait(url)
+        discovered: List[str] = []
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                discovered.extend(await self._visit(url))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(level)))))
+        return discovered
+
+    async def run(self) -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        sitemaps = await self._load_robots()
+        # The root is the requested target, so it is fetched even if robots.txt disallows it
+        self.seen.add(self.root)
+        level = [self.root]
+        for url in await self._sitemap_urls(sitemaps):
+            normalized = normalize_url(url)
+            if normalized and self._admit(normalized):
+                level.append(normalized)
+
+        depth = 0
+        while level:
+            links = await self._crawl_level(level)
+            depth += 1
+            if depth > self.max_depth:
+                break
+            level = [url for url in dict.fromkeys(links) if self._admit(url)]
+
+        elapsed = time.monotonic() - started
+        print(
+            f"Crawler: {self.stats['pages_fetched']} pages from {self.origin} in {elapsed:.1f}s, "
+            f"{len(self.findings)} DOM findings"
+        )
+        return self.findings
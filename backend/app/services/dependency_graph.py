@@ -0,0 +1,241 @@
+"""
+Dependency Graph — compact package graph built from lockfiles.
+
+Nodes are interned to integer ids and edges are stored as per-node ``array('i')``
+adjacency lists. "Which workspaces pull in X, and how" is answered with a
+single BFS backwards from every copy of X, shared by all roots (the project
+root and every workspace package), so a query costs O(nodes + edges) time and
+memory no matter how many workspaces the lockfile has. The result of each walk
+is memoized per package name (bounded LRU), so repeated queries for the same
+package — e.g. one per advisory — reuse it.
+"""
+from array import array
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional
+
+
+_DEPENDENCY_FIELDS = ("dependencies", "optionalDependencies", "peerDependencies", "devDependencies")
+# Memoized next-hop arrays (one int per node each) kept per graph
+_NEXT_HOP_CACHE_SIZE = 64
+
+
+class DependencyGraph:
+    """Integer-id dependency graph answering shortest-path queries from its roots."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.keys: List[str] = []
+        self.names: List[str] = []
+        self.versions: List[str] = []
+        self._adjacency: List[array] = []
+        self._by_name: Dict[str, List[int]] = {}
+        self.roots: List[int] = []
+        # Reversed edges and per-name next-hop arrays, built on demand and reset when the graph changes
+        self._reverse: Optional[List[array]] = None
+        self._next_hop: "OrderedDict[str, array]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add_node(self, key: str, name: str, version: str = "") -> int:
+        """Intern a node by its unique key (e.g. lockfile install path)."""
+        node_id = self._ids.get(key)
+        if node_id is not None:
+            return node_id
+        node_id = len(self.keys)
+        self._ids[key] = node_id
+        self.keys.append(key)
+        self.names.append(name)
+        self.versions.append(version)
+        self._adjacency.append(array("i"))
+        self._by_name.setdefault(name, []).append(node_id)
+        self._invalidate()
+        return node_id
+
+    def add_edge(self, src: int, dst: int) -> None:
+        if src != dst:
+            self._adjacency[src].append(dst)
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._reverse = None
+        self._next_hop.clear()
+
+    def add_root(self, node_id: int) -> None:
+        if node_id not in self.roots:
+            self.roots.append(node_id)
+
+    def node_id(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def nodes_named(self, name: str) -> List[int]:
+        return self._by_name.get(name, [])
+
+    def label(self, node_id: int) -> str:
+        version = self.versions[node_id]
+        return f"{self.names[node_id]}@{version}" if version else self.names[node_id]
+
+    def _reverse_adjacency(self) -> List[array]:
+        if self._reverse is None:
+            reverse = [array("i") for _ in self.keys]
+            for src, children in enumerate(self._adjacency):
+                for child in children:
+                    reverse[child].append(src)
+            self._reverse = reverse
+        return self._reverse
+
+    def _nearest(self, targets: List[int]) -> array:
+        """
+        Multi-source BFS over reversed edges. For every node, returns the next
+        hop on a shortest path to the nearest of ``targets`` (a target points
+        at itself); -1 marks nodes that reach none of them.
+        """
+        next_hop = array("i", [-1]) * len(self.keys)
+        queue = deque()
+        for target in targets:
+            if next_hop[target] < 0:
+                next_hop[target] = target
+                queue.append(target)
+        reverse = self._reverse_adjacency()
+        while queue:
+            node = queue.popleft()
+            for parent in reverse[node]:
+                if next_hop[parent] < 0:
+                    next_hop[parent] = node
+                    queue.append(parent)
+        return next_hop
+
+    @staticmethod
+    def _follow(next_hop: array, root: int) -> List[int]:
+        if next_hop[root] < 0:
+            return []
+        path = [root]
+        while next_hop[path[-1]] != path[-1]:
+            path.append(next_hop[path[-1]])
+        return path
+
+    def reaches(self, root: int, node_id: int) -> bool:
+        """Forward BFS from root, stopping as soon as ``node_id`` is found."""
+        seen = bytearray(len(self.keys))
+        seen[root] = 1
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            if node == node_id:
+                return True
+            for child in self._adjacency[node]:
+                if not seen[child]:
+                    seen[child] = 1
+                    queue.append(child)
+        return False
+
+    def shortest_path(self, root: int, targets: List[int]) -> List[int]:
+        """Shortest path from root to the nearest of ``targets``; empty if unreachable."""
+        return self._follow(self._nearest(targets), root)
+
+    def introducing_paths(self, name: str) -> Dict[str, List[str]]:
+        """
+        For every root that pulls in a package named ``name``,
+        return the shortest introducing path as ``name@version`` labels.
+        """
+        targets = self.nodes_named(name)
+        if not targets:
+            return {}
+
+        next_hop = self._next_hop.get(name)
+        if next_hop is None:
+            next_hop = self._nearest(targets)
+            self._next_hop[name] = next_hop
+            if len(self._next_hop) > _NEXT_HOP_CACHE_SIZE:
+                self._next_hop.popitem(last=False)
+        else:
+            self._next_hop.move_to_end(name)
+        paths = {}
+        for root in self.roots:
+            path = self._follow(next_hop, root)
+            if path:
+                paths[self.label(root)] = [self.label(n) for n in path]
+        return paths
+
+
+def _package_name(path: str, info: Dict[str, Any]) -> str:
+    if info.get("name"):
+        return info["name"]
+    if "node_modules/" in path:
+        return path.rsplit("node_modules/", 1)[-1]
+    return path or "(root)"
+
+
+def _resolve_install_path(packages: Dict[str, Any], from_path: str, dep: str) -> Optional[str]:
+    """Node's resolution: look in ``<dir>/node_modules/<dep>`` walking up to the root."""
+    parts = from_path.split("/") if from_path else []
+    while True:
+        base = "/".join(parts)
+        candidate = f"{base}/node_modules/{dep}" if base else f"node_modules/{dep}"
+        if candidate in packages:
+            return candidate
+        if not parts:
+            return None
+        parts.pop()
+
+
+def _packages_from_v1(lock: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuild a v2-style ``packages`` map from a lockfile v1 ``dependencies`` tree.
+
+    v1 does not record the project's own dependency list, so the root is
+    linked to the top-level packages that no other package requires.
+    """
+    packages: Dict[str, Any] = {}
+    required = set()
+    pending = [("", lock.get("dependencies") or {})]
+    while pending:
+        prefix, dependencies = pending.pop()
+        for name, info in dependencies.items():
+            path = f"{prefix}node_modules/{name}"
+            requires = dict(info.get("requires") or {})
+            packages[path] = {"version": info.get("version", ""), "dependencies": requires}
+            required.update(requires)
+            pending.append((f"{path}/", info.get("dependencies") or {}))
+    top_level = [path[len("node_modules/"):] for path in packages if path.count("node_modules/") == 1]
+    packages[""] = {
+        "name": lock.get("name", ""),
+        "version": lock.get("version", ""),
+        "dependencies": {name: "*" for name in top_level if name not in required},
+    }
+    return packages
+
+
+def parse_package_lock(lock: Dict[str, Any]) -> DependencyGraph:
+    """
+    Build a DependencyGraph from an npm package-lock.json.
+
+    Roots are the project itself and every workspace package. Workspace links
+    (``"link": true`` entries) are followed to the workspace they point at.
+    Lockfile v1 (no ``packages`` map) is converted with ``_packages_from_v1``.
+    """
+    graph = DependencyGraph()
+    packages: Dict[str, Any] = lock.get("packages") or {}
+    if not packages and lock.get("dependencies"):
+        packages = _packages_from_v1(lock)
+
+    def node_for(path: str) -> int:
+        info = packages[path]
+        if info.get("link") and info.get("resolved") in packages:
+            path = info["resolved"]
+            info = packages[path]
+        return graph.add_node(path, _package_name(path, info), info.get("version", ""))
+
+    for path, info in packages.items():
+        if info.get("link"):
+            continue
+        src = node_for(path)
+        if "node_modules/" not in path:
+            graph.add_root(src)
+        for field in _DEPENDENCY_FIELDS:
+            for dep in info.get(field) or {}:
+                dep_path = _resolve_install_path(packages, path, dep)
+                if dep_path is not None:
+                    graph.add_edge(src, node_for(dep_path))
+
+    return graph
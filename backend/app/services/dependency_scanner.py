@@ -2,15 +2,61 @@
 Dependency Scanner — Detects vulnerable dependencies using pip-audit and npm audit.
 Graceful no-op when tools are not installed.
 """
+import asyncio
 import json
-import subprocess
+import re
 import sys
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from app.services.dependency_graph import DependencyGraph, parse_package_lock
+from app.services.inventory import make_entry
+from app.services.process_runner import run_process
+
+_AUDIT_TIMEOUT = 120
+
+# One requirements.txt line: a pinned/ranged requirement, an option or an include
+_REQUIREMENT_LINE = re.compile(
+    r"(?:[A-Za-z0-9][A-Za-z0-9._-]*(?:\[[A-Za-z0-9_,.\s-]*\])?\s*"
+    r"(?:(?:==|>=|<=|~=|!=|>|<)\s*[A-Za-z0-9.*+!_-]+\s*,?\s*)*(?:;.*)?|-[-\w]+(?:[\s=].*)?)"
+)
+
+
+def detect_manifest(content: str) -> Optional[str]:
+    """
+    Identify submitted source that is a dependency manifest rather than code.
+    Returns "package-lock.json", "requirements.txt" or None.
+    """
+    text = (content or "").strip()
+    if not text:
+        return None
+    if text.startswith("{"):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(data, dict) and "lockfileVersion" in data:
+            return "package-lock.json"
+        return None
+    lines = [line.split(" #", 1)[0].strip() for line in text.splitlines()]
+    lines = [line for line in lines if line and not line.startswith("#")]
+    if any("==" in line for line in lines) and all(_REQUIREMENT_LINE.fullmatch(line) for line in lines):
+        return "requirements.txt"
+    return None
 
 
 class DependencyScanner:
-    """Scans project dependencies for known vulnerabilities."""
+    """
+    Scans project dependencies for known vulnerabilities.
+
+    Every package seen during a scan is also collected into ``self.inventory``
+    for the dependency inventory table, so use one instance per scan.
+    """
+
+    def __init__(self):
+        self.inventory: List[Dict[str, str]] = []
+        self.dependency_graph: DependencyGraph | None = None
 
     async def scan_python(self, requirements_path: str = "") -> List[Dict[str, Any]]:
         """
@@ -23,18 +69,17 @@ class DependencyScanner:
             if requirements_path and Path(requirements_path).exists():
                 cmd.extend(["--requirement", requirements_path])
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120,
-            )
+            _, stdout, _ = await run_process(cmd, timeout=_AUDIT_TIMEOUT)
 
-            if result.stdout:
-                data = json.loads(result.stdout)
+            if stdout:
+                data = json.loads(stdout)
                 # pip-audit returns a list of dependency objects
                 deps = data if isinstance(data, list) else data.get("dependencies", [])
                 for dep in deps:
+                    if dep.get("version"):
+                        self.inventory.append(make_entry(
+                            "pypi", dep["name"], dep["version"], requirements_path or "environment"
+                        ))
                     for vuln in dep.get("vulns", []):
                         severity = self._map_pip_audit_severity(vuln.get("fix_versions", []))
                         findings.append({
@@ -56,7 +101,7 @@ class DependencyScanner:
 
         except FileNotFoundError:
             print("pip-audit not installed — skipping Python dependency scan.")
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print("pip-audit timed out — skipping.")
         except Exception as e:
             print(f"pip-audit error: {e} — skipping Python dependency scan.")
@@ -73,20 +118,17 @@ class DependencyScanner:
         if not lock_path.exists():
             return findings
 
+        graph = self._load_npm_graph(lock_path)
+
         try:
-            result = subprocess.run(
-                ["npm", "audit", "--json"],
-                capture_output=True,
-                text=True,
-                cwd=project_path,
-                timeout=120,
-            )
-
-            if result.stdout:
-                data = json.loads(result.stdout)
+            _, stdout, _ = await run_process(["npm", "audit", "--json"], timeout=_AUDIT_TIMEOUT, cwd=project_path)
+
+            if stdout:
+                data = json.loads(stdout)
                 vulnerabilities = data.get("vulnerabilities", {})
                 for pkg_name, info in vulnerabilities.items():
                     severity = info.get("severity", "low")
+                    introduced_by = graph.introducing_paths(pkg_name) if graph else {}
                     for via in info.get("via", []):
                         if isinstance(via, dict):
                             findings.append({
@@ -102,19 +144,59 @@ class DependencyScanner:
                                     "ghsa": via.get("source", ""),
                                     "cvss_score": via.get("cvss", {}).get("score"),
                                     "owasp": "A06:2021-Vulnerable and Outdated Components",
+                                    "introduced_by": introduced_by,
+                                    "dependency_path": min(introduced_by.values(), key=len, default=[]),
                                 },
                             })
             print(f"npm audit found {len(findings)} vulnerabilities.")
 
         except FileNotFoundError:
             print("npm not installed — skipping npm dependency scan.")
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print("npm audit timed out — skipping.")
         except Exception as e:
             print(f"npm audit error: {e} — skipping.")
 
         return findings
 
+    async def scan_manifest(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Audit submitted source that is a ``package-lock.json`` or
+        ``requirements.txt`` (see ``detect_manifest``); other source yields nothing.
+        """
+        kind = detect_manifest(content)
+        if kind is None:
+            return []
+        with tempfile.TemporaryDirectory(prefix="vulnalyze-deps-") as workdir:
+            manifest = Path(workdir) / kind
+            manifest.write_text(content, encoding="utf-8")
+            if kind == "package-lock.json":
+                # npm audit wants a package.json; the lockfile's root entry (v2+) carries one
+                root = json.loads(content).get("packages", {}).get("", {})
+                (Path(workdir) / "package.json").write_text(json.dumps(root), encoding="utf-8")
+                return await self.scan_npm(workdir)
+            return await self.scan_python(str(manifest))
+
+    def _load_npm_graph(self, lock_path: Path) -> DependencyGraph | None:
+        """
+        Parse package-lock.json into a dependency graph and record every
+        installed package in the inventory.
+        """
+        try:
+            lock = json.loads(lock_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Could not read {lock_path} for dependency graph: {e}")
+            return None
+
+        graph = parse_package_lock(lock)
+        for node_id, key in enumerate(graph.keys):
+            if "node_modules/" in key and graph.versions[node_id]:
+                self.inventory.append(make_entry(
+                    "npm", graph.names[node_id], graph.versions[node_id], f"package-lock.json: {key}"
+                ))
+        self.dependency_graph = graph
+        return graph
+
     @staticmethod
     def _map_pip_audit_severity(fix_versions: list) -> str:
         """Heuristic: if no fix available, severity is higher."""
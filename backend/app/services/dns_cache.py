@@ -0,0 +1,134 @@
+"""
+DNS Cache — process-wide hostname resolver with TTL caching.
+
+SSRF validation, the shared HTTP client and the network scanner all resolve
+the same hostnames, often in bursts (bulk scans validate thousands of URLs
+at once). Lookups go through ``loop.getaddrinfo``, which runs in the
+default executor, so a slow resolver never blocks the event loop.
+Successful answers are cached for DNS_CACHE_TTL_SECONDS. Failures
+(NXDOMAIN, SERVFAIL) are cached for DNS_NEGATIVE_TTL_SECONDS.
+Concurrent lookups of the same host on the same loop share one query.
+
+``getaddrinfo`` does not expose record TTLs, so the configured TTLs act as
+an upper bound on how stale an answer can be.
+"""
+import asyncio
+import socket
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class DnsCache:
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # host -> (expires_at, addresses or None for a cached failure, error message)
+        self._entries: Dict[str, Tuple[float, Optional[List[str]], str]] = {}
+        self._lock = threading.Lock()
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.stats = {"dns_hits": 0, "dns_misses": 0, "dns_failures": 0}
+
+    def _cached(self, host: str) -> Optional[List[str]]:
+        """Addresses for ``host`` if cached; raises the cached error for negative entries."""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return None
+            expires_at, addresses, error = entry
+            if expires_at <= time.monotonic():
+                del self._entries[host]
+                return None
+            self.stats["dns_hits"] += 1
+        if addresses is None:
+            raise socket.gaierror(socket.EAI_NONAME, error)
+        return addresses
+
+    def _store(self, host: str, addresses: Optional[List[str]], error: str = "") -> None:
+        ttl = self.ttl if addresses is not None else self.negative_ttl
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest insertion to stay bounded
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[host] = (time.monotonic() + ttl, addresses, error)
+
+    @staticmethod
+    def _addresses(infos) -> List[str]:
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    def _record(self, host: str, infos=None, error: Optional[socket.gaierror] = None) -> List[str]:
+        if error is not None:
+            with self._lock:
+                self.stats["dns_failures"] += 1
+            # Only definitive failures are cached; transient ones (EAI_AGAIN) are retried
+            if error.errno != socket.EAI_AGAIN:
+                self._store(host, None, str(error))
+            raise error
+        addresses = self._addresses(infos)
+        self._store(host, addresses)
+        return addresses
+
+    async def resolve(self, host: str) -> List[str]:
+        """Resolve ``host`` to a de-duplicated address list; raises ``socket.gaierror``."""
+        host = host.lower().rstrip(".")
+        cached = self._cached(host)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        pending = self._pending.setdefault(loop, {})
+        future = pending.get(host)
+        if future is not None:
+            with self._lock:
+                self.stats["dns_hits"] += 1
+            return await asyncio.shield(future)
+
+        with self._lock:
+            self.stats["dns_misses"] += 1
+        future = asyncio.ensure_future(self._lookup(loop, host))
+        pending[host] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            pending.pop(host, None)
+
+    async def _lookup(self, loop: asyncio.AbstractEventLoop, host: str) -> List[str]:
+        try:
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            return self._record(host, error=e)
+        return self._record(host, infos)
+
+    def resolve_sync(self, host: str) -> List[str]:
+        """Blocking variant for code running in worker threads; shares the cache."""
+        host = host.lower().rstrip(".")
+        cached = self._cached(host)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.stats["dns_misses"] += 1
+        try:
+            infos = socket.getaddrinfo(host, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            return self._record(host, error=e)
+        return self._record(host, infos)
+
+    def forget(self, host: str) -> None:
+        """Drop a cached answer, e.g. after every address refused connections."""
+        with self._lock:
+            self._entries.pop(host.lower().rstrip("."), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+dns_cache = DnsCache(settings.DNS_CACHE_TTL_SECONDS, settings.DNS_NEGATIVE_TTL_SECONDS)
@@ -0,0 +1,162 @@
+"""
+DOM Scan — streaming secret/route detection over HTTP response bodies.
+
+Response bodies are consumed chunk by chunk rather than buffered, and only
+the first DOM_SCAN_MAX_BYTES are inspected, so memory per concurrent scan is
+bounded by the chunk size plus a fixed overlap. Each chunk is searched
+together with the tail of the previous one so matches spanning a chunk
+boundary are still found.
+"""
+import codecs
+import re
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Pattern
+
+from app.models.models import VulnerabilitySeverity
+
+# Characters carried over between windows; matches longer than this may be
+# reported truncated when they straddle a chunk boundary.
+OVERLAP_CHARS = 4096
+
+# Page links collected for the crawler (href attributes only — scripts and
+# images are not crawled)
+_LINK_RE = re.compile(r'''href\s*=\s*["']([^"'<>\s]+)["']''', re.IGNORECASE)
+MAX_LINKS_PER_PAGE = 500
+
+_DOM_RULES: List[Dict[str, Any]] = [
+    {
+        # Exposed AWS S3 Bucket (Cloud Infrastructure Leak)
+        "pattern": re.compile(r'(https?://[a-zA-Z0-9.\-_]+\.s3\.amazonaws\.com[^\s\'"<>]+)'),
+        "title": "Exposed AWS S3 Bucket URL (Cloud Infrastructure Leak)",
+        "description": "An internal AWS S3 bucket URL was found hardcoded in the frontend DOM. Attackers can scrape this to find unsecured buckets and exfiltrate data.",
+        "severity": VulnerabilitySeverity.HIGH,
+        "evidence": lambda m: f"Found in DOM: {m.group(1)}",
+        "metadata": {"cweid": "200", "confidence": "high", "scanner": "dom-scan", "owasp": "A05:2021-Security Misconfiguration"},
+    },
+    {
+        # Exposed OpenAI/Anthropic API Key in DOM
+        "pattern": re.compile(r"(sk-(?:proj-)?[A-Za-z0-9_\-]{20,})"),
+        "title": "Hardcoded AI API Key in Client Code",
+        "description": "A live AI API key (OpenAI/Anthropic) was found exposed in the client-side JavaScript/HTML. This allows immediate billing theft and quota exhaustion.",
+        "severity": VulnerabilitySeverity.CRITICAL,
+        "evidence": lambda m: f"Found API Key pattern in DOM: {m.group(1)[:15]}...",
+        "metadata": {"cweid": "798", "confidence": "high", "scanner": "dom-scan", "owasp": "A02:2021-Cryptographic Failures"},
+    },
+    {
+        # Exposed JWT Session Token in DOM
+        "pattern": re.compile(r"(eyJ[a-zA-Z0-9_-]{10,}\.eyJ[a-zA-Z0-9_-]{10,}\.[a-zA-Z0-9_-]{10,})"),
+        "title": "Exposed JWT Session Token in DOM",
+        "description": "A JSON Web Token (JWT) was found hardcoded in the frontend HTML/JS. Attackers can steal this token to hijack an active session.",
+        "severity": VulnerabilitySeverity.CRITICAL,
+        "evidence": lambda m: f"Found JWT in DOM: {m.group(1)[:30]}...",
+        "metadata": {"cweid": "200", "confidence": "high", "scanner": "dom-scan", "owasp": "A01:2021-Broken Access Control"},
+    },
+    {
+        # Exposed Admin Portal Routes
+        "pattern": re.compile(r'href=[\'"](?:/[a-zA-Z0-9\-_]*)?/(?:wp-admin|admin/login|dashboard/admin)[\'"]', re.IGNORECASE),
+        "title": "Exposed Administrative Portal Route",
+        "description": "A link to an internal administrative portal was found exposed to unauthenticated users. This provides attackers an immediate target for brute-force attacks.",
+        "severity": VulnerabilitySeverity.MEDIUM,
+        "evidence": lambda m: f"Found Admin Link: {m.group(0)}",
+        "metadata": {"cweid": "425", "confidence": "high", "scanner": "dom-scan", "owasp": "A01:2021-Broken Access Control"},
+    },
+]
+
+
+class DomStreamScanner:
+    """
+    Incremental DOM rule matcher. ``feed`` decoded text as it arrives, then
+    ``close`` to flush the final window; each rule reports its first match.
+    With ``collect_links`` the raw ``href`` values are gathered as well.
+    """
+
+    def __init__(self, url: str, rules: Optional[List[Dict[str, Any]]] = None, collect_links: bool = False):
+        self.url = url
+        self._pending_rules = list(_DOM_RULES if rules is None else rules)
+        self._tail = ""
+        self.findings: List[Dict[str, Any]] = []
+        self.collect_links = collect_links
+        self.links: Dict[str, None] = {}
+
+    @property
+    def done(self) -> bool:
+        return not self._pending_rules
+
+    def _finding(self, rule: Dict[str, Any], match: "re.Match") -> Dict[str, Any]:
+        evidence: Callable[["re.Match"], str] = rule["evidence"]
+        return {
+            "title": rule["title"],
+            "description": rule["description"],
+            "severity": rule["severity"],
+            "location": self.url,
+            "evidence": evidence(match),
+            "metadata": dict(rule["metadata"]),
+        }
+
+    def _search(self, window: str, final: bool) -> None:
+        remaining = []
+        for rule in self._pending_rules:
+            pattern: Pattern = rule["pattern"]
+            match = pattern.search(window)
+            # A short match that runs into the end of the window may continue in
+            # the next chunk; it lies inside the carried-over tail, so defer it.
+            if match and not final and match.end() == len(window) and match.end() - match.start() < OVERLAP_CHARS:
+                match = None
+            if match:
+                self.findings.append(self._finding(rule, match))
+            else:
+                remaining.append(rule)
+        self._pending_rules = remaining
+        if self.collect_links:
+            # Links already seen in the overlap are found again; the dict dedupes
+            for match in _LINK_RE.finditer(window):
+                if len(self.links) >= MAX_LINKS_PER_PAGE:
+                    self.collect_links = False
+                    break
+                self.links[match.group(1)] = None
+
+    def feed(self, text: str) -> None:
+        if not text or (self.done and not self.collect_links):
+            return
+        window = self._tail + text
+        self._search(window, final=False)
+        self._tail = window[-OVERLAP_CHARS:]
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._tail and (self.collect_links or not self.done):
+            self._search(self._tail, final=True)
+        self._tail = ""
+        return self.findings
+
+
+async def scan_body(
+    url: str,
+    chunks: AsyncIterator[bytes],
+    max_bytes: int,
+    encoding: Optional[str] = None,
+    collect_links: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the DOM rules over a streamed body, reading at most ``max_bytes``.
+
+    Returns ``{"findings", "links", "bytes_read", "truncated"}``. Bodies within the cap
+    are read to the end, even once every rule has matched, so the connection
+    can go back to the pool.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scanner = DomStreamScanner(url, collect_links=collect_links)
+    bytes_read = 0
+    truncated = False
+    async for chunk in chunks:
+        if bytes_read + len(chunk) > max_bytes:
+            chunk = chunk[: max_bytes - bytes_read]
+            truncated = True
+        bytes_read += len(chunk)
+        scanner.feed(decoder.decode(chunk))
+        if truncated:
+            break
+    scanner.feed(decoder.decode(b"", final=True))
+    findings = scanner.close()
+    return {"findings": findings, "links": list(scanner.links), "bytes_read": bytes_read, "truncated": truncated}
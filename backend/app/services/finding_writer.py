@@ -0,0 +1,115 @@
+"""
+Finding Writer — persists scanner findings for one scan in batches.
+
+Engines that stream results (e.g. Trivy) hand each batch straight to the
+writer, which commits it and keeps only running severity counts, so a scan
+never needs all of its findings in memory at once. Engines running
+concurrently may share one writer; commits are serialized.
+"""
+import asyncio
+from typing import List, Dict, Any, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.models import Scan, Vulnerability, VulnerabilitySeverity, FindingStatus
+from app.services.inventory import record_inventory
+from app.services.risk_engine import calculate_severity_breakdown, risk_score_from_breakdown
+
+
+def build_vulnerability(scan_id: int, res: Dict[str, Any]) -> Vulnerability:
+    """Map a scanner finding dict onto a Vulnerability row."""
+    evidence = res.get('evidence') or ''
+    if isinstance(evidence, str):
+        evidence = evidence[:500]
+
+    meta = res.get('metadata', {})
+    sev_raw = res.get('severity', VulnerabilitySeverity.LOW)
+    if isinstance(sev_raw, str):
+        try:
+            sev = VulnerabilitySeverity(sev_raw.lower())
+        except ValueError:
+            sev = VulnerabilitySeverity.LOW
+    else:
+        sev = sev_raw
+
+    return Vulnerability(
+        scan_id=scan_id,
+        title=str(res['title'])[:255],
+        description=str(res['description']),
+        severity=sev,
+        location=str(res['location'])[:255],
+        evidence=evidence,
+        rule_id=meta.get('rule_id', ''),
+        cwe_id=str(meta.get('cweid', '')),
+        owasp_category=meta.get('owasp', ''),
+        cvss_score=meta.get('cvss_score'),
+        confidence=meta.get('confidence', 'medium'),
+        scanner_name=meta.get('scanner', 'vulnalyze-engine'),
+        finding_status=FindingStatus.OPEN,
+        vuln_metadata=meta
+    )
+
+
+class FindingWriter:
+    """Writes findings and inventory for a single scan, one batch per commit."""
+
+    def __init__(self, scan_uuid: str):
+        self.scan_uuid = UUID(scan_uuid)
+        self.count = 0
+        self.inventory_count = 0
+        self.breakdown = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def risk_score(self) -> int:
+        return risk_score_from_breakdown(self.breakdown)
+
+    async def _load_scan(self, db) -> Optional[Scan]:
+        result = await db.execute(select(Scan).where(Scan.uuid == self.scan_uuid))
+        return result.scalar_one_or_none()
+
+    async def write(self, findings: List[Dict[str, Any]], stage: Optional[str] = None) -> int:
+        """
+        Persist a batch of findings; returns the number written. ``stage`` tags
+        each row (``vuln_metadata["stage"]``) with the pipeline stage that
+        produced it, so an interrupted stage's partial output can be discarded.
+        """
+        if not findings:
+            return 0
+        async with self.lock, AsyncSessionLocal() as db:
+            db_scan = await self._load_scan(db)
+            if not db_scan:
+                print(f"Scan record not found while writing findings for UUID: {self.scan_uuid}")
+                return 0
+            vulns = [build_vulnerability(db_scan.id, res) for res in findings]
+            if stage:
+                for vuln in vulns:
+                    vuln.vuln_metadata = {**(vuln.vuln_metadata or {}), "stage": stage}
+            db.add_all(vulns)
+            await db.commit()
+
+        for severity, count in calculate_severity_breakdown(findings).items():
+            self.breakdown[severity] += count
+        self.count += len(findings)
+        return len(findings)
+
+    async def write_inventory(self, entries: List[Dict[str, Any]], scanner_name: str, latest: bool = True) -> int:
+        """Persist a batch of dependency inventory entries for the scan (see ``record_inventory``)."""
+        if not entries:
+            return 0
+        async with self.lock, AsyncSessionLocal() as db:
+            db_scan = await self._load_scan(db)
+            if not db_scan:
+                return 0
+            written = await record_inventory(db, db_scan, entries, scanner_name, latest=latest)
+            await db.commit()
+        self.inventory_count += written
+        return written
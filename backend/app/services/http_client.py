@@ -0,0 +1,300 @@
+"""
+HTTP Client — process-wide pooled httpx client for scanning targets.
+
+One ``httpx.AsyncClient`` is shared by every header/DOM scan so TCP and TLS
+connections are kept alive and reused across scans of the same host. HTTP/2
+is negotiated when the ``h2`` package is installed. Concurrent requests per
+host are capped, and a custom network backend resolves through the shared
+DNS cache so repeat scans skip the lookup as well as the handshake.
+
+The client is started and closed with the FastAPI app (see ``app.main``).
+Code running on other event loops (Celery tasks, scripts) gets its own
+client for that loop on first use.
+
+Certificate verification is disabled, as scan targets frequently have
+self-signed or broken certificates — do not use this client for API calls.
+"""
+import asyncio
+import socket
+import ssl
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+from app.core.config import get_settings
+from app.services.dns_cache import dns_cache
+from app.services.ssrf_protection import check_addresses
+
+settings = get_settings()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HEADERS = {"User-Agent": "Vulnalyze-Security-Scanner/1.0 (Mozilla/5.0; Windows NT 10.0; Win64; x64)"}
+
+
+# Addresses vetted by SSRF validation, per hostname, for the current scan
+_pinned_hosts: ContextVar[Optional[Dict[str, List[str]]]] = ContextVar("pinned_hosts", default=None)
+
+
+@lru_cache(maxsize=1)
+def _legacy_tls_context() -> Optional[ssl.SSLContext]:
+    """Client context offering only TLS 1.0/1.1; None if this OpenSSL build cannot."""
+    try:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        context.minimum_version = ssl.TLSVersion.TLSv1
+        context.maximum_version = ssl.TLSVersion.TLSv1_1
+        # Legacy suites sit below OpenSSL 3's default security level
+        context.set_ciphers("ALL:@SECLEVEL=0")
+    except (ValueError, ssl.SSLError):
+        return None
+    return context
+
+
+@contextmanager
+def pin_addresses(pins: Dict[str, List[str]]) -> Iterator[None]:
+    """
+    Connect to the given pre-validated addresses for these hostnames while the
+    block is active (including tasks started inside it).
+
+    Pinned hosts are never re-resolved, which closes the DNS-rebinding window
+    between validation and the request. Any other host reached inside the
+    block (e.g. via a redirect) is resolved and SSRF-checked at connect time.
+    """
+    token = _pinned_hosts.set({host.lower(): list(addresses) for host, addresses in pins.items() if addresses})
+    try:
+        yield
+    finally:
+        _pinned_hosts.reset(token)
+
+
+class _CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that resolves hostnames through the shared DNS cache, or
+    uses the addresses pinned by ``pin_addresses``.
+
+    Only the TCP connect target changes: TLS SNI and the Host header still
+    use the hostname from the request URL.
+    """
+
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+        self.stats = {"connections_opened": 0, "pinned_connections": 0}
+
+    async def _addresses(self, host: str) -> List[str]:
+        pins = _pinned_hosts.get()
+        if pins is not None and host.lower() in pins:
+            self.stats["pinned_connections"] += 1
+            return pins[host.lower()]
+        try:
+            addresses = await dns_cache.resolve(host)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(str(e))
+        if pins is not None:
+            ok, reason = check_addresses(addresses)
+            if not ok:
+                raise httpcore.ConnectError(f"Blocked by SSRF protection: {reason}")
+        return addresses
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = await self._addresses(host)
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                stream = await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+                self.stats["connections_opened"] += 1
+                return stream
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        dns_cache.forget(host)
+        raise last_error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _PooledTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connection pool uses the caching network backend."""
+
+    def __init__(self, backend: _CachingNetworkBackend, limits: httpx.Limits):
+        super().__init__(verify=False, http2=HTTP2_AVAILABLE, limits=limits)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=False),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=HTTP2_AVAILABLE,
+            network_backend=backend,
+        )
+
+    @property
+    def pool(self) -> httpcore.AsyncConnectionPool:
+        return self._pool
+
+
+class SharedHttpClient:
+    """Owner of the pooled client(s) and per-host request limits."""
+
+    def __init__(self):
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, _PooledTransport, _CachingNetworkBackend]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Semaphores disappear once no request for the host is in flight
+        self._host_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, weakref.WeakValueDictionary]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.requests_sent = 0
+
+    def _entry(self):
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None or entry[0].is_closed:
+            backend = _CachingNetworkBackend()
+            limits = httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            )
+            transport = _PooledTransport(backend, limits)
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=settings.HTTP_TIMEOUT_SECONDS,
+                headers=DEFAULT_HEADERS,
+            )
+            entry = (client, transport, backend)
+            self._clients[loop] = entry
+        return entry
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client for the running event loop."""
+        return self._entry()[0]
+
+    @asynccontextmanager
+    async def host_slot(self, url: str) -> AsyncIterator[None]:
+        """Hold one of the HTTP_PER_HOST_CONNECTIONS request slots for the URL's host."""
+        loop = asyncio.get_running_loop()
+        slots = self._host_slots.get(loop)
+        if slots is None:
+            slots = weakref.WeakValueDictionary()
+            self._host_slots[loop] = slots
+        host = httpx.URL(url).host
+        semaphore = slots.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.HTTP_PER_HOST_CONNECTIONS)
+            slots[host] = semaphore
+        async with semaphore:
+            yield
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self.host_slot(url):
+            self.requests_sent += 1
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Like ``request`` but the body is left unread for ``aiter_bytes``."""
+        async with self.host_slot(url):
+            self.requests_sent += 1
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def probe_legacy_tls(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Attempt a TLS 1.0/1.1-only handshake with the URL's host.
+
+        The pooled client requires TLS 1.2, so the version it negotiates never
+        shows whether a server still accepts the deprecated ones. Connects the
+        same way the client does (pinned or SSRF-checked addresses). Returns
+        ``{"version", "cipher"}`` if a legacy handshake completed, else None.
+        """
+        context = _legacy_tls_context()
+        target = httpx.URL(url)
+        if context is None or target.scheme != "https" or not target.host:
+            return None
+        _, _, backend = self._entry()
+        try:
+            addresses = await backend._addresses(target.host)
+        except httpcore.ConnectError:
+            return None
+        for address in addresses:
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(address, target.port or 443, ssl=context, server_hostname=target.host),
+                    settings.HTTP_TIMEOUT_SECONDS,
+                )
+            except (OSError, asyncio.TimeoutError):
+                # ssl.SSLError is an OSError: the server refused every legacy version
+                continue
+            ssl_object = writer.get_extra_info("ssl_object")
+            cipher = ssl_object.cipher() if ssl_object else None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+            return {"version": ssl_object.version() if ssl_object else None, "cipher": cipher[0] if cipher else None}
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for the running loop's client."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        entry = self._clients.get(loop) if loop else None
+        result: Dict[str, Any] = {
+            "http2_available": HTTP2_AVAILABLE,
+            "requests_sent": self.requests_sent,
+            "connections": 0,
+            "idle": 0,
+            "active": 0,
+            "http2_connections": 0,
+            "by_origin": {},
+        }
+        if entry is None:
+            return result
+        _, transport, backend = entry
+        result.update(dns_cache.stats)
+        result.update(backend.stats)
+        for conn in transport.pool.connections:
+            info = conn.info()
+            origin = info.split(",", 1)[0].strip("'")
+            result["connections"] += 1
+            result["idle" if conn.is_idle() else "active"] += 1
+            if "HTTP/2" in info:
+                result["http2_connections"] += 1
+            result["by_origin"][origin] = result["by_origin"].get(origin, 0) + 1
+        return result
+
+    async def start(self) -> None:
+        self._entry()
+
+    async def aclose(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        entry = self._clients.pop(loop, None)
+        if entry is not None:
+            await entry[0].aclose()
+
+
+http_client = SharedHttpClient()
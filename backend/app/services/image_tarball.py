@@ -0,0 +1,325 @@
+"""
+Image Tarball — offline package extraction from ``docker save`` / OCI archives.
+
+Layers are read straight out of the archive (never extracted to disk) and
+each one is reduced to the package databases and language manifests it
+contains: dpkg ``status`` (and distroless ``status.d``), apk ``installed``,
+rpm ``rpmdb.sqlite``, Python ``*.dist-info/METADATA`` and Node
+``node_modules/*/package.json``. Layer results are keyed by the sha256 of
+the layer as stored in the archive, computed here rather than taken from the
+manifest, so a shared base layer is parsed once and reused by every image
+built on it and a crafted archive cannot claim another layer's digest.
+Whiteouts are applied when the layers are merged.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import struct
+import tarfile
+from email.parser import HeaderParser
+from typing import List, Dict, Any, Optional, Callable, IO
+
+# Bump when the per-layer result format, extraction rules or cache key change
+LAYER_FORMAT_VERSION = 2
+
+_MAX_DB_BYTES = 256 * 1024 * 1024
+_MAX_MANIFEST_BYTES = 1024 * 1024
+
+_DPKG_STATUS = "var/lib/dpkg/status"
+_DPKG_STATUS_D = re.compile(r"^var/lib/dpkg/status\.d/[^/]+$")
+_APK_INSTALLED = "lib/apk/db/installed"
+_RPM_SQLITE = "var/lib/rpm/rpmdb.sqlite"
+_OS_RELEASE = ("etc/os-release", "usr/lib/os-release")
+_PY_METADATA = re.compile(r"(?:^|/)[^/]+\.(?:dist-info/METADATA|egg-info/PKG-INFO)$")
+_NODE_PACKAGE = re.compile(r"(?:^|/)node_modules/(?:@[^/]+/)?[^/]+/package\.json$")
+
+# rpm header tags
+_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH = 1000, 1001, 1002, 1003
+
+LayerLookup = Callable[[str], Optional[Dict[str, Any]]]
+LayerStore = Callable[[str, Dict[str, Any]], None]
+
+
+# ── Package database parsers ───────────────────────────────────────────────
+
+def parse_dpkg_status(text: str) -> List[List[str]]:
+    packages = []
+    for paragraph in text.split("\n\n"):
+        fields = {}
+        for line in paragraph.splitlines():
+            if line and not line[0].isspace() and ":" in line:
+                key, _, value = line.partition(":")
+                fields[key.strip()] = value.strip()
+        status = fields.get("Status", "install ok installed")
+        if fields.get("Package") and fields.get("Version") and status.endswith(" installed"):
+            packages.append([fields["Package"], fields["Version"]])
+    return packages
+
+
+def parse_apk_installed(text: str) -> List[List[str]]:
+    packages = []
+    name = version = None
+    for line in text.splitlines() + [""]:
+        if not line:
+            if name and version:
+                packages.append([name, version])
+            name = version = None
+        elif line.startswith("P:"):
+            name = line[2:]
+        elif line.startswith("V:"):
+            version = line[2:]
+    return packages
+
+
+def _rpm_header_fields(blob: bytes) -> Dict[int, Any]:
+    """Decode NAME/VERSION/RELEASE/EPOCH from an rpm header blob."""
+    index_count, _data_len = struct.unpack(">II", blob[:8])
+    data_start = 8 + index_count * 16
+    fields = {}
+    for i in range(index_count):
+        tag, kind, offset, _count = struct.unpack(">IIII", blob[8 + i * 16: 24 + i * 16])
+        if tag not in (_RPMTAG_NAME, _RPMTAG_VERSION, _RPMTAG_RELEASE, _RPMTAG_EPOCH):
+            continue
+        pos = data_start + offset
+        if kind == 4:  # INT32
+            fields[tag] = struct.unpack(">I", blob[pos:pos + 4])[0]
+        elif kind in (6, 9):  # STRING / I18NSTRING
+            fields[tag] = blob[pos:blob.index(b"\0", pos)].decode("utf-8", "replace")
+    return fields
+
+
+def parse_rpmdb_sqlite(data: bytes) -> List[List[str]]:
+    """Read packages from an in-memory copy of rpmdb.sqlite (Python 3.11+)."""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.deserialize(data)
+        packages = []
+        for (blob,) in conn.execute("SELECT blob FROM Packages"):
+            fields = _rpm_header_fields(bytes(blob))
+            if _RPMTAG_NAME in fields and _RPMTAG_VERSION in fields:
+                version = fields[_RPMTAG_VERSION]
+                if fields.get(_RPMTAG_RELEASE):
+                    version = f"{version}-{fields[_RPMTAG_RELEASE]}"
+                if fields.get(_RPMTAG_EPOCH):
+                    version = f"{fields[_RPMTAG_EPOCH]}:{version}"
+                packages.append([fields[_RPMTAG_NAME], version])
+        return packages
+    finally:
+        conn.close()
+
+
+def parse_os_release(text: str) -> Dict[str, str]:
+    info = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            info[key.strip()] = value.strip().strip('"')
+    return {"id": info.get("ID", ""), "version": info.get("VERSION_ID", "")}
+
+
+def _parse_python_metadata(text: str) -> Optional[List[str]]:
+    headers = HeaderParser().parsestr(text, headersonly=True)
+    if headers.get("Name") and headers.get("Version"):
+        return ["pypi", headers["Name"], headers["Version"]]
+    return None
+
+
+def _parse_node_package(text: str) -> Optional[List[str]]:
+    try:
+        manifest = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(manifest, dict) and manifest.get("name") and manifest.get("version"):
+        return ["npm", manifest["name"], manifest["version"]]
+    return None
+
+
+# ── Layer extraction ───────────────────────────────────────────────────────
+
+def _normalize_path(name: str) -> str:
+    while name.startswith("./"):
+        name = name[2:]
+    name = name.lstrip("/")
+    return "" if name == "." else name.rstrip("/")
+
+
+def extract_layer(fileobj: IO[bytes]) -> Dict[str, Any]:
+    """
+    Stream one layer tar (optionally gzip-compressed) and collect package data.
+
+    Returns a JSON-serializable dict:
+        {"os_release": {...} | None,
+         "os_dbs": {path: {"type": "dpkg"|"apk"|"rpm", "packages": [[name, version], ...]}},
+         "lang": {path: [ecosystem, name, version]},
+         "whiteouts": [path, ...], "opaque": [dir, ...]}
+    """
+    result: Dict[str, Any] = {"os_release": None, "os_dbs": {}, "lang": {}, "whiteouts": [], "opaque": []}
+    with tarfile.open(fileobj=fileobj, mode="r|*") as layer:
+        for member in layer:
+            path = _normalize_path(member.name)
+            directory, _, base = path.rpartition("/")
+            if base == ".wh..wh..opq":
+                result["opaque"].append(directory)
+                continue
+            if base.startswith(".wh."):
+                result["whiteouts"].append(f"{directory}/{base[4:]}" if directory else base[4:])
+                continue
+            if not member.isfile():
+                continue
+
+            if path in (_DPKG_STATUS, _APK_INSTALLED, _RPM_SQLITE) or _DPKG_STATUS_D.match(path):
+                if member.size > _MAX_DB_BYTES:
+                    continue
+                data = layer.extractfile(member).read()
+                if path == _RPM_SQLITE:
+                    try:
+                        result["os_dbs"][path] = {"type": "rpm", "packages": parse_rpmdb_sqlite(data)}
+                    except (sqlite3.Error, AttributeError, struct.error, ValueError) as e:
+                        print(f"Could not read rpm database in layer: {e}")
+                elif path == _APK_INSTALLED:
+                    result["os_dbs"][path] = {"type": "apk", "packages": parse_apk_installed(data.decode("utf-8", "replace"))}
+                else:
+                    result["os_dbs"][path] = {"type": "dpkg", "packages": parse_dpkg_status(data.decode("utf-8", "replace"))}
+            elif path in _OS_RELEASE:
+                if member.size <= _MAX_MANIFEST_BYTES:
+                    result["os_release"] = parse_os_release(layer.extractfile(member).read().decode("utf-8", "replace"))
+            elif member.size <= _MAX_MANIFEST_BYTES and (_PY_METADATA.search(path) or _NODE_PACKAGE.search(path)):
+                text = layer.extractfile(member).read().decode("utf-8", "replace")
+                entry = _parse_python_metadata(text) if _PY_METADATA.search(path) else _parse_node_package(text)
+                if entry:
+                    result["lang"][path] = entry
+    return result
+
+
+def merge_layers(layers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply layers bottom-up, honouring whiteouts and opaque directories."""
+    os_release = None
+    os_dbs: Dict[str, Any] = {}
+    lang: Dict[str, Any] = {}
+
+    def remove_under(prefix: str) -> None:
+        for table in (os_dbs, lang):
+            for path in [p for p in table if p == prefix or p.startswith(prefix + "/") or not prefix]:
+                del table[path]
+
+    for layer in layers:
+        for directory in layer["opaque"]:
+            remove_under(directory)
+        for path in layer["whiteouts"]:
+            remove_under(path)
+        os_dbs.update(layer["os_dbs"])
+        lang.update(layer["lang"])
+        if layer["os_release"]:
+            os_release = layer["os_release"]
+
+    return {"os_release": os_release, "os_dbs": os_dbs, "lang": lang}
+
+
+def image_packages(merged: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Flatten a merged image into ``{ecosystem, name, version, location}`` rows."""
+    os_release = merged["os_release"] or {}
+    default_family = {"dpkg": "debian", "apk": "alpine", "rpm": "redhat"}
+    packages = []
+    for path, db in merged["os_dbs"].items():
+        ecosystem = os_release.get("id") or default_family[db["type"]]
+        for name, version in db["packages"]:
+            packages.append({"ecosystem": ecosystem, "name": name, "version": version, "location": path})
+    for path, (ecosystem, name, version) in merged["lang"].items():
+        packages.append({"ecosystem": ecosystem, "name": name, "version": version, "location": path})
+    return packages
+
+
+# ── Archive layout ─────────────────────────────────────────────────────────
+
+def _read_json_member(archive: tarfile.TarFile, name: str) -> Any:
+    member = archive.getmember(name)
+    return json.loads(archive.extractfile(member).read())
+
+
+def _blob_path(digest: str) -> str:
+    algorithm, _, hex_digest = digest.partition(":")
+    return f"blobs/{algorithm}/{hex_digest}"
+
+
+def _layer_refs(archive: tarfile.TarFile) -> List[Dict[str, str]]:
+    """
+    Return the image's layers bottom-up as ``{"member", "digest"}``.
+
+    Docker ``manifest.json`` is preferred (config ``rootfs.diff_ids`` give the
+    content digests of legacy ``<id>/layer.tar`` members); OCI ``index.json``
+    is used when there is no Docker manifest.
+    """
+    names = set(archive.getnames())
+    if "manifest.json" in names:
+        manifest = _read_json_member(archive, "manifest.json")[0]
+        layers = manifest["Layers"]
+        diff_ids: List[str] = []
+        try:
+            diff_ids = _read_json_member(archive, manifest["Config"])["rootfs"]["diff_ids"]
+        except (KeyError, TypeError, ValueError):
+            pass
+        refs = []
+        for i, member in enumerate(layers):
+            if member.startswith("blobs/"):
+                _, algorithm, hex_digest = member.split("/", 2)
+                digest = f"{algorithm}:{hex_digest}"
+            else:
+                digest = diff_ids[i] if i < len(diff_ids) else ""
+            refs.append({"member": member, "digest": digest})
+        return refs
+
+    if "index.json" in names:
+        index = _read_json_member(archive, "index.json")
+        manifest = _read_json_member(archive, _blob_path(index["manifests"][0]["digest"]))
+        if manifest.get("manifests"):  # nested image index
+            manifest = _read_json_member(archive, _blob_path(manifest["manifests"][0]["digest"]))
+        return [{"member": _blob_path(layer["digest"]), "digest": layer["digest"]} for layer in manifest["layers"]]
+
+    raise ValueError("Not a docker-save or OCI image archive (no manifest.json or index.json)")
+
+
+def _sha256(fileobj: IO[bytes]) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(1 << 20), b""):
+        digest.update(chunk)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def analyze_image_tarball(
+    path: str,
+    lookup: Optional[LayerLookup] = None,
+    store: Optional[LayerStore] = None,
+) -> Dict[str, Any]:
+    """
+    Extract packages from an image archive, reusing cached per-layer results.
+
+    ``lookup(digest)``/``store(digest, result)`` plug in the layer cache; the
+    digest is always the computed sha256 of the layer, never the declared one.
+    Returns ``{"packages": [...], "os_release": {...}, "layers": N, "cached_layers": M}``.
+    """
+    with tarfile.open(path, mode="r:*") as archive:
+        refs = _layer_refs(archive)
+        layers = []
+        cached = 0
+        for ref in refs:
+            member = archive.getmember(ref["member"])
+            digest = _sha256(archive.extractfile(member)) if lookup or store else ""
+            if digest and ref["digest"].startswith("sha256:") and ref["digest"] != digest:
+                print(f"Layer {ref['member']} declares {ref['digest']} but hashes to {digest}")
+            result = lookup(digest) if lookup else None
+            if result is not None:
+                cached += 1
+            else:
+                result = extract_layer(archive.extractfile(member))
+                if store:
+                    store(digest, result)
+            layers.append(result)
+
+    merged = merge_layers(layers)
+    return {
+        "packages": image_packages(merged),
+        "os_release": merged["os_release"],
+        "layers": len(refs),
+        "cached_layers": cached,
+    }
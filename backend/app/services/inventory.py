@@ -0,0 +1,276 @@
+"""
+Dependency Inventory — normalized package inventory and fleet-wide impact queries.
+
+Scanners collect ``{ecosystem, package, version, location}`` entries; this module
+persists them to the ``dependencyinventory`` table and answers
+"which projects ship package X" across every organization's latest scan.
+"""
+import json
+import re
+from typing import List, Dict, Any, Iterable, Optional
+
+from sqlalchemy import func, select, update, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import DependencyInventory, Organization, Scan
+
+
+# Trivy/npm/pip ecosystem labels → canonical ecosystem names
+_ECOSYSTEM_ALIASES = {
+    "pip": "pypi",
+    "pipenv": "pypi",
+    "poetry": "pypi",
+    "python-pkg": "pypi",
+    "python": "pypi",
+    "npm": "npm",
+    "yarn": "npm",
+    "pnpm": "npm",
+    "node-pkg": "npm",
+    "gomod": "go",
+    "gobinary": "go",
+    "cargo": "cargo",
+    "rust-binary": "cargo",
+    "jar": "maven",
+    "pom": "maven",
+    "gradle": "maven",
+    "composer": "packagist",
+    "bundler": "rubygems",
+    "gemspec": "rubygems",
+    "nuget": "nuget",
+    "dotnet-core": "nuget",
+}
+
+_PEP503_SEPARATORS = re.compile(r"[-_.]+")
+
+
+def normalize_ecosystem(ecosystem: str) -> str:
+    """Map a scanner-specific ecosystem/type label to a canonical name."""
+    key = (ecosystem or "").strip().lower()
+    return _ECOSYSTEM_ALIASES.get(key, key or "unknown")
+
+
+def normalize_package_name(ecosystem: str, name: str) -> str:
+    """Normalize a package name so lookups are case/separator-insensitive where the ecosystem is."""
+    name = (name or "").strip()
+    if ecosystem == "pypi":
+        return _PEP503_SEPARATORS.sub("-", name).lower()
+    if ecosystem in ("maven", "go"):
+        return name
+    return name.lower()
+
+
+def make_entry(ecosystem: str, package: str, version: str, location: str = "") -> Dict[str, str]:
+    """Build a normalized inventory entry as collected by the scanners."""
+    eco = normalize_ecosystem(ecosystem)
+    return {
+        "ecosystem": eco,
+        "package": normalize_package_name(eco, package),
+        "version": str(version or "").strip(),
+        "location": location,
+    }
+
+
+def derive_project(target_url: str, container_image: Optional[str] = None, source_code: Optional[str] = None) -> Optional[str]:
+    """
+    Stable project name for a new scan: the target URL, else the image
+    repository (without tag or digest, so new tags supersede old ones), else
+    the ``name`` of a submitted package-lock.json. None if there is none.
+    """
+    if target_url and target_url.strip():
+        return target_url.strip()[:255]
+    if container_image:
+        repository = container_image.split("@", 1)[0]
+        head, _, last = repository.rpartition("/")
+        repository = f"{head}/{last.split(':', 1)[0]}" if head else last.split(":", 1)[0]
+        return f"image:{repository}"[:255]
+    if source_code:
+        try:
+            lock = json.loads(source_code)
+        except ValueError:
+            return None
+        if isinstance(lock, dict) and "lockfileVersion" in lock and isinstance(lock.get("name"), str) and lock["name"]:
+            return f"npm:{lock['name']}"[:255]
+    return None
+
+
+def project_key(scan: Scan) -> str:
+    """
+    Inventory project of a scan. Scans with neither a project nor a target
+    URL get one of their own, so they never supersede unrelated scans.
+    """
+    return (scan.project or scan.target_url or f"scan:{scan.uuid}")[:255]
+
+
+def _project_rows(scan: Scan):
+    return (
+        (DependencyInventory.organization_id == scan.organization_id)
+        & (DependencyInventory.project == project_key(scan))
+    )
+
+
+async def _supersede_earlier_scans(db: AsyncSession, scan: Scan) -> None:
+    await db.execute(
+        update(DependencyInventory)
+        .where(_project_rows(scan))
+        .where(DependencyInventory.is_latest.is_(True))
+        .where(DependencyInventory.scan_id != scan.id)
+        .values(is_latest=False)
+    )
+
+
+async def record_inventory(
+    db: AsyncSession,
+    scan: Scan,
+    entries: Iterable[Dict[str, Any]],
+    scanner_name: str = "",
+    latest: bool = True,
+) -> int:
+    """
+    Persist inventory entries for a scan and mark them as the project's latest.
+
+    Rows from earlier scans of the same (organization, project) lose their
+    ``is_latest`` flag. With ``latest=False`` the rows are only staged and the
+    project's current inventory is left alone until ``promote_inventory``.
+    Flushes but does not commit — the caller owns the transaction.
+
+    Returns:
+        Number of inventory rows inserted.
+    """
+    rows = []
+    seen = set()
+    for entry in entries:
+        key = (entry["ecosystem"], entry["package"], entry["version"])
+        if not entry["package"] or key in seen:
+            continue
+        seen.add(key)
+        rows.append({
+            "scan_id": scan.id,
+            "organization_id": scan.organization_id,
+            "project": project_key(scan),
+            "ecosystem": entry["ecosystem"][:50],
+            "package_name": entry["package"][:255],
+            "version": entry["version"][:100],
+            "location": (entry.get("location") or "")[:500],
+            "scanner_name": scanner_name or entry.get("scanner", ""),
+            "is_latest": latest,
+        })
+
+    if latest:
+        await _supersede_earlier_scans(db, scan)
+    if rows:
+        await db.execute(insert(DependencyInventory), rows)
+    await db.flush()
+    return len(rows)
+
+
+async def promote_inventory(db: AsyncSession, scan: Scan, scanner_names: Iterable[str]) -> int:
+    """
+    Make the rows a scan staged for ``scanner_names`` the project's latest
+    inventory. Does nothing if none were staged, so a scanner that produced
+    no inventory never hides the previous scan's. Flushes but does not commit.
+    """
+    result = await db.execute(
+        update(DependencyInventory)
+        .where(DependencyInventory.scan_id == scan.id)
+        .where(DependencyInventory.scanner_name.in_(list(scanner_names)))
+        .values(is_latest=True)
+    )
+    if result.rowcount:
+        await _supersede_earlier_scans(db, scan)
+    await db.flush()
+    return result.rowcount
+
+
+async def restore_latest_inventory(db: AsyncSession, scan: Scan) -> None:
+    """
+    After a scan's inventory was discarded, make the project's most recent
+    remaining scan current again if no scan is. Flushes but does not commit.
+    """
+    current = await db.execute(
+        select(DependencyInventory.id).where(_project_rows(scan)).where(DependencyInventory.is_latest.is_(True)).limit(1)
+    )
+    if current.first() is not None:
+        return
+    previous = (await db.execute(
+        select(func.max(DependencyInventory.scan_id))
+        .where(_project_rows(scan))
+        .where(DependencyInventory.scan_id != scan.id)
+    )).scalar_one_or_none()
+    if previous is not None:
+        await db.execute(
+            update(DependencyInventory).where(DependencyInventory.scan_id == previous).values(is_latest=True)
+        )
+    await db.flush()
+
+
+def _affected_rows(ecosystem: str, package: str, versions: Optional[List[str]]) -> list:
+    eco = normalize_ecosystem(ecosystem)
+    conditions = [
+        DependencyInventory.ecosystem == eco,
+        DependencyInventory.package_name == normalize_package_name(eco, package),
+        DependencyInventory.is_latest.is_(True),
+    ]
+    if versions:
+        conditions.append(DependencyInventory.version.in_(versions))
+    return conditions
+
+
+async def count_affected_scans(
+    db: AsyncSession,
+    ecosystem: str,
+    package: str,
+    versions: Optional[List[str]] = None,
+) -> int:
+    """Number of rows ``find_affected_scans`` would return without a limit."""
+    result = await db.execute(
+        select(func.count()).select_from(DependencyInventory).where(*_affected_rows(ecosystem, package, versions))
+    )
+    return result.scalar_one()
+
+
+async def find_affected_scans(
+    db: AsyncSession,
+    ecosystem: str,
+    package: str,
+    versions: Optional[List[str]] = None,
+    limit: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    Find every organization's latest scan that ships the given package.
+
+    Served entirely from ``ix_dependencyinventory_lookup`` — no JSON metadata is scanned.
+    """
+    eco = normalize_ecosystem(ecosystem)
+    name = normalize_package_name(eco, package)
+
+    query = (
+        select(
+            DependencyInventory.version,
+            DependencyInventory.location,
+            DependencyInventory.project,
+            Scan.uuid,
+            Scan.created_at,
+            Organization.id,
+            Organization.name,
+        )
+        .join(Scan, Scan.id == DependencyInventory.scan_id)
+        .join(Organization, Organization.id == DependencyInventory.organization_id)
+        .where(*_affected_rows(ecosystem, package, versions))
+        .limit(limit)
+    )
+
+    result = await db.execute(query)
+    return [
+        {
+            "scan_id": row[3],
+            "project": row[2],
+            "organization_id": row[5],
+            "organization_name": row[6],
+            "ecosystem": eco,
+            "package": name,
+            "version": row[0],
+            "location": row[1] or "",
+            "scanned_at": row[4],
+        }
+        for row in result.all()
+    ]
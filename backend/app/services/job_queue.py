@@ -0,0 +1,194 @@
+"""
+Job Queue — durable, database-backed queue of scan jobs.
+
+The API enqueues a ``ScanJob`` in the same transaction that creates its
+``Scan``, so an accepted scan survives an API restart. Workers
+(``python -m app.worker``, or the worker embedded in the API process) claim
+jobs under a lease. On Postgres the candidate row is selected with
+``FOR UPDATE SKIP LOCKED`` so concurrent workers never queue up behind each
+other; SQLite has no row locks, so there the claim is a conditional UPDATE
+that only one worker can win. Every claim is re-checked by that UPDATE.
+
+A worker extends its lease while the job runs. If the worker dies, the lease
+expires after SCAN_JOB_LEASE_SECONDS and the job becomes claimable again.
+Failed attempts are retried with exponential backoff until
+SCAN_JOB_MAX_ATTEMPTS is reached, and then the job and its scan are marked
+failed.
+"""
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.models import DependencyInventory, JobStatus, Scan, ScanJob, ScanStatus, Vulnerability
+from app.services.inventory import restore_latest_inventory
+
+settings = get_settings()
+
+# A lost race on SQLite just means another worker claimed that job; try the next one
+CLAIM_ATTEMPTS = 5
+
+# Workers running in this process, woken as soon as a job is enqueued here
+_local_workers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(ScanJob.status == JobStatus.QUEUED.value, ScanJob.available_at <= now),
+        and_(ScanJob.status == JobStatus.RUNNING.value, ScanJob.lease_expires_at < now),
+    )
+
+
+async def enqueue(db: AsyncSession, scan: Scan, kind: str, payload: Dict[str, Any]) -> ScanJob:
+    """Add a job for ``scan`` to ``db``; it becomes visible to workers when the caller commits."""
+    if scan.id is None:
+        await db.flush()
+    job = ScanJob(
+        scan_id=scan.id,
+        kind=kind,
+        payload=payload,
+        status=JobStatus.QUEUED.value,
+        max_attempts=settings.SCAN_JOB_MAX_ATTEMPTS,
+        available_at=datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+def register_local_worker(worker) -> None:
+    _local_workers.add(worker)
+
+
+def notify_local_workers() -> None:
+    """Wake in-process workers so a new job starts without waiting for the next poll."""
+    for worker in list(_local_workers):
+        worker.wake()
+
+
+async def claim(worker_id: str) -> Optional[ScanJob]:
+    """Lease the next claimable job to ``worker_id``; None when the queue is empty."""
+    async with AsyncSessionLocal() as db:
+        skip_locked = db.bind.dialect.name == "postgresql"
+        for _ in range(CLAIM_ATTEMPTS):
+            now = datetime.utcnow()
+            query = (
+                select(ScanJob.id)
+                .where(_claimable(now))
+                .order_by(ScanJob.available_at, ScanJob.id)
+                .limit(1)
+            )
+            if skip_locked:
+                query = query.with_for_update(skip_locked=True)
+            job_id = (await db.execute(query)).scalar_one_or_none()
+            if job_id is None:
+                await db.rollback()
+                return None
+            result = await db.execute(
+                update(ScanJob)
+                .where(ScanJob.id == job_id, _claimable(now))
+                .values(
+                    status=JobStatus.RUNNING.value,
+                    attempts=ScanJob.attempts + 1,
+                    lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=settings.SCAN_JOB_LEASE_SECONDS),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if result.rowcount == 1:
+                return await db.get(ScanJob, job_id)
+    return None
+
+
+async def heartbeat(job_id: int, worker_id: str) -> bool:
+    """Extend the lease; False means the lease was lost to another worker."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ScanJob)
+            .where(
+                ScanJob.id == job_id,
+                ScanJob.lease_owner == worker_id,
+                ScanJob.status == JobStatus.RUNNING.value,
+            )
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.SCAN_JOB_LEASE_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+async def _owned(db: AsyncSession, job_id: int, worker_id: str) -> Optional[ScanJob]:
+    job = await db.get(ScanJob, job_id)
+    if job is None or job.lease_owner != worker_id or job.status != JobStatus.RUNNING.value:
+        return None
+    return job
+
+
+async def complete(job_id: int, worker_id: str) -> bool:
+    """Mark the job completed; False if the lease was already lost to another worker."""
+    async with AsyncSessionLocal() as db:
+        job = await _owned(db, job_id, worker_id)
+        if job is None:
+            return False
+        job.status = JobStatus.COMPLETED.value
+        job.lease_owner = None
+        job.lease_expires_at = None
+        await db.commit()
+        return True
+
+
+async def fail(job_id: int, worker_id: str, error: str, retry: bool = True) -> Optional[bool]:
+    """
+    Record a failed attempt. Returns True if the job was requeued and False
+    once its attempts are used up and the job and its scan are marked failed;
+    None if the lease was already lost to another worker.
+    """
+    async with AsyncSessionLocal() as db:
+        job = await _owned(db, job_id, worker_id)
+        if job is None:
+            return None
+        job.last_error = error[:2000]
+        job.lease_owner = None
+        job.lease_expires_at = None
+        if retry and job.attempts < job.max_attempts:
+            backoff = settings.SCAN_JOB_RETRY_BACKOFF_SECONDS * 2 ** max(job.attempts - 1, 0)
+            job.status = JobStatus.QUEUED.value
+            job.available_at = datetime.utcnow() + timedelta(seconds=backoff)
+        else:
+            job.status = JobStatus.FAILED.value
+            db_scan = await db.get(Scan, job.scan_id)
+            if db_scan:
+                db_scan.status = ScanStatus.FAILED
+        await db.commit()
+        return job.status == JobStatus.QUEUED.value
+
+
+async def release(job_id: int, worker_id: str) -> None:
+    """Hand a job back on graceful shutdown; the interrupted attempt is not counted."""
+    async with AsyncSessionLocal() as db:
+        job = await _owned(db, job_id, worker_id)
+        if job is None:
+            return
+        job.status = JobStatus.QUEUED.value
+        job.attempts = max(job.attempts - 1, 0)
+        job.available_at = datetime.utcnow()
+        job.lease_owner = None
+        job.lease_expires_at = None
+        await db.commit()
+
+
+async def reset_scan(scan_id: int) -> None:
+    """Discard partial output of an interrupted attempt so a rerun does not duplicate findings."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Vulnerability).where(Vulnerability.scan_id == scan_id))
+        await db.execute(delete(DependencyInventory).where(DependencyInventory.scan_id == scan_id))
+        db_scan = await db.get(Scan, scan_id)
+        if db_scan:
+            await restore_latest_inventory(db, db_scan)
+            db_scan.status = ScanStatus.PENDING
+            db_scan.results = None
+        await db.commit()
@@ -2,141 +2,746 @@
 Network Scanner — Nmap subprocess wrapper with SSRF-safe target validation.
 Graceful no-op when nmap is not installed.
 """
-import subprocess
+import asyncio
+import ipaddress
+import shutil
+import socket
+import time
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
-from app.services.ssrf_protection import validate_scan_target
+from app.core.config import get_settings
+from app.services.process_runner import ConcurrencyLimiter, StreamingProcess
+from app.services.result_cache import PersistentCache
+from app.services.ssrf_protection import resolve_scan_target
+
+settings = get_settings()
+
+# Process-wide cap on concurrent nmap processes; the packet-rate budget
+# NMAP_MAX_RATE is split evenly between these slots
+_nmap_limiter = ConcurrencyLimiter(settings.NMAP_MAX_WORKERS)
+
+
+# Last known open ports and detected services per (owner, host, port spec)
+_network_cache = PersistentCache(
+    str(Path(settings.CACHE_DIR) / "network_scans.db"),
+    max_bytes=settings.NETWORK_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def _per_process_rate() -> int:
+    return max(1, settings.NMAP_MAX_RATE // max(1, settings.NMAP_MAX_WORKERS))
+
+
+def _target_url(host: str) -> str:
+    """``host`` as a URL for SSRF validation; IPv6 literals need brackets."""
+    return f"http://[{host}]" if ":" in host else f"http://{host}"
+
+
+def _pinned_target(addresses: List[str]) -> Optional[str]:
+    """
+    The address nmap should scan: the first vetted IPv4 address (what nmap
+    itself would pick without ``-6``), else the first vetted IPv6 address.
+    nmap then hits exactly what SSRF validation approved and never resolves
+    the hostname again. None when validation vetted no address (e.g. DNS
+    failed), in which case the host must not be scanned.
+    """
+    for address in addresses:
+        if ":" not in address:
+            return address
+    return addresses[0] if addresses else None
+
+
+def _verdict(host: str, ok: bool, reason: str, addresses: List[str]) -> Tuple[Optional[str], str]:
+    """``(address to scan, "")`` or ``(None, reason the host is blocked)``."""
+    if not ok:
+        return None, reason
+    target = _pinned_target(addresses)
+    if target is None:
+        return None, f"{host} did not resolve to an address that could be vetted"
+    return target, ""
+
+
+def expand_targets(targets: List[str], max_hosts: int) -> List[str]:
+    """
+    Expand hostnames, IPs and CIDR ranges into a de-duplicated host list.
+    Raises ValueError if the expansion exceeds ``max_hosts``.
+    """
+    hosts: Dict[str, None] = {}
+    for raw in targets:
+        target = raw.strip()
+        if not target:
+            continue
+        if "/" in target:
+            try:
+                network = ipaddress.ip_network(target, strict=False)
+            except ValueError:
+                raise ValueError(f"Invalid CIDR range: {target!r}")
+            # +2 for the network and broadcast addresses hosts() skips
+            if network.num_addresses > max_hosts + 2:
+                raise ValueError(f"{target} expands past the {max_hosts}-host limit")
+            for ip in network.hosts() if network.num_addresses > 2 else network:
+                hosts[str(ip)] = None
+        else:
+            hosts[target] = None
+        if len(hosts) > max_hosts:
+            raise ValueError(f"Targets expand past the {max_hosts}-host limit")
+    return list(hosts)
+
+
+def _parse_ports(ports: str) -> Optional[List[Tuple[int, int]]]:
+    """Parse a plain numeric nmap port list; None for specs we should not split."""
+    ranges = []
+    for part in ports.replace(" ", "").split(","):
+        if not part:
+            continue
+        lo, sep, hi = part.partition("-")
+        if not (lo.isdigit() or lo == "") or not (hi.isdigit() or hi == ""):
+            return None
+        start = int(lo) if lo else 1
+        end = (int(hi) if hi else 65535) if sep else start
+        if not 1 <= start <= end <= 65535:
+            return None
+        ranges.append((start, end))
+    return ranges or None
+
+
+def _split_ports(ports: str, parts: int) -> List[str]:
+    """Split a port spec into up to ``parts`` contiguous specs of similar size."""
+    ranges = _parse_ports(ports)
+    if parts <= 1 or ranges is None:
+        return [ports]
+    total = sum(end - start + 1 for start, end in ranges)
+    size = -(-total // min(parts, total))
+    shards: List[List[str]] = [[]]
+    room = size
+    for start, end in ranges:
+        while start <= end:
+            take = min(room, end - start + 1)
+            shards[-1].append(str(start) if take == 1 else f"{start}-{start + take - 1}")
+            start += take
+            room -= take
+            if room == 0:
+                shards.append([])
+                room = size
+    return [",".join(shard) for shard in shards if shard]
+
+
+def _cache_key(owner: str, host: str, ports: str) -> str:
+    return f"net:{owner}|{host}|{ports}"
+
+
+async def _replay(batches: List[List[Dict[str, Any]]]) -> AsyncIterator[List[Dict[str, Any]]]:
+    for batch in batches:
+        yield batch
+
+
+def _group_by_host(findings: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Index open-port findings as ``{host: {"port/protocol": finding}}``."""
+    hosts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for finding in findings:
+        meta = finding["metadata"]
+        host = finding["location"].rsplit(":", 1)[0]
+        hosts.setdefault(host, {})[f"{meta['port']}/{meta['protocol']}"] = finding
+    return hosts
+
+
+def _diff_ports(
+    host: str, previous: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Label current findings new/unchanged and add findings for ports that closed."""
+    findings = []
+    for key, entry in current.items():
+        finding = {**entry["finding"]}
+        finding["metadata"] = {**finding["metadata"], "port_status": "unchanged" if key in previous else "new"}
+        findings.append(finding)
+    for key, entry in previous.items():
+        if key in current:
+            continue
+        old = entry["finding"]
+        findings.append({
+            "title": f"Port Closed: {key} ({old['metadata'].get('service', 'unknown')})",
+            "description": f"Port {key} on {host} was open in the previous scan and is now closed or filtered.",
+            "severity": "info",
+            "location": f"{host}:{key.split('/', 1)[0]}",
+            "evidence": f"Previously: {old['evidence']}",
+            "metadata": {**old["metadata"], "port_status": "closed"},
+        })
+    return findings
+
+
+def shard_targets(hosts: List[str], ports: str, workers: int) -> List[Tuple[List[str], str]]:
+    """
+    Split hosts and ports into ``(hosts, ports)`` shards for parallel nmap runs.
+    Hosts are spread across workers first; when there are fewer hosts than
+    workers, each host's port range is split as well.
+    """
+    if len(hosts) >= workers:
+        return [(hosts[i::workers], ports) for i in range(workers)]
+    port_shards = _split_ports(ports, -(-workers // len(hosts)))
+    return [([host], shard) for host in hosts for shard in port_shards]
+
+
+class NmapXmlStream:
+    """
+    Incremental parser for nmap ``-oX`` output.
+
+    ``feed()`` returns the findings of every ``<host>`` element completed so
+    far; finished hosts are dropped from the tree so memory stays flat no
+    matter how many hosts the scan covers.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: Optional[ET.Element] = None
+
+    def feed(self, data) -> List[Dict[str, Any]]:
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        findings = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+            elif element.tag == "host":
+                findings.extend(NetworkScanner._host_findings(element, self.target))
+                element.clear()
+                if self._root is not None and element in self._root:
+                    self._root.remove(element)
+        return findings
+
+
+class _RttEstimator:
+    """Smoothed RTT (RFC 6298 style) of one host, used to size connect timeouts."""
+
+    def __init__(self, initial: float, floor: float):
+        self.initial = initial
+        self.floor = floor
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def timeout(self) -> float:
+        if self.srtt is None:
+            return self.initial
+        return min(self.initial, max(self.floor, self.srtt + 4 * self.rttvar))
+
+
+class TcpConnectScanner:
+    """
+    Built-in TCP connect() port scanner used when nmap is not installed.
+
+    Up to ``concurrency`` connection attempts run at once. Connect timeouts
+    start at ``timeout`` and shrink towards each host's observed round-trip
+    time (accepted and refused connections both count), so filtered ports on
+    a fast host do not each cost the full timeout. Open ports optionally get
+    a short banner read. Findings have the same shape as nmap's.
+    """
+
+    _BANNER_BYTES = 256
+    _BANNER_TIMEOUT = 1.0
+    _HTTP_PORTS = {80, 8000, 8008, 8080, 8081, 8888}
+
+    def __init__(self, concurrency: Optional[int] = None, timeout: Optional[float] = None, banners: bool = True):
+        self.concurrency = max(1, concurrency or settings.TCP_SCAN_CONCURRENCY)
+        self.timeout = timeout or settings.TCP_SCAN_TIMEOUT_SECONDS
+        self.banners = banners
+
+    async def iter_scan(self, hosts: List[str], ports: str) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Scan ``ports`` on every host, yielding each open port as it is found."""
+        ranges = _parse_ports(ports)
+        if ranges is None:
+            print(f"TCP connect scanner cannot handle port spec {ports!r} — skipping network scan.")
+            return
+
+        loop = asyncio.get_running_loop()
+        resolved = []
+        for host in hosts:
+            try:
+                infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+                resolved.append(infos[0][4][0])
+            except (socket.gaierror, IndexError) as e:
+                print(f"TCP connect scanner could not resolve {host}: {e}")
+
+        rtt = {addr: _RttEstimator(self.timeout, floor=0.05) for addr in resolved}
+        probes = ((addr, port) for addr in resolved for start, end in ranges for port in range(start, end + 1))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            try:
+                # The generator is shared; next() never awaits, so workers never collide
+                for addr, port in probes:
+                    finding = await self._probe(addr, port, rtt[addr])
+                    if finding:
+                        await queue.put([finding])
+            finally:
+                await queue.put(None)
+
+        total_probes = len(resolved) * sum(end - start + 1 for start, end in ranges)
+        tasks = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, total_probes))]
+        found = 0
+        try:
+            remaining = len(tasks)
+            while remaining:
+                batch = await queue.get()
+                if batch is None:
+                    remaining -= 1
+                else:
+                    found += 1
+                    yield batch
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        print(f"TCP connect scanner found {found} open ports on {len(resolved)} hosts")
+
+    async def _probe(self, addr: str, port: int, rtt: _RttEstimator) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(addr, port), rtt.timeout())
+        except ConnectionRefusedError:
+            rtt.sample(loop.time() - started)
+            return None
+        except (asyncio.TimeoutError, OSError):
+            return None
+        rtt.sample(loop.time() - started)
+
+        banner = ""
+        try:
+            if self.banners:
+                banner = await self._read_banner(reader, writer, port)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+        try:
+            service_name = socket.getservbyport(port, "tcp")
+        except OSError:
+            service_name = "unknown"
+        if banner.startswith("SSH-"):
+            service_name = "ssh"
+        elif banner.startswith("HTTP/"):
+            service_name = "http"
+        return NetworkScanner._port_finding(
+            addr, str(port), "tcp", service_name, banner or service_name,
+            scanner="tcp-connect", banner=banner,
+        )
+
+    async def _read_banner(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, port: int) -> str:
+        """Read what the service sends first; nudge likely HTTP ports with a HEAD request."""
+        try:
+            data = await asyncio.wait_for(reader.read(self._BANNER_BYTES), self._BANNER_TIMEOUT)
+        except asyncio.TimeoutError:
+            if port not in self._HTTP_PORTS:
+                return ""
+            try:
+                writer.write(b"HEAD / HTTP/1.0\r\n\r\n")
+                await writer.drain()
+                data = await asyncio.wait_for(reader.read(self._BANNER_BYTES), self._BANNER_TIMEOUT)
+            except (asyncio.TimeoutError, OSError):
+                return ""
+        except OSError:
+            return ""
+        first_line = data.decode("latin-1").splitlines()[0] if data.strip() else ""
+        return "".join(ch for ch in first_line if ch.isprintable()).strip()[:120]
 
 
 class NetworkScanner:
     """Network port/service scanner using nmap."""
 
-    def __init__(self, nmap_path: str = "nmap"):
-        self.nmap_path = nmap_path
+    def __init__(
+        self,
+        nmap_path: Optional[str] = None,
+        timeout: Optional[int] = None,
+        use_cache: Optional[bool] = None,
+        owner: Optional[str] = None,
+    ):
+        """
+        ``owner`` (e.g. the organization id) scopes the incremental port-state
+        cache, so one tenant's banners and diffs are never shown to another.
+        Without an owner every scan is a full scan and nothing is cached.
+        """
+        self.nmap_path = nmap_path or settings.NMAP_PATH
+        self.timeout = timeout or settings.NMAP_TIMEOUT_SECONDS
+        self.owner = owner
+        self.use_cache = (settings.NETWORK_CACHE_ENABLED if use_cache is None else use_cache) and owner is not None
 
-    async def scan(self, target: str, ports: str = "1-1000") -> List[Dict[str, Any]]:
+    async def scan(self, target: str, ports: str = "1-1000", force_refresh: bool = False) -> List[Dict[str, Any]]:
         """
         Run nmap scan on a target.
         Returns findings for open ports and detected services.
         Graceful no-op if nmap is not installed.
         """
         findings = []
+        async for batch in self.iter_scan(target, ports, force_refresh):
+            findings.extend(batch)
+        return findings
 
+    async def iter_scan(
+        self, target: str, ports: str = "1-1000", force_refresh: bool = False
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Run nmap on a target, yielding each host's findings as soon as nmap
+        finishes that host, so open ports can be persisted and shown while
+        the rest of the scan is still running.
+        """
         # SSRF protection — validate target before scanning
-        is_valid, reason = validate_scan_target(f"http://{target}")
-        if not is_valid:
+        address, reason = _verdict(target, *await resolve_scan_target(_target_url(target)))
+        if address is None:
             print(f"Network scan blocked for target {target}: {reason}")
-            return [{
-                "title": "Network Scan Target Blocked",
-                "description": f"Target {target} was blocked by SSRF protection: {reason}",
-                "severity": "info",
-                "location": target,
-                "evidence": reason,
-                "metadata": {
-                    "cweid": "918",
-                    "confidence": "high",
-                    "scanner": "network-scanner",
-                    "owasp": "A10:2021-Server-Side Request Forgery",
-                },
-            }]
+            yield [self._blocked_finding(target, reason)]
+            return
+
+        async for batch in self._iter_hosts([address], ports, target, force_refresh):
+            yield batch
+
+    async def scan_many(
+        self, targets: List[str], ports: str = "1-1000", workers: Optional[int] = None, force_refresh: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Scan many hosts and/or CIDR ranges in parallel; see ``iter_scan_many``."""
+        findings = []
+        async for batch in self.iter_scan_many(targets, ports, workers, force_refresh):
+            findings.extend(batch)
+        return findings
+
+    async def iter_scan_many(
+        self, targets: List[str], ports: str = "1-1000", workers: Optional[int] = None, force_refresh: bool = False
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Scan a list of hosts and/or CIDR ranges with parallel nmap processes.
 
+        CIDRs are expanded (up to NETWORK_SCAN_MAX_HOSTS) and every host is
+        validated against SSRF protection; blocked hosts become info findings.
+        The remaining hosts and the port range are split into shards run by
+        up to ``workers`` nmap processes. Per-host findings are yielded from
+        whichever shard finishes them first.
+        """
+        workers = max(1, min(workers or settings.NMAP_MAX_WORKERS, settings.NMAP_MAX_WORKERS))
+        try:
+            hosts = expand_targets(targets, settings.NETWORK_SCAN_MAX_HOSTS)
+        except ValueError as e:
+            print(f"Network scan rejected: {e}")
+            yield [self._blocked_finding(", ".join(targets)[:255], str(e))]
+            return
+
+        resolved = await asyncio.gather(*(resolve_scan_target(_target_url(host)) for host in hosts))
+        verdicts = [_verdict(host, *result) for host, result in zip(hosts, resolved)]
+        allowed = list(dict.fromkeys(address for address, _ in verdicts if address))
+        blocked = [self._blocked_finding(host, reason) for host, (address, reason) in zip(hosts, verdicts) if not address]
+        if blocked:
+            print(f"Network scan blocked {len(blocked)} of {len(hosts)} targets")
+            yield blocked
+        if not allowed:
+            return
+
+        if not self._nmap_available():
+            async for batch in TcpConnectScanner().iter_scan(allowed, ports):
+                yield batch
+            return
+
+        shards = shard_targets(allowed, ports, workers)
+        print(f"Network scan: {len(allowed)} hosts in {len(shards)} shards across {workers} workers")
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_shard(shard_hosts: List[str], shard_ports: str) -> None:
+            try:
+                async for batch in self._iter_hosts(shard_hosts, shard_ports, f"{len(shard_hosts)} hosts", force_refresh):
+                    await queue.put(batch)
+            finally:
+                await queue.put(None)
+
+        # Shards beyond the process-wide limit wait on _nmap_limiter
+        tasks = [asyncio.create_task(run_shard(h, p)) for h, p in shards]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                batch = await queue.get()
+                if batch is None:
+                    remaining -= 1
+                else:
+                    yield batch
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _iter_hosts(
+        self, targets: List[str], ports: str, label: str, force_refresh: bool
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        if self.use_cache and shutil.which(self.nmap_path):
+            source = self._iter_incremental(targets, ports, label, force_refresh)
+        else:
+            source = self._iter_nmap(targets, ports, label)
+        async for batch in source:
+            yield batch
+
+    async def _iter_incremental(
+        self, targets: List[str], ports: str, label: str, force_refresh: bool
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Scan using the per-host result cache.
+
+        A fast discovery pass (no ``-sV``) finds the open ports; version
+        detection then runs only on ports that were not open last time or
+        whose cached service info is older than NETWORK_CACHE_TTL_SECONDS.
+        Every finding carries ``metadata.port_status`` (new/unchanged), and
+        ports open in the previous scan but not now get a "closed" finding.
+        ``force_refresh`` runs full version detection but still diffs.
+        """
+        now = time.time()
+        seen = set()
+        baseline = False
+        for addr in targets:
+            if await _network_cache.get(_cache_key(self.owner, addr, ports)):
+                baseline = True
+                break
+        # Without any previous results a discovery pass would only add time
+        full = force_refresh or not baseline
+
+        if full:
+            batches = self._iter_nmap(targets, ports, label, version_detection=True)
+        else:
+            # Version detection needs an nmap slot of its own, so let discovery
+            # finish and release its slot first; otherwise the two can deadlock
+            # on _nmap_limiter (e.g. NMAP_MAX_WORKERS=1, or every slot taken by shards)
+            batches = _replay([batch async for batch in self._iter_nmap(targets, ports, label, version_detection=False)])
+
+        async for batch in batches:
+            results = []
+            for addr, found in _group_by_host(batch).items():
+                seen.add(addr)
+                previous = await _network_cache.get(_cache_key(self.owner, addr, ports)) or {"ports": {}}
+                cached = previous["ports"]
+                current: Dict[str, Dict[str, Any]] = {}
+                if full:
+                    current = {key: {"finding": f, "verified_at": now} for key, f in found.items()}
+                else:
+                    stale = []
+                    for key, finding in found.items():
+                        entry = cached.get(key)
+                        if entry and now - entry["verified_at"] < settings.NETWORK_CACHE_TTL_SECONDS:
+                            current[key] = entry
+                        else:
+                            stale.append(key)
+                    detected = await self._detect_services(addr, stale) if stale else {}
+                    for key in stale:
+                        current[key] = {"finding": detected.get(key, found[key]), "verified_at": now}
+                results.extend(_diff_ports(addr, cached, current))
+                await _network_cache.set(_cache_key(self.owner, addr, ports), {"ports": current, "scanned_at": now})
+            if results:
+                yield results
+
+        # Hosts with no open ports at all are absent from nmap's --open output
+        for addr in targets:
+            if addr in seen:
+                continue
+            previous = await _network_cache.get(_cache_key(self.owner, addr, ports))
+            if previous and previous["ports"]:
+                yield _diff_ports(addr, previous["ports"], {})
+                await _network_cache.set(_cache_key(self.owner, addr, ports), {"ports": {}, "scanned_at": now})
+
+    async def _detect_services(self, addr: str, port_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Run ``-sV`` on just the given ``port/protocol`` keys of one host."""
+        port_list = ",".join(key.split("/", 1)[0] for key in port_keys)
+        detected: Dict[str, Dict[str, Any]] = {}
+        async for batch in self._iter_nmap([addr], port_list, addr):
+            for found in _group_by_host(batch).values():
+                detected.update(found)
+        return detected
+
+    async def _iter_nmap(
+        self, targets: List[str], ports: str, label: str, version_detection: bool = True
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Run one nmap process over ``targets`` (vetted addresses) and yield
+        per-host findings. nmap scans one address family per run, so a mixed
+        list is split into an IPv4 and an IPv6 (``-6``) run.
+        """
+        ipv6 = [target for target in targets if ":" in target]
+        if ipv6 and len(ipv6) < len(targets):
+            for family in ([target for target in targets if ":" not in target], ipv6):
+                async for batch in self._iter_nmap(family, ports, label, version_detection):
+                    yield batch
+            return
+
+        if not self._nmap_available():
+            async for batch in TcpConnectScanner().iter_scan(targets, ports):
+                yield batch
+            return
+
+        total = 0
         try:
             cmd = [
                 self.nmap_path,
-                "-sV",          # Version detection
+                *(["-sV"] if version_detection else []),  # Version detection
+                *(["-6"] if ipv6 else []),  # IPv6 targets
+                "-n",           # Never resolve: targets are already-vetted addresses
                 "--open",       # Only show open ports
                 "-oX", "-",     # XML output to stdout
                 "-p", ports,
                 "-T4",          # Aggressive timing
                 "--max-retries", "1",
-                target,
+                "--max-rate", str(_per_process_rate()),
+                "--",
+                *targets,
             ]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-            )
+            stream = NmapXmlStream(label)
+            received = False
+            async with StreamingProcess(cmd, self.timeout, _nmap_limiter) as proc:
+                async for chunk in proc.iter_stdout():
+                    received = True
+                    batch = stream.feed(chunk)
+                    if batch:
+                        total += len(batch)
+                        yield batch
 
-            if result.returncode not in (0, 1) and not result.stdout:
-                print(f"nmap exited with code {result.returncode}: {result.stderr[:200]}")
-                return findings
+            if not received:
+                if proc.returncode not in (0, 1):
+                    print(f"nmap exited with code {proc.returncode}: {proc.stderr_tail[:200].decode(errors='replace')}")
+                return
 
-            findings = self._parse_nmap_xml(result.stdout, target)
-            print(f"Network scanner found {len(findings)} findings for {target}")
+            batch = stream.close()
+            if batch:
+                total += len(batch)
+                yield batch
+            print(f"Network scanner found {total} findings for {label} (ports {ports})")
 
         except FileNotFoundError:
             print(f"nmap not installed at '{self.nmap_path}' — skipping network scan.")
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print("nmap timed out — skipping network scan.")
+        except ET.ParseError as e:
+            print(f"Failed to parse nmap XML: {e}")
         except Exception as e:
             print(f"Network scan error: {e}")
 
-        return findings
+    def _nmap_available(self) -> bool:
+        if shutil.which(self.nmap_path):
+            return True
+        print(f"nmap not installed at '{self.nmap_path}' — using the built-in TCP connect scanner.")
+        return False
+
+    @staticmethod
+    def _blocked_finding(target: str, reason: str) -> Dict[str, Any]:
+        return {
+            "title": "Network Scan Target Blocked",
+            "description": f"Target {target} was blocked by SSRF protection: {reason}",
+            "severity": "info",
+            "location": target,
+            "evidence": reason,
+            "metadata": {
+                "cweid": "918",
+                "confidence": "high",
+                "scanner": "network-scanner",
+                "owasp": "A10:2021-Server-Side Request Forgery",
+            },
+        }
 
     @staticmethod
     def _parse_nmap_xml(xml_output: str, target: str) -> List[Dict[str, Any]]:
-        """Parse nmap XML output into findings."""
-        findings = []
+        """Parse complete nmap XML output into findings."""
         if not xml_output.strip():
-            return findings
+            return []
 
+        stream = NmapXmlStream(target)
         try:
-            root = ET.fromstring(xml_output)
+            return stream.feed(xml_output) + stream.close()
         except ET.ParseError as e:
             print(f"Failed to parse nmap XML: {e}")
-            return findings
+            return []
+
+    @staticmethod
+    def _port_finding(
+        host: str,
+        port_id: str,
+        protocol: str,
+        service_name: str,
+        service_desc: str,
+        version: str = "",
+        scanner: str = "nmap",
+        banner: str = "",
+    ) -> Dict[str, Any]:
+        """Build the finding for one open port (shared by nmap and the TCP connect engine)."""
+        # Determine severity based on port/service
+        severity = "info"
+        if int(port_id) in (21, 23, 25, 445, 3389):
+            severity = "high"  # Commonly exploited services
+        elif int(port_id) in (80, 443, 8080, 8443):
+            severity = "low"   # Web services (expected)
+        else:
+            severity = "medium"
 
-        for host in root.findall(".//host"):
-            host_addr = target
-            addr_el = host.find("address")
-            if addr_el is not None:
-                host_addr = addr_el.get("addr", target)
+        evidence = f"State: open | Service: {service_desc}"
+        if banner:
+            evidence += f" | Banner: {banner}"
+        metadata = {
+            "cweid": "200",
+            "confidence": "high",
+            "scanner": scanner,
+            "port": str(port_id),
+            "protocol": protocol,
+            "service": service_name,
+            "version": version,
+            "owasp": "A05:2021-Security Misconfiguration",
+        }
+        if banner:
+            metadata["banner"] = banner
+        return {
+            "title": f"Open Port: {port_id}/{protocol} ({service_name})",
+            "description": f"Port {port_id}/{protocol} is open running {service_desc}. Verify this service is required and properly secured.",
+            "severity": severity,
+            "location": f"{host}:{port_id}",
+            "evidence": evidence,
+            "metadata": metadata,
+        }
 
-            ports_el = host.find("ports")
-            if ports_el is None:
+    @staticmethod
+    def _host_findings(host: ET.Element, target: str) -> List[Dict[str, Any]]:
+        """Build findings for the open ports of one nmap ``<host>`` element."""
+        findings = []
+        host_addr = target
+        addr_el = host.find("address")
+        if addr_el is not None:
+            host_addr = addr_el.get("addr", target)
+
+        ports_el = host.find("ports")
+        if ports_el is None:
+            return findings
+
+        for port in ports_el.findall("port"):
+            state_el = port.find("state")
+            if state_el is None or state_el.get("state") != "open":
                 continue
 
-            for port in ports_el.findall("port"):
-                state_el = port.find("state")
-                if state_el is None or state_el.get("state") != "open":
-                    continue
-
-                port_id = port.get("portid", "?")
-                protocol = port.get("protocol", "tcp")
-                service_el = port.find("service")
-                service_name = service_el.get("name", "unknown") if service_el is not None else "unknown"
-                service_version = service_el.get("version", "") if service_el is not None else ""
-                product = service_el.get("product", "") if service_el is not None else ""
-
-                service_desc = f"{product} {service_version}".strip() or service_name
-
-                # Determine severity based on port/service
-                severity = "info"
-                if int(port_id) in (21, 23, 25, 445, 3389):
-                    severity = "high"  # Commonly exploited services
-                elif int(port_id) in (80, 443, 8080, 8443):
-                    severity = "low"   # Web services (expected)
-                else:
-                    severity = "medium"
-
-                findings.append({
-                    "title": f"Open Port: {port_id}/{protocol} ({service_name})",
-                    "description": f"Port {port_id}/{protocol} is open running {service_desc}. Verify this service is required and properly secured.",
-                    "severity": severity,
-                    "location": f"{host_addr}:{port_id}",
-                    "evidence": f"State: open | Service: {service_desc}",
-                    "metadata": {
-                        "cweid": "200",
-                        "confidence": "high",
-                        "scanner": "nmap",
-                        "port": port_id,
-                        "protocol": protocol,
-                        "service": service_name,
-                        "version": service_version,
-                        "owasp": "A05:2021-Security Misconfiguration",
-                    },
-                })
+            port_id = port.get("portid", "?")
+            protocol = port.get("protocol", "tcp")
+            service_el = port.find("service")
+            service_name = service_el.get("name", "unknown") if service_el is not None else "unknown"
+            service_version = service_el.get("version", "") if service_el is not None else ""
+            product = service_el.get("product", "") if service_el is not None else ""
+
+            findings.append(NetworkScanner._port_finding(
+                host_addr, port_id, protocol, service_name,
+                f"{product} {service_version}".strip() or service_name,
+                version=service_version, scanner="nmap",
+            ))
 
         return findings
@@ -0,0 +1,242 @@
+"""
+Passive Checks — declarative header/cookie/redirect/TLS rules evaluated
+against one fetched response.
+
+Each entry in ``PASSIVE_CHECKS`` names a matcher that inspects a
+``PassiveResponse`` and returns the evidence strings it found. Every piece
+of evidence becomes one finding. The table is compiled once at import, and
+``evaluate`` runs it in a single pass, so adding a check costs no extra
+request. ``evaluate`` is a pure function of the snapshot and can be
+benchmarked without a network.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.models.models import VulnerabilitySeverity
+
+_LEGACY_TLS_VERSIONS = {"SSLv2", "SSLv3", "TLSv1", "TLSv1.1"}
+
+
+@dataclass
+class PassiveResponse:
+    """Everything the passive checks look at, captured from a single fetch."""
+    url: str
+    final_url: str
+    status_code: int
+    headers: Dict[str, str]  # lowercased names; repeated headers joined with ", "
+    set_cookies: List[str] = field(default_factory=list)
+    redirect_chain: List[Tuple[int, str]] = field(default_factory=list)  # (status, url) per hop
+    tls: Optional[Dict[str, Any]] = None  # {"version", "cipher"} for HTTPS responses
+    legacy_tls: Optional[Dict[str, Any]] = None  # set when a TLS 1.0/1.1-only probe succeeded
+
+    @classmethod
+    def from_httpx(cls, url: str, response) -> "PassiveResponse":
+        """Snapshot an ``httpx.Response``; call while a streamed response is still open for TLS info."""
+        return cls(
+            url=url,
+            final_url=str(response.url),
+            status_code=response.status_code,
+            headers={k.lower(): v for k, v in response.headers.items()},
+            set_cookies=response.headers.get_list("set-cookie"),
+            redirect_chain=[(hop.status_code, str(hop.url)) for hop in response.history],
+            tls=_tls_info(response),
+        )
+
+
+def _tls_info(response) -> Optional[Dict[str, Any]]:
+    try:
+        ssl_object = response.extensions["network_stream"].get_extra_info("ssl_object")
+    except Exception:
+        return None
+    if ssl_object is None:
+        return None
+    cipher = ssl_object.cipher()
+    return {"version": ssl_object.version(), "cipher": cipher[0] if cipher else None}
+
+
+def _missing(header: str, evidence: str, unless: Tuple[str, ...] = ()) -> Callable[[PassiveResponse], List[str]]:
+    def match(resp: PassiveResponse) -> List[str]:
+        if header in resp.headers or any(h in resp.headers for h in unless):
+            return []
+        return [evidence]
+    return match
+
+
+def _server_version(resp: PassiveResponse) -> List[str]:
+    server = resp.headers.get("server", "")
+    return [f"Server: {server}"] if server and any(c.isdigit() for c in server) else []
+
+
+def _powered_by(resp: PassiveResponse) -> List[str]:
+    return [f"X-Powered-By: {resp.headers['x-powered-by']}"] if "x-powered-by" in resp.headers else []
+
+
+def _cookies_without(attribute: str, https_only: bool = False) -> Callable[[PassiveResponse], List[str]]:
+    def match(resp: PassiveResponse) -> List[str]:
+        if resp.status_code != 200:
+            return []
+        if https_only and not resp.final_url.startswith("https://"):
+            return []
+        return [
+            f"Set-Cookie: {cookie[:150]}"
+            for cookie in resp.set_cookies
+            if attribute not in [part.strip().split("=", 1)[0].lower() for part in cookie.split(";")[1:]]
+        ]
+    return match
+
+
+def _https_downgrade(resp: PassiveResponse) -> List[str]:
+    hops = [url for _, url in resp.redirect_chain] + [resp.final_url]
+    return [
+        f"Redirect {src} -> {dst}"
+        for src, dst in zip(hops, hops[1:])
+        if src.startswith("https://") and dst.startswith("http://")
+    ]
+
+
+def _legacy_tls(resp: PassiveResponse) -> List[str]:
+    for tls in (resp.legacy_tls, resp.tls):
+        if tls and tls.get("version") in _LEGACY_TLS_VERSIONS:
+            return [f"Negotiated {tls['version']} ({tls.get('cipher')})"]
+    return []
+
+
+PASSIVE_CHECKS: List[Dict[str, Any]] = [
+    {
+        "id": "missing-csp",
+        "match": _missing("content-security-policy", "Header not present in HTTP response"),
+        "title": "Missing Content-Security-Policy Header",
+        "description": "No CSP header found. CSP prevents XSS, clickjacking, and data injection attacks by controlling resource loading.",
+        "severity": VulnerabilitySeverity.HIGH, "cweid": "79", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "missing-hsts",
+        "match": _missing("strict-transport-security", "Strict-Transport-Security not in response headers"),
+        "title": "Missing HTTP Strict-Transport-Security (HSTS)",
+        "description": "HSTS header is absent. Without it, browsers may downgrade to HTTP allowing MITM attacks.",
+        "severity": VulnerabilitySeverity.HIGH, "cweid": "319", "confidence": "high",
+        "owasp": "A02:2021-Cryptographic Failures",
+    },
+    {
+        "id": "missing-xfo",
+        "match": _missing("x-frame-options", "X-Frame-Options not in response headers", unless=("content-security-policy",)),
+        "title": "Missing X-Frame-Options — Clickjacking Risk",
+        "description": "X-Frame-Options header is not set. The page can be embedded in an iframe enabling clickjacking attacks.",
+        "severity": VulnerabilitySeverity.MEDIUM, "cweid": "1021", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "missing-xcto",
+        "match": _missing("x-content-type-options", "X-Content-Type-Options not in response headers"),
+        "title": "Missing X-Content-Type-Options Header",
+        "description": 'Without "nosniff", browsers may MIME-sniff responses away from the declared content-type.',
+        "severity": VulnerabilitySeverity.MEDIUM, "cweid": "16", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "missing-referrer-policy",
+        "match": _missing("referrer-policy", "Referrer-Policy not in response headers"),
+        "title": "Missing Referrer-Policy Header",
+        "description": "No Referrer-Policy header; browsers may leak full URL paths in the Referer header to third parties.",
+        "severity": VulnerabilitySeverity.LOW, "cweid": "200", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "missing-permissions-policy",
+        "match": _missing("permissions-policy", "Permissions-Policy not in response headers"),
+        "title": "Missing Permissions-Policy Header",
+        "description": "Permissions-Policy is absent; browser features (camera, microphone, geolocation) are not restricted.",
+        "severity": VulnerabilitySeverity.LOW, "cweid": "16", "confidence": "medium",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "server-version",
+        "match": _server_version,
+        "title": "Server Version Disclosure",
+        "description": "Server header reveals version info: \"{value}\". This aids targeted attacks.",
+        "severity": VulnerabilitySeverity.LOW, "cweid": "200", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "x-powered-by",
+        "match": _powered_by,
+        "title": "X-Powered-By Header Exposed",
+        "description": "X-Powered-By header reveals technology stack: \"{value}\". Remove to reduce information leakage.",
+        "severity": VulnerabilitySeverity.LOW, "cweid": "200", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "cookie-samesite",
+        "match": _cookies_without("samesite"),
+        "title": "Cookie Missing SameSite Attribute — CSRF Risk",
+        "description": "Session cookie does not have SameSite=Strict or Lax, making it vulnerable to Cross-Site Request Forgery.",
+        "severity": VulnerabilitySeverity.MEDIUM, "cweid": "352", "confidence": "medium",
+        "owasp": "A01:2021-Broken Access Control",
+    },
+    {
+        "id": "cookie-httponly",
+        "match": _cookies_without("httponly"),
+        "title": "Cookie Missing HttpOnly Flag",
+        "description": "Session cookie is accessible via JavaScript (no HttpOnly); XSS can steal session tokens.",
+        "severity": VulnerabilitySeverity.MEDIUM, "cweid": "1004", "confidence": "high",
+        "owasp": "A07:2021-Identification and Authentication Failures",
+    },
+    {
+        "id": "cookie-secure",
+        "match": _cookies_without("secure", https_only=True),
+        "title": "Cookie Missing Secure Flag",
+        "description": "A cookie set over HTTPS lacks the Secure flag, so the browser will also send it over plain HTTP where it can be intercepted.",
+        "severity": VulnerabilitySeverity.MEDIUM, "cweid": "614", "confidence": "high",
+        "owasp": "A05:2021-Security Misconfiguration",
+    },
+    {
+        "id": "https-downgrade-redirect",
+        "match": _https_downgrade,
+        "title": "Redirect Downgrades HTTPS to HTTP",
+        "description": "The redirect chain moves from HTTPS to plain HTTP, exposing the follow-up request and any cookies to network attackers.",
+        "severity": VulnerabilitySeverity.HIGH, "cweid": "319", "confidence": "high",
+        "owasp": "A02:2021-Cryptographic Failures",
+    },
+    {
+        "id": "legacy-tls",
+        "match": _legacy_tls,
+        "title": "Legacy TLS Protocol Negotiated",
+        "description": "The server accepted a deprecated SSL/TLS protocol version (RFC 8996). Disable everything below TLS 1.2.",
+        "severity": VulnerabilitySeverity.HIGH, "cweid": "326", "confidence": "high",
+        "owasp": "A02:2021-Cryptographic Failures",
+    },
+]
+
+
+def _compile(checks: List[Dict[str, Any]]):
+    compiled = []
+    for check in checks:
+        metadata = {
+            "cweid": check["cweid"], "confidence": check["confidence"], "scanner": "header-scan",
+            "owasp": check["owasp"], "check_id": check["id"],
+        }
+        compiled.append((check["match"], check["title"], check["description"], check["severity"], metadata))
+    return tuple(compiled)
+
+
+_COMPILED = _compile(PASSIVE_CHECKS)
+
+
+def evaluate(resp: PassiveResponse, location: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Run every passive check against ``resp`` and return the findings."""
+    location = location or resp.url
+    findings = []
+    for match, title, description, severity, metadata in _COMPILED:
+        for evidence in match(resp):
+            # "{value}" in a description is the header value from "Name: value" evidence
+            value = evidence.split(": ", 1)[-1]
+            findings.append({
+                "title": title,
+                "description": description.replace("{value}", value),
+                "severity": severity,
+                "location": location,
+                "evidence": evidence,
+                "metadata": dict(metadata),
+            })
+    return findings
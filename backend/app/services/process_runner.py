@@ -0,0 +1,174 @@
+"""
+Process Runner — asyncio subprocess helpers for external scanner binaries.
+
+Runs tools without blocking the event loop, drains stdout and stderr
+concurrently so large outputs cannot deadlock the pipes, and kills the
+child on timeout or task cancellation.
+"""
+import asyncio
+import weakref
+from typing import AsyncIterator, List, Optional, Tuple
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on concurrent child processes of one kind.
+
+    Semaphores are created per event loop so the limiter also works when
+    scans run under repeated ``asyncio.run`` calls (e.g. Celery workers).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limit)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self._semaphore().acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._semaphore().release()
+
+
+async def terminate_process(proc: asyncio.subprocess.Process) -> None:
+    """Kill a child process (if still running) and reap it."""
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    await proc.wait()
+
+
+async def run_process(
+    cmd: List[str],
+    timeout: float,
+    limiter: Optional[ConcurrencyLimiter] = None,
+    cwd: Optional[str] = None,
+) -> Tuple[int, bytes, bytes]:
+    """
+    Run a command and return ``(returncode, stdout, stderr)``.
+
+    Raises FileNotFoundError if the binary is missing and asyncio.TimeoutError
+    on timeout. On timeout or cancellation the child is killed before the
+    exception propagates.
+    """
+    if limiter is None:
+        return await _run(cmd, timeout, cwd)
+    async with limiter:
+        return await _run(cmd, timeout, cwd)
+
+
+async def _run(cmd: List[str], timeout: float, cwd: Optional[str]) -> Tuple[int, bytes, bytes]:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+    )
+    try:
+        # communicate() reads both pipes concurrently
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except BaseException:
+        await asyncio.shield(terminate_process(proc))
+        raise
+    return proc.returncode, stdout, stderr
+
+
+class StreamingProcess:
+    """
+    Run a command and consume its stdout incrementally.
+
+    stderr is drained in the background (only the tail is kept) so a chatty
+    child cannot block on a full pipe. The whole run is bounded by ``timeout``;
+    leaving the context early, on error or on cancellation kills the child.
+
+        async with StreamingProcess(cmd, timeout=300) as proc:
+            async for chunk in proc.iter_stdout():
+                ...
+        proc.returncode, proc.stderr_tail
+    """
+
+    _STDERR_TAIL = 64 * 1024
+
+    def __init__(
+        self,
+        cmd: List[str],
+        timeout: float,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self.returncode: Optional[int] = None
+        self.stderr_tail = b""
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._deadline = 0.0
+
+    async def __aenter__(self) -> "StreamingProcess":
+        if self.limiter is not None:
+            await self.limiter.__aenter__()
+        try:
+            self._proc = await asyncio.create_subprocess_exec(
+                *self.cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except BaseException:
+            if self.limiter is not None:
+                await self.limiter.__aexit__(None, None, None)
+            raise
+        self._deadline = asyncio.get_running_loop().time() + self.timeout
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        return self
+
+    def _remaining(self) -> float:
+        remaining = self._deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        return remaining
+
+    async def _drain_stderr(self) -> None:
+        while True:
+            chunk = await self._proc.stderr.read(self.chunk_size)
+            if not chunk:
+                return
+            self.stderr_tail = (self.stderr_tail + chunk)[-self._STDERR_TAIL:]
+
+    async def iter_stdout(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await asyncio.wait_for(self._proc.stdout.read(self.chunk_size), self._remaining())
+            if not chunk:
+                return
+            yield chunk
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                try:
+                    await asyncio.wait_for(self._proc.wait(), self._remaining())
+                except BaseException:
+                    await asyncio.shield(terminate_process(self._proc))
+                    raise
+            else:
+                await asyncio.shield(terminate_process(self._proc))
+            await self._stderr_task
+            self.returncode = self._proc.returncode
+        finally:
+            if not self._stderr_task.done():
+                self._stderr_task.cancel()
+            if self.limiter is not None:
+                await self.limiter.__aexit__(None, None, None)
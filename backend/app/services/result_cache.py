@@ -0,0 +1,134 @@
+"""
+Result Cache — persistent, size-bounded key/value cache for scanner results.
+
+Backed by a local SQLite file (stdlib ``sqlite3``) so cached results survive
+restarts and are shared by every worker process on the host. Values are
+zlib-compressed JSON; least-recently-used entries are evicted once the file's
+payload exceeds ``max_bytes``. Blocking SQLite calls run in a worker thread.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+
+class PersistentCache:
+    """SQLite-backed LRU cache with optional per-entry TTL."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+            self._conn = conn
+        return self._conn
+
+    # ── Synchronous implementation (runs in a thread) ──────────────────────
+
+    def _get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(zlib.decompress(value))
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> bool:
+        blob = zlib.compress(json.dumps(value, default=str).encode("utf-8"), 1)
+        if len(blob) > self.max_bytes:
+            return False
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+        return True
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least-recently-used ones until under max_bytes."""
+        conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+
+    # ── Blocking API (for callers already on a worker thread) ──────────────
+
+    def get_sync(self, key: str) -> Optional[Any]:
+        try:
+            return self._get(key)
+        except Exception as e:
+            print(f"Result cache read error ({self.path.name}): {e}")
+            return None
+
+    def set_sync(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        try:
+            return self._set(key, value, ttl)
+        except Exception as e:
+            print(f"Result cache write error ({self.path.name}): {e}")
+            return False
+
+    # ── Async API ──────────────────────────────────────────────────────────
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except Exception as e:
+            print(f"Result cache read error ({self.path.name}): {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store a JSON-serializable value; returns False if it exceeds the cache size."""
+        try:
+            return await asyncio.to_thread(self._set, key, value, ttl)
+        except Exception as e:
+            print(f"Result cache write error ({self.path.name}): {e}")
+            return False
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(self._delete, key)
+        except Exception as e:
+            print(f"Result cache delete error ({self.path.name}): {e}")
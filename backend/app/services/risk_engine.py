@@ -40,7 +40,11 @@ def calculate_risk_score(findings: List[Dict[str, Any]]) -> int:
       critical × 3 + high × 2 + medium × 1
     Capped at 10.
     """
-    breakdown = calculate_severity_breakdown(findings)
+    return risk_score_from_breakdown(calculate_severity_breakdown(findings))
+
+
+def risk_score_from_breakdown(breakdown: Dict[str, int]) -> int:
+    """Risk score (0–10) from precomputed severity counts, for incrementally written scans."""
     raw = (
         breakdown["critical"] * 3
         + breakdown["high"] * 2
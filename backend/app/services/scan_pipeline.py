@@ -0,0 +1,351 @@
+"""
+Scan Pipeline — a scan as a DAG of checkpointed stages.
+
+Each stage (static, dependencies, container, dynamic, normalize) maps onto a
+``ScanStatus`` and names the stages it depends on. Stages whose
+dependencies are met run concurrently, so independent engines still overlap
+and a scan takes as long as its slowest engine. While stages are running,
+``Scan.status`` shows the earliest active one.
+
+Every stage is checkpointed in ``ScanStage``: it is marked running when it
+starts and finished together with its output, and its findings are tagged
+with the stage name. When a crashed or redeployed worker's job is picked up
+again, finished stages are skipped and their findings kept; only the partial
+output of interrupted stages is discarded and those stages rerun, so a
+completed ZAP scan is never repeated. Engine errors and timeouts are recorded
+on their stage rather than raised, and downstream stages run regardless.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, or_, select
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.models import DependencyInventory, Scan, ScanStage, ScanStatus, Vulnerability
+from app.services.container_scanner import ContainerScanner
+from app.services.dependency_scanner import DependencyScanner, detect_manifest
+from app.services.finding_writer import FindingWriter
+from app.services.iac_scanner import IaCScanner
+from app.services.inventory import promote_inventory, restore_latest_inventory
+from app.services.risk_engine import risk_score_from_breakdown
+from app.services.scanner import ScannerService
+
+settings = get_settings()
+
+FINISHED = ("completed", "failed", "timeout")
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    status: ScanStatus
+    engines: Tuple[str, ...] = ()
+    depends_on: Tuple[str, ...] = ()
+    # Inventory written by the stage; staged until it finishes, discarded with its findings if interrupted
+    inventory_scanners: Tuple[str, ...] = ()
+
+
+STAGES: List[Stage] = [
+    Stage("static", ScanStatus.STATIC_SCAN, engines=("semgrep", "iac")),
+    Stage(
+        "dependencies", ScanStatus.DEPENDENCY_SCAN, engines=("dependencies",),
+        inventory_scanners=("dependency-scanner",),
+    ),
+    Stage("container", ScanStatus.CONTAINER_SCAN, engines=("container",), inventory_scanners=("trivy",)),
+    Stage("dynamic", ScanStatus.DYNAMIC_SCAN, engines=("dynamic",)),
+    Stage("normalize", ScanStatus.NORMALIZING, depends_on=("static", "dependencies", "container", "dynamic")),
+]
+
+_ENGINE_TIMEOUTS = {
+    "semgrep": "SCAN_SEMGREP_TIMEOUT_SECONDS",
+    "iac": "SCAN_IAC_TIMEOUT_SECONDS",
+    "dependencies": "SCAN_DEPENDENCY_TIMEOUT_SECONDS",
+    "dynamic": "SCAN_DYNAMIC_TIMEOUT_SECONDS",
+    "container": "SCAN_CONTAINER_TIMEOUT_SECONDS",
+}
+
+
+class ScanPipeline:
+    """Runs, checkpoints and resumes the stages of one scan."""
+
+    def __init__(
+        self,
+        scan_uuid: str,
+        code: str,
+        url: str,
+        container_image: Optional[str] = None,
+        refresh_container_cache: bool = False,
+        refresh_header_cache: bool = False,
+        addresses: Optional[List[str]] = None,
+    ):
+        self.scan_uuid = scan_uuid
+        self.code = code
+        self.url = url
+        self.container_image = container_image
+        self.refresh_container_cache = refresh_container_cache
+        self.refresh_header_cache = refresh_header_cache
+        self.addresses = addresses or []
+        self.scanner = ScannerService()
+        self.writer = FindingWriter(scan_uuid)
+        self.scan_id: Optional[int] = None
+        self.checkpoints: Dict[str, Dict[str, Any]] = {}
+        self.active: List[str] = []
+        self._static_results: List[Dict[str, Any]] = []
+
+    # ── Stage selection ────────────────────────────────────────────────────
+
+    def _engine_enabled(self, engine: str) -> bool:
+        if engine in ("semgrep", "iac"):
+            return bool(self.code)
+        if engine == "dependencies":
+            return detect_manifest(self.code) is not None
+        if engine == "dynamic":
+            return bool(self.url) and self.url not in ("http://", "https://")
+        if engine == "container":
+            return bool(self.container_image)
+        return False
+
+    def _stage_enabled(self, stage: Stage) -> bool:
+        return not stage.engines or any(self._engine_enabled(e) for e in stage.engines)
+
+    # ── Engines ────────────────────────────────────────────────────────────
+
+    async def _engine_semgrep(self, stage: str) -> int:
+        results = await self.scanner.run_semgrep(self.code)
+        self._static_results.extend(results)
+        return await self.writer.write(results, stage)
+
+    async def _engine_iac(self, stage: str) -> int:
+        results = await IaCScanner().scan_content(self.code, "source_code.py")
+        self._static_results.extend(results)
+        return await self.writer.write(results, stage)
+
+    async def _engine_dependencies(self, stage: str) -> int:
+        # Submitted source that is a package-lock.json / requirements.txt is audited and inventoried
+        scanner = DependencyScanner()
+        results = await scanner.scan_manifest(self.code)
+        await self.writer.write_inventory(scanner.inventory, "dependency-scanner", latest=False)
+        return await self.writer.write(results, stage)
+
+    async def _engine_dynamic(self, stage: str) -> int:
+        # Dynamic findings are written page by page as ZAP (or the fallback) returns them
+        written = 0
+        async for dynamic_results in self.scanner.iter_zap(
+            self.url, force_refresh=self.refresh_header_cache, pinned_addresses=self.addresses
+        ):
+            written += await self.writer.write(dynamic_results, stage)
+        return written
+
+    async def _engine_container(self, stage: str) -> int:
+        # Container findings stream straight from Trivy's report to the DB in batches
+        written = 0
+        async for findings, inventory in ContainerScanner().iter_image_batches(
+            self.container_image, force_refresh=self.refresh_container_cache
+        ):
+            written += await self.writer.write(findings, stage)
+            await self.writer.write_inventory(inventory, "trivy", latest=False)
+        return written
+
+    async def _run_engine(self, stage: Stage, name: str) -> Dict[str, Any]:
+        """Run one engine under its timeout; failures are returned, never raised."""
+        timeout = getattr(settings, _ENGINE_TIMEOUTS[name]) or None
+        started = time.monotonic()
+        try:
+            written = await asyncio.wait_for(getattr(self, f"_engine_{name}")(stage.name), timeout=timeout)
+            record = {"status": "completed", "findings": written}
+        except asyncio.TimeoutError:
+            print(f"Scan {self.scan_uuid}: {name} engine timed out after {timeout}s")
+            record = {"status": "timeout", "error": f"Timed out after {timeout}s"}
+        except Exception as e:
+            print(f"Scan {self.scan_uuid}: {name} engine failed: {e}")
+            record = {"status": "failed", "error": str(e)[:500]}
+        record["duration_seconds"] = round(time.monotonic() - started, 2)
+        return record
+
+    # ── Checkpoints ────────────────────────────────────────────────────────
+
+    def _current_status(self) -> ScanStatus:
+        for stage in STAGES:
+            if stage.name in self.active:
+                return stage.status
+        return ScanStatus.RUNNING
+
+    def _stage_summary(self) -> Dict[str, Dict[str, Any]]:
+        keys = ("status", "duration_seconds", "findings", "error")
+        return {
+            name: {k: cp[k] for k in keys if cp.get(k) is not None}
+            for name, cp in self.checkpoints.items()
+        }
+
+    async def _load(self) -> bool:
+        """Load checkpoints and discard output left behind by interrupted stages."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Scan).where(Scan.uuid == UUID(self.scan_uuid)))
+            db_scan = result.scalar_one_or_none()
+            if not db_scan:
+                return False
+            self.scan_id = db_scan.id
+            rows = (await db.execute(select(ScanStage).where(ScanStage.scan_id == db_scan.id))).scalars().all()
+            self.checkpoints = {
+                row.name: {
+                    "status": row.status, "attempts": row.attempts, "duration_seconds": row.duration_seconds,
+                    "findings": row.findings, "error": row.error, "output": row.output,
+                }
+                for row in rows
+            }
+            finished = {name for name, cp in self.checkpoints.items() if cp["status"] in FINISHED}
+
+            if not finished:
+                await db.execute(delete(Vulnerability).where(Vulnerability.scan_id == db_scan.id))
+            else:
+                stage_tag = Vulnerability.vuln_metadata["stage"].as_string()
+                await db.execute(
+                    delete(Vulnerability).where(
+                        Vulnerability.scan_id == db_scan.id,
+                        or_(stage_tag.is_(None), stage_tag.not_in(finished)),
+                    )
+                )
+            scanners = [s for stage in STAGES if stage.name not in finished for s in stage.inventory_scanners]
+            if scanners:
+                await db.execute(
+                    delete(DependencyInventory).where(
+                        DependencyInventory.scan_id == db_scan.id,
+                        DependencyInventory.scanner_name.in_(scanners),
+                    )
+                )
+                await restore_latest_inventory(db, db_scan)
+            await db.commit()
+        return True
+
+    async def _save(self, stage: Stage, **fields: Any) -> None:
+        """Write a stage checkpoint and the scan's current status in one transaction."""
+        checkpoint = self.checkpoints.setdefault(stage.name, {})
+        checkpoint.update(fields)
+        async with self.writer.lock, AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ScanStage).where(ScanStage.scan_id == self.scan_id, ScanStage.name == stage.name)
+            )
+            row = result.scalar_one_or_none()
+            if row is None:
+                row = ScanStage(scan_id=self.scan_id, name=stage.name)
+                db.add(row)
+            for key, value in fields.items():
+                setattr(row, key, value)
+            db_scan = await db.get(Scan, self.scan_id)
+            if db_scan:
+                db_scan.status = self._current_status()
+                db_scan.results = {"stages": self._stage_summary()}
+                # The stage's inventory replaces the project's previous one only once the stage finishes
+                if stage.inventory_scanners and fields.get("status") in FINISHED:
+                    await promote_inventory(db, db_scan, stage.inventory_scanners)
+            await db.commit()
+
+    # ── Execution ──────────────────────────────────────────────────────────
+
+    async def _normalize(self) -> Dict[str, Any]:
+        """Summarize everything the scan has persisted, including stages from earlier attempts."""
+        breakdown = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(Vulnerability.severity, func.count())
+                .where(Vulnerability.scan_id == self.scan_id)
+                .group_by(Vulnerability.severity)
+            )
+            for severity, count in rows.all():
+                key = severity.value if hasattr(severity, "value") else str(severity).lower()
+                breakdown[key if key in breakdown else "info"] += count
+            inventory_count = (await db.execute(
+                select(func.count()).select_from(DependencyInventory).where(DependencyInventory.scan_id == self.scan_id)
+            )).scalar_one()
+        return {
+            "vulnerabilities_count": sum(breakdown.values()),
+            "risk_score": risk_score_from_breakdown(breakdown),
+            "inventory_count": inventory_count,
+        }
+
+    async def _run_stage(self, stage: Stage) -> None:
+        self.active.append(stage.name)
+        started = time.monotonic()
+        await self._save(
+            stage, status="running", attempts=self.checkpoints.get(stage.name, {}).get("attempts", 0) + 1,
+            started_at=datetime.utcnow(), finished_at=None, duration_seconds=None, findings=0, error=None, output=None,
+        )
+
+        error = None
+        if stage.engines:
+            names = [name for name in stage.engines if self._engine_enabled(name)]
+            records = await asyncio.gather(*(self._run_engine(stage, name) for name in names))
+            engines = dict(zip(names, records))
+            if "semgrep" in engines:
+                await self.scanner.cache_results(f"scan:{self.scan_uuid}", self._static_results)
+            statuses = [record["status"] for record in records]
+            status = "completed" if "completed" in statuses else statuses[0]
+            findings = sum(record.get("findings", 0) for record in records)
+            error = "; ".join(f"{name}: {r['error']}" for name, r in engines.items() if r.get("error")) or None
+            output = {"engines": engines}
+        else:
+            output = await self._normalize()
+            status = "completed"
+            findings = output["vulnerabilities_count"]
+
+        self.active.remove(stage.name)
+        await self._save(
+            stage, status=status, finished_at=datetime.utcnow(),
+            duration_seconds=round(time.monotonic() - started, 2), findings=findings, error=error, output=output,
+        )
+
+    async def _finish(self) -> None:
+        engines: Dict[str, Any] = {}
+        results: Dict[str, Any] = {}
+        engine_statuses = []
+        for stage in STAGES:
+            checkpoint = self.checkpoints.get(stage.name)
+            if not checkpoint or not checkpoint.get("output"):
+                continue
+            if stage.engines:
+                engines.update(checkpoint["output"].get("engines", {}))
+                engine_statuses.append(checkpoint["status"])
+            else:
+                results.update(checkpoint["output"])
+        results["engines"] = engines
+        results["stages"] = self._stage_summary()
+
+        all_failed = bool(engine_statuses) and "completed" not in engine_statuses
+        async with AsyncSessionLocal() as db:
+            db_scan = await db.get(Scan, self.scan_id)
+            if not db_scan:
+                print(f"Scan record not found on database update for UUID: {self.scan_uuid}")
+                return
+            db_scan.status = ScanStatus.FAILED if all_failed else ScanStatus.COMPLETED
+            db_scan.results = results
+            await db.commit()
+
+    async def run(self) -> None:
+        if not await self._load():
+            print(f"Scan record not found for UUID: {self.scan_uuid}")
+            return
+        stages = [stage for stage in STAGES if self._stage_enabled(stage)]
+        done = {stage.name: asyncio.Event() for stage in stages}
+        for stage in stages:
+            if self.checkpoints.get(stage.name, {}).get("status") in FINISHED:
+                print(f"Scan {self.scan_uuid}: resuming past finished {stage.name} stage")
+                done[stage.name].set()
+
+        async def run_when_ready(stage: Stage) -> None:
+            for dependency in stage.depends_on:
+                if dependency in done:
+                    await done[dependency].wait()
+            await self._run_stage(stage)
+            done[stage.name].set()
+
+        async with asyncio.TaskGroup() as group:
+            for stage in stages:
+                if not done[stage.name].is_set():
+                    group.create_task(run_when_ready(stage))
+
+        await self._finish()
@@ -3,14 +3,38 @@ import json
 import os
 import re
 import tempfile
-import httpx
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from urllib.parse import urlparse, urlsplit
+from typing import Any, AsyncIterator, Dict, List, Optional
 from app.core.config import get_settings
 from app.models.models import Vulnerability, VulnerabilitySeverity
+from app.services.crawler import Crawler, normalize_url
+from app.services.dom_scan import scan_body
+from app.services.http_client import http_client, pin_addresses
+from app.services.passive_checks import PassiveResponse, evaluate
+from app.services.process_runner import run_process
+from app.services.result_cache import PersistentCache
+from app.services.ssrf_protection import is_allow_listed, resolve_scan_target
+from app.services.zap_client import AsyncZapClient
 
 settings = get_settings()
 
+# Response validators, headers and DOM findings per URL for conditional re-fetches
+_validator_cache = PersistentCache(
+    str(Path(settings.CACHE_DIR) / "http_validators.db"),
+    max_bytes=settings.HTTP_CONDITIONAL_CACHE_MAX_MB * 1024 * 1024,
+)
+
+# Per-run limit on the semgrep process; the scan's engine timeout caps the whole engine
+SEMGREP_TIMEOUT = 60
+
+# Short-lived header/DOM scan results shared by every scan of the same URL
+_header_result_cache = PersistentCache(
+    str(Path(settings.CACHE_DIR) / "header_scans.db"),
+    max_bytes=settings.HTTP_RESULT_CACHE_MAX_MB * 1024 * 1024,
+)
+
 # Initialize Redis client optionally
 redis_client = None
 try:
@@ -247,16 +271,7 @@ VULN_RULES = [
 
 class ScannerService:
     def __init__(self):
-        try:
-            from zapv2 import ZAPv2
-            self.zap = ZAPv2(
-                apikey=settings.ZAP_API_KEY,
-                proxies={'http': f'http://{settings.ZAP_HOST}:{settings.ZAP_PORT}',
-                        'https': f'http://{settings.ZAP_HOST}:{settings.ZAP_PORT}'}
-            )
-        except Exception as e:
-            print(f"ZAP client initialization warning: {str(e)}")
-            self.zap = None
+        self.zap = AsyncZapClient(settings.ZAP_HOST, settings.ZAP_PORT, settings.ZAP_API_KEY) if settings.ZAP_API_KEY else None
 
     async def run_semgrep(self, code: str, language: str = "auto") -> List[Dict[str, Any]]:
         """Run Semgrep static analysis on the provided code."""
@@ -269,16 +284,16 @@ class ScannerService:
                 temp_file.write(code)
                 temp_file_path = temp_file.name
 
-            import subprocess
             import sys
             # Use semgrep from the same venv as Python so it's always found
             venv_bin = Path(sys.executable).parent
             semgrep_bin = str(venv_bin / "semgrep")
             cmd = [semgrep_bin, "scan", "--config", "auto", "--json", "--quiet", temp_file_path]
-            res = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            if res.returncode not in (0, 1):
-                raise RuntimeError(f"Semgrep exit {res.returncode}: {res.stderr[:200]}")
-            data = json.loads(res.stdout)
+            # Async so concurrent engines keep running; a cancelled scan kills semgrep
+            returncode, stdout, stderr = await run_process(cmd, timeout=SEMGREP_TIMEOUT)
+            if returncode not in (0, 1):
+                raise RuntimeError(f"Semgrep exit {returncode}: {stderr[:200].decode(errors='replace')}")
+            data = json.loads(stdout)
 
             vulnerabilities = []
             for result in data.get('results', []):
@@ -308,6 +323,9 @@ class ScannerService:
         except FileNotFoundError:
             print("Semgrep not found — using enhanced rule-based scanner.")
             return self._real_static_scan(code)
+        except asyncio.TimeoutError:
+            print(f"Semgrep timed out after {SEMGREP_TIMEOUT}s — using enhanced rule-based scanner.")
+            return self._real_static_scan(code)
         except Exception as e:
             print(f"Semgrep execution failed ({e}) — using enhanced rule-based scanner.")
             return self._real_static_scan(code)
@@ -379,229 +397,204 @@ class ScannerService:
         }
         return mapping.get(cwe_id, "OWASP Top 10")
 
-    async def run_http_header_scan(self, url: str) -> List[Dict[str, Any]]:
+    async def run_http_header_scan(self, url: str, force_refresh: bool = False) -> List[Dict[str, Any]]:
         """
         Real HTTP security header scanner — no ZAP needed.
         Checks for missing/weak security headers per OWASP Security Headers Project.
+
+        Results are shared across scans (and organizations) for
+        HTTP_RESULT_CACHE_TTL_SECONDS, keyed by the normalized URL; each finding
+        carries ``metadata.fetched_at``. ``force_refresh`` skips the cache read.
+        URLs with credentials and allow-listed private targets are never shared.
+        """
+        key = await self._result_cache_key(url)
+        if key and not force_refresh:
+            cached = await _header_result_cache.get(key)
+            if cached is not None:
+                print(f"HTTP header scan cache hit for {url} (fetched {cached['fetched_at']})")
+                return [
+                    {**finding, 'location': url, 'metadata': {**finding['metadata'], 'cache_hit': True}}
+                    for finding in cached['findings']
+                ]
+
+        fetched_at = datetime.utcnow().isoformat()
+        vulnerabilities = await self._fetch_header_scan(url)
+        for finding in vulnerabilities:
+            finding['metadata'] = {**finding.get('metadata', {}), 'fetched_at': fetched_at}
+        reachable = not (vulnerabilities and vulnerabilities[0]['title'] == 'URL Not Reachable')
+        if key and reachable:
+            await _header_result_cache.set(
+                key, {'fetched_at': fetched_at, 'findings': vulnerabilities},
+                ttl=settings.HTTP_RESULT_CACHE_TTL_SECONDS,
+            )
+        return vulnerabilities
+
+    @staticmethod
+    async def _result_cache_key(url: str) -> Optional[str]:
+        """
+        Shared cache key for ``url``, or None when its result is specific to the
+        requester: credentials in the URL select a per-user view of the site, and
+        an allow-listed private address is some deployment's internal host.
         """
+        if settings.HTTP_RESULT_CACHE_TTL_SECONDS <= 0:
+            return None
+        try:
+            parts = urlsplit(url)
+            if parts.username is not None or parts.password is not None:
+                return None
+        except ValueError:
+            return None
+        ok, _, addresses = await resolve_scan_target(url)
+        if not ok or not addresses or is_allow_listed(addresses):
+            return None
+        normalized = normalize_url(url)
+        return f"hdr:{normalized}" if normalized else None
+
+    async def _fetch_header_scan(self, url: str) -> List[Dict[str, Any]]:
         vulnerabilities = []
-        headers_to_send = {"User-Agent": "Vulnalyze-Security-Scanner/1.0 (Mozilla/5.0; Windows NT 10.0; Win64; x64)"}
         try:
-            async with httpx.AsyncClient(timeout=15, follow_redirects=True, verify=False, headers=headers_to_send) as client:
-                try:
-                    response = await client.get(url)
-                except Exception as e:
-                    return [{
-                        'title': 'URL Not Reachable',
-                        'description': f'The target URL could not be reached: {str(e)[:150]}. Dynamic header scan skipped.',
-                        'severity': VulnerabilitySeverity.LOW,
-                        'location': url,
-                        'evidence': str(e)[:200],
-                        'metadata': {'cweid': '16', 'confidence': 'high', 'scanner': 'header-scan'}
-                    }]
-
-            headers = {k.lower(): v for k, v in response.headers.items()}
-            html_content = response.text
-
-            # --- DYNAMIC DOM SCANNING: ACTIONABLE CLOUD FINDINGS ---
-            
-            # Rule: Exposed AWS S3 Bucket (Cloud Infrastructure Leak)
-            s3_match = re.search(r'(https?://[a-zA-Z0-9.\-_]+\.s3\.amazonaws\.com[^\s\'"<>]+)', html_content)
-            if s3_match:
-                vulnerabilities.append({
-                    'title': 'Exposed AWS S3 Bucket URL (Cloud Infrastructure Leak)',
-                    'description': 'An internal AWS S3 bucket URL was found hardcoded in the frontend DOM. Attackers can scrape this to find unsecured buckets and exfiltrate data.',
-                    'severity': VulnerabilitySeverity.HIGH,
-                    'location': url,
-                    'evidence': f'Found in DOM: {s3_match.group(1)}',
-                    'metadata': {'cweid': '200', 'confidence': 'high', 'scanner': 'dom-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Exposed OpenAI/Anthropic API Key in DOM
-            api_key_match = re.search(r'(sk-(?:proj-)?[A-Za-z0-9_\-]{20,})', html_content)
-            if api_key_match:
-                vulnerabilities.append({
-                    'title': 'Hardcoded AI API Key in Client Code',
-                    'description': 'A live AI API key (OpenAI/Anthropic) was found exposed in the client-side JavaScript/HTML. This allows immediate billing theft and quota exhaustion.',
-                    'severity': VulnerabilitySeverity.CRITICAL,
-                    'location': url,
-                    'evidence': f'Found API Key pattern in DOM: {api_key_match.group(1)[:15]}...',
-                    'metadata': {'cweid': '798', 'confidence': 'high', 'scanner': 'dom-scan', 'owasp': 'A02:2021-Cryptographic Failures'}
-                })
-
-            # Rule: Exposed JWT Session Token in DOM
-            jwt_match = re.search(r'(eyJ[a-zA-Z0-9_-]{10,}\.eyJ[a-zA-Z0-9_-]{10,}\.[a-zA-Z0-9_-]{10,})', html_content)
-            if jwt_match:
-                vulnerabilities.append({
-                    'title': 'Exposed JWT Session Token in DOM',
-                    'description': 'A JSON Web Token (JWT) was found hardcoded in the frontend HTML/JS. Attackers can steal this token to hijack an active session.',
-                    'severity': VulnerabilitySeverity.CRITICAL,
-                    'location': url,
-                    'evidence': f'Found JWT in DOM: {jwt_match.group(1)[:30]}...',
-                    'metadata': {'cweid': '200', 'confidence': 'high', 'scanner': 'dom-scan', 'owasp': 'A01:2021-Broken Access Control'}
-                })
-
-            # Rule: Exposed Admin Portal Routes
-            admin_match = re.search(r'href=[\'"](?:/[a-zA-Z0-9\-_]*)?/(?:wp-admin|admin/login|dashboard/admin)[\'"]', html_content, re.IGNORECASE)
-            if admin_match:
-                vulnerabilities.append({
-                    'title': 'Exposed Administrative Portal Route',
-                    'description': 'A link to an internal administrative portal was found exposed to unauthenticated users. This provides attackers an immediate target for brute-force attacks.',
-                    'severity': VulnerabilitySeverity.MEDIUM,
-                    'location': url,
-                    'evidence': f'Found Admin Link: {admin_match.group(0)}',
-                    'metadata': {'cweid': '425', 'confidence': 'high', 'scanner': 'dom-scan', 'owasp': 'A01:2021-Broken Access Control'}
-                })
-
-            # --- HTTP SECURITY HEADERS SCANNING ---
-            if 'content-security-policy' not in headers:
-                vulnerabilities.append({
-                    'title': 'Missing Content-Security-Policy Header',
-                    'description': 'No CSP header found. CSP prevents XSS, clickjacking, and data injection attacks by controlling resource loading.',
-                    'severity': VulnerabilitySeverity.HIGH,
-                    'location': url,
-                    'evidence': 'Header not present in HTTP response',
-                    'metadata': {'cweid': '79', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Missing Strict-Transport-Security
-            if 'strict-transport-security' not in headers:
-                vulnerabilities.append({
-                    'title': 'Missing HTTP Strict-Transport-Security (HSTS)',
-                    'description': 'HSTS header is absent. Without it, browsers may downgrade to HTTP allowing MITM attacks.',
-                    'severity': VulnerabilitySeverity.HIGH,
-                    'location': url,
-                    'evidence': 'Strict-Transport-Security not in response headers',
-                    'metadata': {'cweid': '319', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A02:2021-Cryptographic Failures'}
-                })
-
-            # Rule: Missing X-Frame-Options
-            if 'x-frame-options' not in headers and 'content-security-policy' not in headers:
-                vulnerabilities.append({
-                    'title': 'Missing X-Frame-Options — Clickjacking Risk',
-                    'description': 'X-Frame-Options header is not set. The page can be embedded in an iframe enabling clickjacking attacks.',
-                    'severity': VulnerabilitySeverity.MEDIUM,
-                    'location': url,
-                    'evidence': 'X-Frame-Options not in response headers',
-                    'metadata': {'cweid': '1021', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Missing X-Content-Type-Options
-            if 'x-content-type-options' not in headers:
-                vulnerabilities.append({
-                    'title': 'Missing X-Content-Type-Options Header',
-                    'description': 'Without "nosniff", browsers may MIME-sniff responses away from the declared content-type.',
-                    'severity': VulnerabilitySeverity.MEDIUM,
-                    'location': url,
-                    'evidence': 'X-Content-Type-Options not in response headers',
-                    'metadata': {'cweid': '16', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Missing Referrer-Policy
-            if 'referrer-policy' not in headers:
-                vulnerabilities.append({
-                    'title': 'Missing Referrer-Policy Header',
-                    'description': 'No Referrer-Policy header; browsers may leak full URL paths in the Referer header to third parties.',
-                    'severity': VulnerabilitySeverity.LOW,
-                    'location': url,
-                    'evidence': 'Referrer-Policy not in response headers',
-                    'metadata': {'cweid': '200', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Missing Permissions-Policy
-            if 'permissions-policy' not in headers:
-                vulnerabilities.append({
-                    'title': 'Missing Permissions-Policy Header',
-                    'description': 'Permissions-Policy is absent; browser features (camera, microphone, geolocation) are not restricted.',
+            cached = await self._get_validators(url)
+            conditional = {}
+            if cached:
+                if cached.get('etag'):
+                    conditional['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    conditional['If-Modified-Since'] = cached['last_modified']
+            try:
+                async with http_client.stream("GET", url, follow_redirects=True, headers=conditional) as response:
+                    passive = PassiveResponse.from_httpx(url, response)
+                    not_modified = response.status_code == 304 and bool(cached)
+                    if not not_modified:
+                        # --- DYNAMIC DOM SCANNING: ACTIONABLE CLOUD FINDINGS ---
+                        dom = await scan_body(
+                            url, response.aiter_bytes(), settings.DOM_SCAN_MAX_BYTES, response.charset_encoding
+                        )
+            except Exception as e:
+                return [{
+                    'title': 'URL Not Reachable',
+                    'description': f'The target URL could not be reached: {str(e)[:150]}. Dynamic header scan skipped.',
                     'severity': VulnerabilitySeverity.LOW,
                     'location': url,
-                    'evidence': 'Permissions-Policy not in response headers',
-                    'metadata': {'cweid': '16', 'confidence': 'medium', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Server header exposes version
-            server_header = headers.get('server', '')
-            if server_header and any(c.isdigit() for c in server_header):
-                vulnerabilities.append({
-                    'title': 'Server Version Disclosure',
-                    'description': f'Server header reveals version info: "{server_header}". This aids targeted attacks.',
-                    'severity': VulnerabilitySeverity.LOW,
-                    'location': url,
-                    'evidence': f'Server: {server_header}',
-                    'metadata': {'cweid': '200', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: X-Powered-By header
-            if 'x-powered-by' in headers:
-                vulnerabilities.append({
-                    'title': 'X-Powered-By Header Exposed',
-                    'description': f'X-Powered-By header reveals technology stack: "{headers["x-powered-by"]}". Remove to reduce information leakage.',
-                    'severity': VulnerabilitySeverity.LOW,
-                    'location': url,
-                    'evidence': f'X-Powered-By: {headers["x-powered-by"]}',
-                    'metadata': {'cweid': '200', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A05:2021-Security Misconfiguration'}
-                })
-
-            # Rule: Missing Anti-CSRF (heuristic)
-            if response.status_code == 200 and 'set-cookie' in headers:
-                cookie_header = headers['set-cookie']
-                if 'samesite' not in cookie_header.lower():
-                    vulnerabilities.append({
-                        'title': 'Cookie Missing SameSite Attribute — CSRF Risk',
-                        'description': 'Session cookie does not have SameSite=Strict or Lax, making it vulnerable to Cross-Site Request Forgery.',
-                        'severity': VulnerabilitySeverity.MEDIUM,
-                        'location': url,
-                        'evidence': f'Set-Cookie: {cookie_header[:150]}',
-                        'metadata': {'cweid': '352', 'confidence': 'medium', 'scanner': 'header-scan', 'owasp': 'A01:2021-Broken Access Control'}
-                    })
-                if 'httponly' not in cookie_header.lower():
-                    vulnerabilities.append({
-                        'title': 'Cookie Missing HttpOnly Flag',
-                        'description': 'Session cookie is accessible via JavaScript (no HttpOnly); XSS can steal session tokens.',
-                        'severity': VulnerabilitySeverity.MEDIUM,
-                        'location': url,
-                        'evidence': f'Set-Cookie: {cookie_header[:150]}',
-                        'metadata': {'cweid': '1004', 'confidence': 'high', 'scanner': 'header-scan', 'owasp': 'A07:2021-Identification and Authentication Failures'}
-                    })
+                    'evidence': str(e)[:200],
+                    'metadata': {'cweid': '16', 'confidence': 'high', 'scanner': 'header-scan'}
+                }]
+
+            if not_modified:
+                # Body unchanged: reuse the DOM findings and re-check headers, with the
+                # 304's headers overriding the stored ones (RFC 9111 §4.3.4)
+                vulnerabilities.extend(
+                    {**finding, 'metadata': {**finding['metadata'], 'not_modified': True}}
+                    for finding in cached['dom_findings']
+                )
+                passive.headers = {**cached['headers'], **passive.headers}
+                passive.set_cookies = passive.set_cookies or cached['set_cookies']
+                passive.status_code = cached['status_code']
+            else:
+                vulnerabilities.extend(dom["findings"])
+                if dom["truncated"]:
+                    print(f"DOM scan of {url} stopped at {dom['bytes_read']} bytes (DOM_SCAN_MAX_BYTES)")
+                await self._store_validators(url, passive, dom["findings"])
+
+            # --- HTTP SECURITY HEADERS, COOKIES, REDIRECTS AND TLS ---
+            if settings.HTTP_LEGACY_TLS_PROBE:
+                passive.legacy_tls = await http_client.probe_legacy_tls(passive.final_url)
+            vulnerabilities.extend(evaluate(passive, location=url))
 
             print(f"HTTP header scan found {len(vulnerabilities)} findings for {url}")
         except Exception as e:
             print(f"HTTP header scan error: {e}")
         return vulnerabilities
 
-    async def run_zap(self, url: str) -> List[Dict[str, Any]]:
-        """Run OWASP ZAP dynamic analysis if available, otherwise real HTTP header scan."""
+    async def _get_validators(self, url: str) -> Optional[Dict[str, Any]]:
+        if not settings.HTTP_CONDITIONAL_CACHE_ENABLED:
+            return None
+        return await _validator_cache.get(f"http:{url}")
+
+    async def _store_validators(self, url: str, passive: PassiveResponse, dom_findings: List[Dict[str, Any]]) -> None:
+        """Remember ETag/Last-Modified, headers and DOM findings for the next conditional fetch."""
+        if not settings.HTTP_CONDITIONAL_CACHE_ENABLED or passive.status_code != 200:
+            return
+        etag = passive.headers.get('etag')
+        last_modified = passive.headers.get('last-modified')
+        if not etag and not last_modified:
+            return
+        await _validator_cache.set(f"http:{url}", {
+            'etag': etag,
+            'last_modified': last_modified,
+            'status_code': passive.status_code,
+            'headers': passive.headers,
+            'set_cookies': passive.set_cookies,
+            'dom_findings': dom_findings,
+        }, ttl=settings.HTTP_CONDITIONAL_CACHE_TTL_SECONDS)
+
+    def _zap_alert_to_finding(self, alert: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'title': alert['name'],
+            'description': alert['description'],
+            'severity': self._map_zap_severity(alert['risk']),
+            'location': alert['url'],
+            'evidence': alert['evidence'],
+            'metadata': {
+                'cweid': alert.get('cweid'),
+                'wascid': alert.get('wascid'),
+                'confidence': alert.get('confidence', 'medium'),
+                'scanner': 'owasp-zap'
+            }
+        }
+
+    async def iter_zap(
+        self, url: str, force_refresh: bool = False, pinned_addresses: Optional[List[str]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Run OWASP ZAP dynamic analysis if available, otherwise the built-in
+        header scan and crawler. ZAP alerts are yielded a page at a time.
+        ``force_refresh`` bypasses the shared header scan result cache.
+        ``pinned_addresses`` (from ``resolve_scan_target``) are what the
+        built-in scans connect to instead of re-resolving the hostname;
+        ZAP does its own resolution.
+        """
         try:
-            if not self.zap or not settings.ZAP_API_KEY:
+            if not self.zap:
                 raise ValueError("ZAP client or API key not configured — falling back to HTTP header scan")
-            # Start new scan
-            scan_id = self.zap.spider.scan(url)
-            while int(self.zap.spider.status(scan_id)) < 100:
-                await asyncio.sleep(5)
-            active_scan_id = self.zap.ascan.scan(url)
-            while int(self.zap.ascan.status(active_scan_id)) < 100:
-                await asyncio.sleep(5)
-            alerts = self.zap.core.alerts()
-            vulnerabilities = []
-            for alert in alerts:
-                vuln = {
-                    'title': alert['name'],
-                    'description': alert['description'],
-                    'severity': self._map_zap_severity(alert['risk']),
-                    'location': alert['url'],
-                    'evidence': alert['evidence'],
-                    'metadata': {
-                        'cweid': alert.get('cweid'),
-                        'wascid': alert.get('wascid'),
-                        'confidence': alert.get('confidence', 'medium'),
-                        'scanner': 'owasp-zap'
-                    }
-                }
-                vulnerabilities.append(vuln)
-            return vulnerabilities
+            spider_id = await self.zap.spider_scan(url)
+            await self.zap.wait_for(self.zap.spider_status, spider_id, "ZAP spider")
+            active_scan_id = await self.zap.ascan_scan(url)
+            await self.zap.wait_for(self.zap.ascan_status, active_scan_id, "ZAP active scan")
         except Exception as e:
             print(f"OWASP ZAP not available ({e}) — running real HTTP header scan instead.")
-            return await self.run_http_header_scan(url)
+            with pin_addresses({urlparse(url).hostname: pinned_addresses or []}):
+                vulnerabilities = await self._run_builtin_dast(url, force_refresh)
+            yield vulnerabilities
+            return
+
+        pages = self.zap.iter_alerts(url)
+        while True:
+            try:
+                alerts = await pages.__anext__()
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                print(f"OWASP ZAP alert retrieval error: {e}")
+                return
+            yield [self._zap_alert_to_finding(alert) for alert in alerts]
+
+    async def run_zap(self, url: str) -> List[Dict[str, Any]]:
+        """Run OWASP ZAP dynamic analysis if available, otherwise real HTTP header scan."""
+        vulnerabilities = []
+        async for batch in self.iter_zap(url):
+            vulnerabilities.extend(batch)
+        return vulnerabilities
+
+    async def _run_builtin_dast(self, url: str, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        vulnerabilities = await self.run_http_header_scan(url, force_refresh=force_refresh)
+        if settings.CRAWL_ENABLED and not (vulnerabilities and vulnerabilities[0]['title'] == 'URL Not Reachable'):
+            try:
+                known = {(v['title'], v['evidence']) for v in vulnerabilities}
+                crawled = await Crawler(url).run()
+                vulnerabilities.extend(v for v in crawled if (v['title'], v['evidence']) not in known)
+            except Exception as crawl_error:
+                print(f"Crawler error: {crawl_error}")
+        return vulnerabilities
 
     def _map_semgrep_severity(self, severity: str) -> VulnerabilitySeverity:
         severity_map = {
@@ -639,26 +632,35 @@ class ScannerService:
 
 
 def run_hybrid_scan(scan_id: str, code: str, url: str):
-    """Run hybrid scan (registered as Celery task when available)."""
-    scanner = ScannerService()
-    static_results = asyncio.run(scanner.run_semgrep(code)) if code else []
-    dynamic_results = asyncio.run(scanner.run_zap(url)) if url else []
-    all_results = static_results + dynamic_results
-    asyncio.run(scanner.cache_results(f"scan:{scan_id}", all_results))
-    return all_results
+    """Run a hybrid scan and persist it (registered as Celery task when available)."""
+    asyncio.run(_run_hybrid_scan(scan_id, code, url))
+
+
+async def _run_hybrid_scan(scan_id: str, code: str, url: str) -> None:
+    from app.db.session import engine
+    try:
+        await run_scan_task_in_background(scan_id, code, url)
+    finally:
+        # Each task runs on a fresh event loop; pooled DB connections must not outlive it
+        await engine.dispose()
 
 # Register as Celery task when Celery is available
 if celery_app is not None:
     run_hybrid_scan = celery_app.task(run_hybrid_scan)
 
 
-async def run_scan_task_in_background(scan_uuid: str, code: str, url: str):
-    """Async background task to run the hybrid scan and save results to SQLite/Postgres DB."""
+async def run_scan_task_in_background(
+    scan_uuid: str,
+    code: str,
+    url: str,
+    container_image: str | None = None,
+    refresh_container_cache: bool = False,
+    refresh_header_cache: bool = False,
+):
+    """Run (or resume) a hybrid scan and save results to SQLite/Postgres DB."""
     from app.db.session import AsyncSessionLocal
     from app.models.models import Scan, Vulnerability, ScanStatus, VulnerabilitySeverity, FindingStatus
-    from app.services.ssrf_protection import validate_scan_target
-    from app.services.iac_scanner import IaCScanner
-    from app.services.risk_engine import calculate_risk_score
+    from app.services.ssrf_protection import resolve_scan_target
     from sqlalchemy import select
     from uuid import UUID
 
@@ -675,8 +677,9 @@ async def run_scan_task_in_background(scan_uuid: str, code: str, url: str):
         await db.commit()
 
     # 2. SSRF Target Validation
+    addresses = []
     if url and url not in ("", "http://", "https://"):
-        is_safe, reason = validate_scan_target(url)
+        is_safe, reason, addresses = await resolve_scan_target(url)
         if not is_safe:
             print(f"SSRF Protection blocked URL target: {url} ({reason})")
             async with AsyncSessionLocal() as db:
@@ -702,72 +705,13 @@ async def run_scan_task_in_background(scan_uuid: str, code: str, url: str):
                     await db.commit()
             return
 
-    # 3. Run all scanner engines
-    scanner = ScannerService()
-    static_results = []
-    dynamic_results = []
-    iac_results = []
-
-    if code:
-        # Run static Semgrep / Rule scanner
-        static_results = await scanner.run_semgrep(code)
-        # Run IaC pattern scanner
-        iac_scanner = IaCScanner()
-        iac_results = await iac_scanner.scan_content(code, "source_code.py")
-
-    if url and url not in ("", "http://", "https://"):
-        dynamic_results = await scanner.run_zap(url)
-
-    all_results = static_results + iac_results + dynamic_results
-
-    # 4. Cache results (if Redis exists)
-    await scanner.cache_results(f"scan:{scan_uuid}", all_results)
-
-    # 5. Save results to DB with extended fields and update Scan Status
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(select(Scan).where(Scan.uuid == UUID(scan_uuid)))
-        db_scan = result.scalar_one_or_none()
-        if not db_scan:
-            print(f"Scan record not found on database update for UUID: {scan_uuid}")
-            return
-
-        for res in all_results:
-            evidence = res.get('evidence') or ''
-            if isinstance(evidence, str):
-                evidence = evidence[:500]
-
-            meta = res.get('metadata', {})
-            sev_raw = res.get('severity', VulnerabilitySeverity.LOW)
-            if isinstance(sev_raw, str):
-                try:
-                    sev = VulnerabilitySeverity(sev_raw.lower())
-                except ValueError:
-                    sev = VulnerabilitySeverity.LOW
-            else:
-                sev = sev_raw
-
-            db_vuln = Vulnerability(
-                scan_id=db_scan.id,
-                title=str(res['title'])[:255],
-                description=str(res['description']),
-                severity=sev,
-                location=str(res['location'])[:255],
-                evidence=evidence,
-                rule_id=meta.get('rule_id', ''),
-                cwe_id=str(meta.get('cweid', '')),
-                owasp_category=meta.get('owasp', ''),
-                confidence=meta.get('confidence', 'medium'),
-                scanner_name=meta.get('scanner', 'vulnalyze-engine'),
-                finding_status=FindingStatus.OPEN,
-                vuln_metadata=meta
-            )
-            db.add(db_vuln)
+    # 3. Run the stage pipeline. Finished stages from an earlier attempt are
+    # skipped, so a resumed scan picks up where the last worker stopped.
+    from app.services.scan_pipeline import ScanPipeline
 
-        risk_score = calculate_risk_score(all_results)
-        db_scan.status = ScanStatus.COMPLETED
-        db_scan.results = {
-            "vulnerabilities_count": len(all_results),
-            "risk_score": risk_score
-        }
-        await db.commit()
-        print(f"Scan {scan_uuid} completed — {len(all_results)} vulnerabilities saved (Risk Score: {risk_score}/10).")
\ No newline at end of file
+    await ScanPipeline(
+        scan_uuid, code, url, container_image,
+        refresh_container_cache=refresh_container_cache,
+        refresh_header_cache=refresh_header_cache,
+        addresses=addresses,
+    ).run()
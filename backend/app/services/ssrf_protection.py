@@ -2,25 +2,111 @@
 SSRF Protection — Validates target URLs before scanning.
 Blocks internal/private network addresses to prevent Server-Side Request Forgery.
 """
+import asyncio
 import ipaddress
+from bisect import bisect_right
 import socket
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import urlparse
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 
+from app.core.config import get_settings
+from app.services.dns_cache import dns_cache
 
-# Private/reserved CIDR blocks that must never be scanned
+
+# Private/reserved CIDR blocks that must never be scanned: every range in the
+# IANA IPv4/IPv6 Special-Purpose Address Registries that is not globally
+# reachable, plus multicast and deprecated transition ranges
 _BLOCKED_NETWORKS = [
-    ipaddress.ip_network("127.0.0.0/8"),       # Loopback
+    ipaddress.ip_network("0.0.0.0/8"),          # "This" network
     ipaddress.ip_network("10.0.0.0/8"),         # RFC1918
+    ipaddress.ip_network("100.64.0.0/10"),      # Shared address space (CGNAT)
+    ipaddress.ip_network("127.0.0.0/8"),        # Loopback
+    ipaddress.ip_network("169.254.0.0/16"),     # Link-local (includes cloud metadata 169.254.169.254)
     ipaddress.ip_network("172.16.0.0/12"),      # RFC1918
+    ipaddress.ip_network("192.0.0.0/24"),       # IETF protocol assignments
+    ipaddress.ip_network("192.0.2.0/24"),       # Documentation (TEST-NET-1)
+    ipaddress.ip_network("192.88.99.0/24"),     # Deprecated 6to4 relay anycast
     ipaddress.ip_network("192.168.0.0/16"),     # RFC1918
-    ipaddress.ip_network("169.254.0.0/16"),     # Link-local (includes cloud metadata 169.254.169.254)
-    ipaddress.ip_network("0.0.0.0/8"),          # "This" network
+    ipaddress.ip_network("198.18.0.0/15"),      # Benchmarking
+    ipaddress.ip_network("198.51.100.0/24"),    # Documentation (TEST-NET-2)
+    ipaddress.ip_network("203.0.113.0/24"),     # Documentation (TEST-NET-3)
+    ipaddress.ip_network("224.0.0.0/4"),        # Multicast
+    ipaddress.ip_network("240.0.0.0/4"),        # Reserved, includes limited broadcast
+    ipaddress.ip_network("::/96"),              # Unspecified, IPv4-compatible (deprecated)
     ipaddress.ip_network("::1/128"),            # IPv6 loopback
+    ipaddress.ip_network("64:ff9b:1::/48"),     # Local-use IPv4/IPv6 translation
+    ipaddress.ip_network("100::/64"),           # Discard-only
+    ipaddress.ip_network("2001::/23"),          # IETF protocol assignments (incl. Teredo)
+    ipaddress.ip_network("2001:db8::/32"),      # Documentation
+    ipaddress.ip_network("3fff::/20"),          # Documentation
+    ipaddress.ip_network("5f00::/16"),          # Segment Routing SIDs
     ipaddress.ip_network("fc00::/7"),           # IPv6 unique local
     ipaddress.ip_network("fe80::/10"),          # IPv6 link-local
+    ipaddress.ip_network("fec0::/10"),          # Site-local (deprecated)
+    ipaddress.ip_network("ff00::/8"),           # IPv6 multicast
 ]
 
+_NAT64_WELL_KNOWN = ipaddress.ip_network("64:ff9b::/96")
+
+
+def _compile_intervals(networks) -> Dict[int, Tuple[List[int], List[int], List[str]]]:
+    """
+    Sorted, non-overlapping ``(starts, ends, labels)`` integer interval arrays
+    per IP version, so a lookup is one ``bisect`` instead of a scan.
+
+    Every interval keeps the label of the range it came from. A range nested
+    in another splits it, so lookups report the most specific range.
+    """
+    tables: Dict[int, Tuple[List[int], List[int], List[str]]] = {}
+    for version in (4, 6):
+        intervals: List[Tuple[int, int, str]] = []
+        # CIDR ranges are either disjoint or nested, so widest-first painting
+        # always places a range inside exactly one existing piece or outside all of them
+        for network in sorted((n for n in networks if n.version == version), key=lambda n: n.prefixlen):
+            start, end = int(network.network_address), int(network.broadcast_address)
+            for i, (piece_start, piece_end, label) in enumerate(intervals):
+                if piece_start <= start and end <= piece_end:
+                    pieces = [(piece_start, start - 1, label), (start, end, str(network)), (end + 1, piece_end, label)]
+                    intervals[i:i + 1] = [piece for piece in pieces if piece[0] <= piece[1]]
+                    break
+            else:
+                intervals.append((start, end, str(network)))
+        intervals.sort()
+        tables[version] = ([i[0] for i in intervals], [i[1] for i in intervals], [i[2] for i in intervals])
+    return tables
+
+
+_BLOCKED_INTERVALS = _compile_intervals(_BLOCKED_NETWORKS)
+
+
+def _embedded_ipv4(ip) -> Optional[ipaddress.IPv4Address]:
+    """The IPv4 address carried by IPv4-mapped, NAT64 (64:ff9b::/96) and 6to4 addresses."""
+    if ip.version != 6:
+        return None
+    if ip.ipv4_mapped is not None:
+        return ip.ipv4_mapped
+    if ip in _NAT64_WELL_KNOWN:
+        return ipaddress.IPv4Address(int(ip) & 0xFFFFFFFF)
+    return ip.sixtofour
+
+
+def blocked_network(ip) -> Optional[str]:
+    """The blocked range containing ``ip`` (checking any embedded IPv4 address), or None."""
+    for candidate in (ip, _embedded_ipv4(ip)):
+        if candidate is None:
+            continue
+        starts, ends, labels = _BLOCKED_INTERVALS[candidate.version]
+        value = int(candidate)
+        i = bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            return labels[i]
+    return None
+
+
+INVALID_HOSTNAME = "Invalid hostname"
+
 # Hostnames that must always be blocked
 _BLOCKED_HOSTNAMES = {
     "localhost",
@@ -29,48 +115,184 @@ _BLOCKED_HOSTNAMES = {
 }
 
 
-def validate_scan_target(url: str) -> Tuple[bool, str]:
-    """
-    Validate a scan target URL against SSRF protections.
+@lru_cache(maxsize=8)
+def _allowed_networks(cidrs: Tuple[str, ...]) -> tuple:
+    return tuple(ipaddress.ip_network(cidr, strict=False) for cidr in cidrs)
 
-    Returns:
-        (is_valid, reason) — True if safe to scan, False with explanation if blocked.
-    """
+
+def _is_allowed(ip) -> bool:
+    """True if the IP falls in an explicitly allow-listed network (SSRF_ALLOWED_NETWORKS)."""
+    ip = _embedded_ipv4(ip) or ip
+    return any(
+        ip.version == network.version and ip in network
+        for network in _allowed_networks(tuple(get_settings().SSRF_ALLOWED_NETWORKS))
+    )
+
+
+def _check_url(url: str) -> Tuple[Optional[str], str]:
+    """Checks that need no DNS; returns ``(hostname, "")`` or ``(None, reason)``."""
     if not url or not url.strip():
-        return False, "URL is empty"
+        return None, "URL is empty"
 
     try:
         parsed = urlparse(url)
     except Exception:
-        return False, "Invalid URL format"
+        return None, "Invalid URL format"
 
     # Must have a scheme
     if parsed.scheme not in ("http", "https"):
-        return False, f"Unsupported scheme: {parsed.scheme!r}. Only http:// and https:// are allowed."
+        return None, f"Unsupported scheme: {parsed.scheme!r}. Only http:// and https:// are allowed."
 
     hostname = parsed.hostname
     if not hostname:
-        return False, "URL has no hostname"
+        return None, "URL has no hostname"
 
     # Check blocked hostnames
     hostname_lower = hostname.lower()
     if hostname_lower in _BLOCKED_HOSTNAMES:
-        return False, f"Hostname {hostname!r} is blocked (internal/reserved)"
+        return None, f"Hostname {hostname!r} is blocked (internal/reserved)"
+    return hostname, ""
+
+
+def _ip_literal(hostname: str) -> Optional[List[str]]:
+    """``[hostname]`` when it is already an IP address, so no lookup is needed."""
+    try:
+        return [str(ipaddress.ip_address(hostname))]
+    except ValueError:
+        return None
+
+
+def _check_ip(ip) -> Tuple[bool, str]:
+    if not _is_allowed(ip):
+        network = blocked_network(ip)
+        if network:
+            return False, f"IP {ip} resolves to a blocked private/reserved network ({network})"
+    return True, "OK"
+
+
+def is_allow_listed(addresses: List[str]) -> bool:
+    """True if any address is in a blocked range and only reachable through SSRF_ALLOWED_NETWORKS."""
+    for ip_str in addresses:
+        try:
+            ip = ipaddress.ip_address(ip_str)
+        except ValueError:
+            continue
+        if _is_allowed(ip) and blocked_network(ip):
+            return True
+    return False
+
+
+def check_addresses(addresses: List[str]) -> Tuple[bool, str]:
+    """Check already-resolved addresses against the blocked networks."""
+    for ip_str in addresses:
+        try:
+            ip = ipaddress.ip_address(ip_str)
+        except ValueError:
+            continue
+        ok, reason = _check_ip(ip)
+        if not ok:
+            return ok, reason
+    return True, "OK"
+
+
+def validate_scan_target(url: str) -> Tuple[bool, str]:
+    """
+    Validate a scan target URL against SSRF protections.
+
+    Blocking; async code should use ``validate_scan_target_async``.
+
+    Returns:
+        (is_valid, reason) — True if safe to scan, False with explanation if blocked.
+    """
+    hostname, reason = _check_url(url)
+    if hostname is None:
+        return False, reason
 
     # Resolve hostname to IP and check against blocked networks
     try:
-        addr_infos = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
-        for _family, _type, _proto, _canonname, sockaddr in addr_infos:
-            ip_str = sockaddr[0]
-            try:
-                ip = ipaddress.ip_address(ip_str)
-                for network in _BLOCKED_NETWORKS:
-                    if ip in network:
-                        return False, f"IP {ip_str} resolves to a blocked private/reserved network ({network})"
-            except ValueError:
-                continue
+        addresses = _ip_literal(hostname) or dns_cache.resolve_sync(hostname)
     except socket.gaierror:
         # DNS resolution failed — allow the scan attempt; the scanner will handle the error
-        pass
+        return True, "OK"
+    except (UnicodeError, ValueError):
+        # Not encodable as a hostname at all (e.g. an IDNA label over 63 characters)
+        return False, INVALID_HOSTNAME
+    return check_addresses(addresses)
 
-    return True, "OK"
+
+async def resolve_scan_target(url: str) -> Tuple[bool, str, List[str]]:
+    """
+    ``validate_scan_target`` resolving through the shared async DNS cache.
+
+    Also returns the vetted addresses so the scan can connect to exactly
+    those (see ``http_client.pin_addresses``); the list is empty when the
+    target is blocked or did not resolve.
+    """
+    hostname, reason = _check_url(url)
+    if hostname is None:
+        return False, reason, []
+    try:
+        addresses = _ip_literal(hostname) or await dns_cache.resolve(hostname)
+    except socket.gaierror:
+        return True, "OK", []
+    except (UnicodeError, ValueError):
+        return False, INVALID_HOSTNAME, []
+    ok, reason = check_addresses(addresses)
+    return ok, reason, addresses if ok else []
+
+
+async def validate_scan_target_async(url: str) -> Tuple[bool, str]:
+    ok, reason, _ = await resolve_scan_target(url)
+    return ok, reason
+
+
+def _host_keys(urls: List[str]) -> List[str]:
+    keys: List[str] = []
+    for url in urls:
+        try:
+            parsed = urlparse(url)
+            host = f"[{parsed.hostname}]" if parsed.hostname and ":" in parsed.hostname else parsed.hostname
+            keys.append(f"{parsed.scheme}://{host}" if host else url)
+        except ValueError:
+            keys.append(url)
+    return keys
+
+
+def validate_many(urls: List[str], max_workers: int = 32) -> List[Tuple[bool, str]]:
+    """
+    Validate a batch of URLs; returns one ``(is_valid, reason)`` per URL.
+
+    Each distinct scheme and hostname is checked once. IP literals (e.g. a
+    CIDR sweep) are checked inline against the interval tables; DNS lookups
+    for hostnames run in parallel threads.
+    """
+    keys = _host_keys(urls)
+    verdicts: Dict[str, Tuple[bool, str]] = {}
+    names: List[str] = []
+    for key in dict.fromkeys(keys):
+        hostname, reason = _check_url(key)
+        if hostname is None:
+            verdicts[key] = (False, reason)
+            continue
+        try:
+            verdicts[key] = _check_ip(ipaddress.ip_address(hostname))
+        except ValueError:
+            names.append(key)
+    if names:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as pool:
+            verdicts.update(zip(names, pool.map(validate_scan_target, names)))
+    return [verdicts[key] for key in keys]
+
+
+async def resolve_many(urls: List[str]) -> List[Tuple[bool, str, List[str]]]:
+    """Async batch ``resolve_scan_target``: one concurrent, cached lookup per distinct host."""
+    keys = _host_keys(urls)
+    unique = list(dict.fromkeys(keys))
+    results = await asyncio.gather(*(resolve_scan_target(key) for key in unique))
+    verdicts: Dict[str, Tuple[bool, str, List[str]]] = dict(zip(unique, results))
+    return [verdicts[key] for key in keys]
+
+
+async def validate_many_async(urls: List[str]) -> List[Tuple[bool, str]]:
+    """Async ``validate_many``."""
+    return [(ok, reason) for ok, reason, _ in await resolve_many(urls)]
@@ -0,0 +1,141 @@
+"""
+Trivy Server — long-lived local ``trivy server`` shared by container scans.
+
+A standalone ``trivy image`` loads the whole vulnerability DB on every run.
+In server mode the DB is loaded once by a local server process and each scan
+runs a thin ``--server`` client against it. The server is started lazily,
+health-checked before use, and restarted if it dies; callers fall back to
+standalone Trivy whenever it is unavailable.
+"""
+import asyncio
+import atexit
+import subprocess
+import time
+from typing import Optional
+
+import httpx
+
+from app.services.process_runner import ConcurrencyLimiter
+
+
+class TrivyServer:
+    """Manages one local Trivy server process (per worker process)."""
+
+    # A healthy server is re-checked at most this often
+    HEALTH_INTERVAL = 30.0
+    # After a failed start, wait this long before trying again
+    RETRY_BACKOFF = 60.0
+    # SIGTERM grace period before the server is killed
+    STOP_TIMEOUT = 10.0
+
+    def __init__(self, trivy_path: str, addr: str, startup_timeout: float = 120.0):
+        self.trivy_path = trivy_path
+        self.addr = addr
+        self.url = f"http://{addr}"
+        self.startup_timeout = startup_timeout
+        self._proc: Optional[subprocess.Popen] = None
+        self._healthy_at = 0.0
+        self._failed_at = 0.0
+        self._start_lock = ConcurrencyLimiter(1)
+        atexit.register(self._terminate)
+
+    async def _ping(self) -> bool:
+        try:
+            async with httpx.AsyncClient(timeout=2.0) as client:
+                response = await client.get(f"{self.url}/healthz")
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def _start(self) -> None:
+        self._proc = subprocess.Popen(
+            [self.trivy_path, "server", "--listen", self.addr, "--quiet"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    async def _wait_until_healthy(self) -> bool:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if await self._ping():
+                return True
+            # Exited early: port taken by another worker's server, or bad binary
+            if self._proc is not None and self._proc.poll() is not None:
+                return await self._ping()
+            await asyncio.sleep(0.5)
+        return False
+
+    async def ensure_running(self) -> Optional[str]:
+        """
+        Return the server URL if a healthy server is available, starting one
+        if needed. Returns None when the caller should run Trivy standalone.
+        """
+        now = time.monotonic()
+        if self._healthy_at and now - self._healthy_at < self.HEALTH_INTERVAL:
+            if self._proc is None or self._proc.poll() is None:
+                return self.url
+        if self._failed_at and now - self._failed_at < self.RETRY_BACKOFF:
+            return None
+
+        async with self._start_lock:
+            # A server on the address (ours, or another worker's) is reused
+            if await self._ping():
+                self._healthy_at = time.monotonic()
+                return self.url
+
+            await self.stop()
+            try:
+                self._start()
+            except OSError as e:
+                print(f"Could not start Trivy server: {e} — using standalone Trivy.")
+                self._failed_at = time.monotonic()
+                return None
+
+            if await self._wait_until_healthy():
+                print(f"Trivy server listening on {self.url}")
+                self._healthy_at = time.monotonic()
+                return self.url
+
+            print(f"Trivy server did not become healthy within {self.startup_timeout}s — using standalone Trivy.")
+            await self.stop()
+            self._failed_at = time.monotonic()
+            return None
+
+    def mark_unhealthy(self) -> None:
+        """Force a health check before the server is used again."""
+        self._healthy_at = 0.0
+
+    def _detach(self) -> Optional[subprocess.Popen]:
+        proc, self._proc = self._proc, None
+        self._healthy_at = 0.0
+        if proc is None or proc.poll() is not None:
+            return None
+        proc.terminate()
+        return proc
+
+    async def stop(self) -> None:
+        """
+        Terminate the server process started by this worker, if any. The
+        wait runs in a thread so scans on this event loop keep going.
+        """
+        proc = self._detach()
+        if proc is None:
+            return
+        try:
+            await asyncio.to_thread(proc.wait, self.STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            await asyncio.to_thread(proc.wait)
+
+    def _terminate(self) -> None:
+        """Interpreter exit: no event loop is left, so wait synchronously."""
+        proc = self._detach()
+        if proc is None:
+            return
+        try:
+            proc.wait(timeout=self.STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
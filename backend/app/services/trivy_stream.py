@@ -0,0 +1,208 @@
+"""
+Trivy Stream — incremental parser for Trivy JSON reports.
+
+Walks ``Results[].Vulnerabilities[]`` and ``Results[].Packages[]`` as bytes
+arrive and emits one item at a time, so memory is bounded by the largest
+single vulnerability/package object rather than the size of the report.
+Everything outside those two arrays is decoded and discarded.
+"""
+import codecs
+import json
+import re
+from typing import List, Tuple, Any
+
+# (kind, target, result_type, item) where kind is "vulnerability" or "package"
+TrivyEvent = Tuple[str, str, str, dict]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_LIST_KINDS = {"Vulnerabilities": "vulnerability", "Packages": "package"}
+_COMPACT_THRESHOLD = 64 * 1024
+
+# Parser states
+_ROOT, _ROOT_KEY, _RESULTS, _RESULT_ITEM, _RESULT_KEY, _FIELD, _LIST, _LIST_ITEM, _SKIP, _DONE = range(10)
+
+
+class _NeedMore(Exception):
+    """Raised internally when the buffer ends mid-token."""
+
+
+class TrivyReportStream:
+    """Push parser: ``feed()`` bytes, get back the items completed so far."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._retry_at = 0
+        self._state = _ROOT
+        self._after_skip = _ROOT_KEY
+        self._list_kind = ""
+        self._field = ""
+        self._target = ""
+        self._type = ""
+
+    def feed(self, data: bytes) -> List[TrivyEvent]:
+        if self._state == _DONE:
+            return []
+        self._buf += self._decoder.decode(data)
+        if len(self._buf) < self._retry_at:
+            return []
+        return self._parse()
+
+    def close(self) -> List[TrivyEvent]:
+        """Signal end of input; raises ValueError if the report was truncated."""
+        self._buf += self._decoder.decode(b"", final=True)
+        self._eof = True
+        events = self._parse()
+        if self._state not in (_DONE, _ROOT) or (self._state == _ROOT and self._buf.strip()):
+            raise ValueError("Truncated Trivy JSON report")
+        return events
+
+    # ── Tokenizer helpers ──────────────────────────────────────────────────
+
+    def _peek(self) -> str:
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        if self._pos >= len(self._buf):
+            raise _NeedMore()
+        return self._buf[self._pos]
+
+    def _value(self) -> Any:
+        self._peek()
+        try:
+            value, end = self._json.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            raise _NeedMore()
+        if end == len(self._buf) and not self._eof and isinstance(value, (int, float)):
+            raise _NeedMore()  # number may continue in the next chunk
+        self._pos = end
+        return value
+
+    def _key(self) -> str:
+        """Read ``"key" :`` atomically, leaving the position on the value."""
+        start = self._pos
+        try:
+            key = self._value()
+            if self._peek() != ":":
+                raise json.JSONDecodeError("Expected ':'", self._buf, self._pos)
+        except _NeedMore:
+            self._pos = start
+            raise
+        self._pos += 1
+        return key
+
+    # ── State machine ──────────────────────────────────────────────────────
+
+    def _parse(self) -> List[TrivyEvent]:
+        events: List[TrivyEvent] = []
+        try:
+            while self._state != _DONE:
+                self._step(events)
+        except _NeedMore:
+            # Wait until the pending data at least doubles before retrying,
+            # so large values are not re-decoded on every small chunk.
+            pending = len(self._buf) - self._pos
+            self._retry_at = len(self._buf) + max(pending, 1024)
+        else:
+            self._retry_at = 0
+
+        if self._pos > _COMPACT_THRESHOLD:
+            self._buf = self._buf[self._pos:]
+            self._retry_at = max(0, self._retry_at - self._pos)
+            self._pos = 0
+        return events
+
+    def _step(self, events: List[TrivyEvent]) -> None:
+        state = self._state
+
+        if state == _ROOT:
+            if self._peek() != "{":
+                raise json.JSONDecodeError("Expected report object", self._buf, self._pos)
+            self._pos += 1
+            self._state = _ROOT_KEY
+
+        elif state in (_ROOT_KEY, _RESULT_KEY):
+            char = self._peek()
+            if char == ",":
+                self._pos += 1
+                return
+            if char == "}":
+                self._pos += 1
+                self._state = _DONE if state == _ROOT_KEY else _RESULT_ITEM
+                return
+            key = self._key()
+            if state == _ROOT_KEY:
+                if key == "Results":
+                    self._state = _RESULTS
+                else:
+                    self._skip(_ROOT_KEY)
+            elif key in _LIST_KINDS:
+                self._list_kind = _LIST_KINDS[key]
+                self._state = _LIST
+            elif key in ("Target", "Type"):
+                self._field = key
+                self._state = _FIELD
+            else:
+                self._skip(_RESULT_KEY)
+
+        elif state == _FIELD:
+            value = str(self._value())
+            if self._field == "Target":
+                self._target = value
+            else:
+                self._type = value
+            self._state = _RESULT_KEY
+
+        elif state in (_RESULTS, _LIST):
+            if self._peek() == "[":
+                self._pos += 1
+                self._state = _RESULT_ITEM if state == _RESULTS else _LIST_ITEM
+            else:  # null or unexpected scalar
+                self._skip(_ROOT_KEY if state == _RESULTS else _RESULT_KEY)
+
+        elif state == _RESULT_ITEM:
+            char = self._peek()
+            if char == ",":
+                self._pos += 1
+            elif char == "]":
+                self._pos += 1
+                self._state = _ROOT_KEY
+            elif char == "{":
+                self._pos += 1
+                self._target, self._type = "", ""
+                self._state = _RESULT_KEY
+            else:
+                self._skip(_RESULT_ITEM)
+
+        elif state == _LIST_ITEM:
+            char = self._peek()
+            if char == ",":
+                self._pos += 1
+            elif char == "]":
+                self._pos += 1
+                self._state = _RESULT_KEY
+            else:
+                item = self._value()
+                if isinstance(item, dict):
+                    events.append((self._list_kind, self._target, self._type, item))
+
+        elif state == _SKIP:
+            self._value()
+            self._state = self._after_skip
+
+    def _skip(self, next_state: int) -> None:
+        self._state = _SKIP
+        self._after_skip = next_state
+
+
+def parse_trivy_report(data: bytes, chunk_size: int = 64 * 1024) -> List[TrivyEvent]:
+    """Parse a complete report through the streaming parser (used for small inputs)."""
+    stream = TrivyReportStream()
+    events: List[TrivyEvent] = []
+    for offset in range(0, len(data), chunk_size):
+        events.extend(stream.feed(data[offset:offset + chunk_size]))
+    events.extend(stream.close())
+    return events
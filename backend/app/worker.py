@@ -0,0 +1,167 @@
+"""
+Scan worker — claims jobs from the database queue and runs them.
+
+Run ``python -m app.worker`` on as many hosts as needed to scale scanning
+independently of the API; each process runs up to SCAN_WORKER_CONCURRENCY
+jobs at once. With SCAN_WORKER_EMBEDDED (the default) the API process runs
+a worker too, so a single-process deployment needs nothing extra.
+"""
+import asyncio
+import os
+import signal
+import socket
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from uuid import uuid4
+
+from app.core.config import get_settings
+from app.models.models import ScanJob
+from app.services import job_queue
+from app.services.bulk_scan import remove_spool_file, run_bulk_header_scan
+from app.services.scanner import run_scan_task_in_background
+
+settings = get_settings()
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+    "scan": lambda payload: run_scan_task_in_background(**payload),
+    "bulk-headers": lambda payload: run_bulk_header_scan(payload["scan_uuid"], payload["urls_path"]),
+}
+
+# Run once a job has completed or failed for good, never between retries
+JOB_CLEANUP: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "bulk-headers": lambda payload: remove_spool_file(payload["urls_path"]),
+}
+
+# Kinds that checkpoint their own progress and resume; others restart from a clean scan
+RESUMABLE_KINDS = {"scan"}
+
+
+class ScanWorker:
+    def __init__(self, concurrency: Optional[int] = None, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency or settings.SCAN_WORKER_CONCURRENCY)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._running: Dict[int, asyncio.Task] = {}
+        self._lost: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Claim and run jobs until ``stop``; running jobs are released on the way out."""
+        job_queue.register_local_worker(self)
+        try:
+            while not self._stopping:
+                self._wakeup.clear()
+                while len(self._running) < self.concurrency and not self._stopping:
+                    try:
+                        job = await job_queue.claim(self.worker_id)
+                    except Exception as e:
+                        print(f"Scan worker {self.worker_id}: claim failed: {e}")
+                        break
+                    if job is None:
+                        break
+                    self._running[job.id] = asyncio.create_task(self._execute(job))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.SCAN_WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            tasks = list(self._running.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _heartbeat(self, job: ScanJob, task: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(settings.SCAN_JOB_LEASE_SECONDS / 3)
+            try:
+                if await job_queue.heartbeat(job.id, self.worker_id):
+                    continue
+            except Exception as e:
+                # A missed heartbeat is not fatal while the lease is still valid
+                print(f"Scan worker {self.worker_id}: heartbeat for job {job.id} failed: {e}")
+                continue
+            print(f"Scan worker {self.worker_id}: lost the lease on job {job.id}, abandoning it")
+            self._lost.add(job.id)
+            task.cancel()
+            return
+
+    def _cleanup(self, job: ScanJob) -> None:
+        cleanup = JOB_CLEANUP.get(job.kind)
+        if cleanup is None:
+            return
+        try:
+            cleanup(job.payload or {})
+        except Exception as e:
+            print(f"Scan worker {self.worker_id}: cleanup for job {job.id} failed: {e}")
+
+    async def _execute(self, job: ScanJob) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job, asyncio.current_task()))
+        try:
+            if job.attempts > job.max_attempts:
+                # Only an expired lease claims a job past its limit: its workers keep dying
+                if await job_queue.fail(job.id, self.worker_id, "Lease expired on every attempt", retry=False) is False:
+                    self._cleanup(job)
+                return
+            handler = JOB_HANDLERS.get(job.kind)
+            if handler is None:
+                await job_queue.fail(job.id, self.worker_id, f"Unknown job kind: {job.kind}", retry=False)
+                return
+            print(f"Scan worker {self.worker_id}: running {job.kind} job {job.id} (attempt {job.attempts})")
+            if job.kind not in RESUMABLE_KINDS:
+                await job_queue.reset_scan(job.scan_id)
+            try:
+                await handler(job.payload or {})
+            except Exception as e:
+                print(f"Scan worker {self.worker_id}: job {job.id} failed: {e}")
+                requeued = await job_queue.fail(job.id, self.worker_id, str(e))
+                if requeued is None:
+                    print(f"Scan worker {self.worker_id}: job {job.id} lease was lost, leaving it to its new owner")
+                    return
+                print(f"Scan worker {self.worker_id}: job {job.id} {'requeued' if requeued else 'failed permanently'}")
+                if not requeued:
+                    self._cleanup(job)
+                return
+            if await job_queue.complete(job.id, self.worker_id):
+                self._cleanup(job)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back. A lost lease already belongs to someone else.
+            if job.id not in self._lost:
+                await job_queue.release(job.id, self.worker_id)
+                raise
+        except Exception as e:
+            print(f"Scan worker {self.worker_id}: bookkeeping for job {job.id} failed: {e}")
+        finally:
+            heartbeat.cancel()
+            self._lost.discard(job.id)
+            self._running.pop(job.id, None)
+            self.wake()
+
+
+async def main() -> None:
+    from app.db.init_db import init_db
+    from app.services import container_scanner
+    from app.services.http_client import http_client
+
+    await init_db()
+    await http_client.start()
+    worker = ScanWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    print(f"Scan worker {worker.worker_id} started with {worker.concurrency} slots")
+    try:
+        await worker.run()
+    finally:
+        await container_scanner.shutdown()
+        await http_client.aclose()
+    print(f"Scan worker {worker.worker_id} stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
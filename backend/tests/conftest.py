@@ -0,0 +1,12 @@
+import asyncio
+
+import pytest
+
+from app.db.init_db import init_db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    # TestClient is not used as a context manager, so the app's startup hook
+    # (which creates missing tables) never runs; do it once here instead.
+    asyncio.run(init_db())
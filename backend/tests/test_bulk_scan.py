@@ -0,0 +1,67 @@
+from app.services.bulk_scan import iter_url_file
+from app.services.ssrf_protection import validate_many
+
+
+def test_url_file_is_deduplicated_and_capped(tmp_path):
+    urls = tmp_path / "urls.txt"
+    urls.write_text("# sweep\nexample.com\nhttps://example.com\n\nhttp://example.org/a\nexample.net\n")
+
+    assert list(iter_url_file(str(urls), max_urls=10)) == [
+        "https://example.com", "http://example.org/a", "https://example.net",
+    ]
+    assert list(iter_url_file(str(urls), max_urls=2)) == ["https://example.com", "http://example.org/a"]
+
+
+def test_validate_many_checks_each_url():
+    verdicts = validate_many([
+        "http://93.184.216.34/a", "http://127.0.0.1:8080/", "http://93.184.216.34/b",
+        "ftp://93.184.216.34/", "http://[::1]/",
+    ])
+    assert [ok for ok, _ in verdicts] == [True, False, True, False, False]
+
+
+def test_special_purpose_ranges_are_blocked():
+    blocked = [
+        "100.64.1.1", "198.19.255.254", "224.0.0.251", "239.255.255.250", "255.255.255.255",
+        "192.0.0.170", "203.0.113.9", "[::ffff:127.0.0.1]", "[::ffff:169.254.169.254]",
+        "[64:ff9b::a00:1]", "[2002:c0a8:101::1]", "[ff02::1]", "[2001:db8::1]", "[fd00::1]",
+    ]
+    allowed = ["93.184.216.34", "100.128.0.1", "[2606:4700:4700::1111]", "[::ffff:93.184.216.34]"]
+    verdicts = validate_many([f"http://{host}/" for host in blocked + allowed])
+    assert [ok for ok, _ in verdicts] == [False] * len(blocked) + [True] * len(allowed)
+
+
+def test_blocked_addresses_report_their_own_range():
+    import ipaddress
+
+    from app.services.ssrf_protection import _compile_intervals, blocked_network
+
+    expected = {
+        "224.0.0.251": "224.0.0.0/4",
+        # Adjacent to multicast, but its own range
+        "255.255.255.255": "240.0.0.0/4",
+        "169.254.169.254": "169.254.0.0/16",
+        # Nested in ::/96, reported as the more specific loopback range
+        "::1": "::1/128",
+        "::2": "::/96",
+        "::ffff:127.0.0.1": "127.0.0.0/8",
+    }
+    assert {ip: blocked_network(ipaddress.ip_address(ip)) for ip in expected} == expected
+
+    starts, ends, labels = _compile_intervals([
+        ipaddress.ip_network(n) for n in ("10.0.1.0/24", "10.0.0.64/26", "10.0.0.0/24")
+    ])[4]
+    assert labels == ["10.0.0.0/24", "10.0.0.64/26", "10.0.0.0/24", "10.0.1.0/24"]
+    assert [str(ipaddress.ip_address(e)) for e in ends] == ["10.0.0.63", "10.0.0.127", "10.0.0.255", "10.0.1.255"]
+
+
+def test_unencodable_hostname_is_rejected_without_failing_the_batch():
+    import asyncio
+
+    from app.services.ssrf_protection import resolve_many
+
+    too_long = "http://" + "a" * 64 + ".example.com/"
+    assert validate_many([too_long, "http://93.184.216.34/"]) == [(False, "Invalid hostname"), (True, "OK")]
+    assert asyncio.run(resolve_many([too_long, "http://93.184.216.34/"])) == [
+        (False, "Invalid hostname", []), (True, "OK", ["93.184.216.34"]),
+    ]
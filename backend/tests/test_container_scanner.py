@@ -0,0 +1,75 @@
+import asyncio
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import container_scanner
+from app.services.container_scanner import ContainerScanner, is_valid_image_reference
+
+_FAKE_TRIVY = """#!{python}
+import json, sys
+with open({log!r}, "a") as log:
+    log.write(json.dumps(sys.argv[1:]) + "\\n")
+print(json.dumps({{"Results": [{{"Target": "t", "Type": "alpine",
+    "Packages": [{{"Name": "musl", "Version": "1.2.4"}}],
+    "Vulnerabilities": [{{"VulnerabilityID": "CVE-2024-0001", "PkgName": "musl", "Severity": "HIGH"}}]}}]}}))
+"""
+
+
+@pytest.fixture
+def fake_trivy(tmp_path, monkeypatch):
+    log = tmp_path / "argv.log"
+    script = tmp_path / "trivy"
+    script.write_text(_FAKE_TRIVY.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    monkeypatch.setattr(container_scanner.settings, "CONTAINER_CACHE_ENABLED", False)
+    monkeypatch.setattr(container_scanner, "_trivy_server", None)
+    return str(script), log
+
+
+@pytest.mark.parametrize("image,valid", [
+    ("alpine", True),
+    ("library/python:3.12-slim", True),
+    ("registry.example.com:5000/team/app:v1.2@sha256:" + "a" * 64, True),
+    ("--output=/etc/cron.d/x", False),
+    ("-v", False),
+    ("alpine:3 --server http://evil", False),
+    ("library/Alpine", False),
+    ("alpine:" + "a" * 129, False),
+])
+def test_image_reference_grammar(image, valid):
+    assert is_valid_image_reference(image) is valid
+
+
+def test_image_is_passed_after_option_terminator(fake_trivy):
+    path, log = fake_trivy
+
+    async def main():
+        return await ContainerScanner(trivy_path=path).scan_image("alpine:3.19")
+
+    findings = asyncio.run(main())
+    assert [f["metadata"]["vuln_id"] for f in findings] == ["CVE-2024-0001"]
+    argv = json.loads(log.read_text())
+    assert argv[-2:] == ["--", "alpine:3.19"]
+    assert argv.index("--quiet") < argv.index("--")
+
+
+def test_invalid_image_never_reaches_trivy(fake_trivy):
+    path, log = fake_trivy
+
+    async def main():
+        return await ContainerScanner(trivy_path=path).scan_image("--config=/tmp/evil.yaml")
+
+    assert asyncio.run(main()) == []
+    assert not log.exists()
+
+
+def test_scan_api_rejects_option_like_image():
+    response = TestClient(app).post(
+        "/api/v1/scans",
+        json={"target_url": "", "scan_type": "static", "source_code": "x = 1", "container_image": "-q"},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,69 @@
+import asyncio
+from collections import Counter
+
+from app.services.crawler import Crawler, normalize_url
+from app.services.http_client import http_client
+
+_SITE = {
+    "/robots.txt": ("text/plain", "User-agent: *\nDisallow: /private\n"),
+    "/": ("text/html", '<a href="/a">a</a><a href="/a#top">a</a><a href="/b">b</a><a href="/private/x">p</a>'
+                       '<a href="http://other.example/">off-site</a><a href="/logo.png">logo</a>'),
+    "/a": ("text/html", '<a href="/c">c</a><a href="/b">b</a><a href="/">home</a>'),
+    "/b": ("text/html", '<a href="/wp-admin">admin</a><a href="/a">a</a>'),
+    "/c": ("text/html", '<a href="/d">d</a><a href="/wp-admin">admin</a>'),
+    "/d": ("text/html", "too deep"),
+}
+
+
+def _crawl(**limits):
+    requested = []
+
+    async def main():
+        async def handle(reader, writer):
+            request = await reader.readuntil(b"\r\n\r\n")
+            path = request.split(b" ")[1].decode()
+            requested.append(path)
+            if path in _SITE:
+                content_type, body = _SITE[path]
+                head = f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+            else:
+                head, body = "HTTP/1.1 404 Not Found\r\n", ""
+            writer.write(f"{head}Content-Length: {len(body)}\r\nConnection: close\r\n\r\n{body}".encode())
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        async with server:
+            crawler = Crawler(f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}", **limits)
+            findings = await crawler.run()
+        await http_client.aclose()
+        return crawler, findings
+
+    crawler, findings = asyncio.run(main())
+    return crawler, findings, Counter(requested)
+
+
+def test_urls_are_normalized_for_the_seen_set():
+    base = "https://Example.com:443/docs/index.html"
+    assert normalize_url("guide#intro", base) == "https://example.com/docs/guide"
+    assert normalize_url("/a?b=1", base) == "https://example.com/a?b=1"
+    assert normalize_url("HTTP://EXAMPLE.com:8080") == "http://example.com:8080/"
+    assert normalize_url("mailto:security@example.com", base) is None
+    assert normalize_url("javascript:void(0)", base) is None
+
+
+def test_crawl_respects_robots_depth_and_origin_and_fetches_each_page_once():
+    crawler, findings, requested = _crawl(max_depth=2, max_pages=50)
+    pages = {path: n for path, n in requested.items() if path not in ("/robots.txt", "/sitemap.xml")}
+    # /wp-admin is linked from /b and /c but queued once; /d is below max_depth
+    assert pages == {"/": 1, "/a": 1, "/b": 1, "/c": 1, "/wp-admin": 1}
+    assert crawler.stats["pages_fetched"] == 5
+    assert crawler.stats["robots_disallowed"] == 1
+    # The same admin link on two pages is reported once
+    assert [f["title"] for f in findings] == ["Exposed Administrative Portal Route"]
+
+
+def test_crawl_stops_at_the_page_limit():
+    crawler, _, requested = _crawl(max_depth=5, max_pages=2)
+    assert crawler.stats["pages_fetched"] == 2
+    assert sum(n for path, n in requested.items() if path not in ("/robots.txt", "/sitemap.xml")) == 2
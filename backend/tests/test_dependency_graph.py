@@ -0,0 +1,124 @@
+from app.services.dependency_graph import DependencyGraph, parse_package_lock
+
+
+LOCKFILE = {
+    "name": "monorepo",
+    "lockfileVersion": 3,
+    "packages": {
+        "": {"name": "monorepo", "version": "1.0.0", "workspaces": ["packages/*"]},
+        "packages/web": {"name": "web", "version": "0.1.0", "dependencies": {"express": "^4.0.0"}},
+        "packages/api": {"name": "api", "version": "0.1.0", "dependencies": {"lodash": "^4.0.0", "web": "*"}},
+        "packages/cli": {"name": "cli", "version": "0.1.0", "dependencies": {"chalk": "^5.0.0", "qs": "~6.5.0"}},
+        "node_modules/web": {"resolved": "packages/web", "link": True},
+        "node_modules/api": {"resolved": "packages/api", "link": True},
+        "node_modules/cli": {"resolved": "packages/cli", "link": True},
+        "node_modules/express": {"version": "4.18.2", "dependencies": {"qs": "6.11.0", "body-parser": "1.20.1"}},
+        "node_modules/body-parser": {"version": "1.20.1", "dependencies": {"qs": "6.11.0"}},
+        "node_modules/qs": {"version": "6.11.0"},
+        "node_modules/lodash": {"version": "4.17.20"},
+        "node_modules/chalk": {"version": "5.3.0"},
+        "packages/cli/node_modules/qs": {"version": "6.5.0"},
+    },
+}
+
+
+def test_workspaces_are_roots():
+    graph = parse_package_lock(LOCKFILE)
+    root_names = sorted(graph.names[r] for r in graph.roots)
+    assert root_names == ["api", "cli", "monorepo", "web"]
+
+
+def test_shortest_introducing_path_per_workspace():
+    graph = parse_package_lock(LOCKFILE)
+    paths = graph.introducing_paths("qs")
+
+    assert paths["web@0.1.0"] == ["web@0.1.0", "express@4.18.2", "qs@6.11.0"]
+    # api reaches qs through its workspace link to web
+    assert paths["api@0.1.0"] == ["api@0.1.0", "web@0.1.0", "express@4.18.2", "qs@6.11.0"]
+    # cli pins its own nested copy
+    assert paths["cli@0.1.0"] == ["cli@0.1.0", "qs@6.5.0"]
+    # chalk is only pulled in by cli
+    assert list(graph.introducing_paths("chalk")) == ["cli@0.1.0"]
+
+
+def test_nested_install_resolves_before_hoisted_copy():
+    graph = parse_package_lock(LOCKFILE)
+    cli = graph.node_id("packages/cli")
+    nested = graph.node_id("packages/cli/node_modules/qs")
+    hoisted = graph.node_id("node_modules/qs")
+    assert graph.reaches(cli, nested)
+    assert not graph.reaches(cli, hoisted)
+
+
+def test_paths_for_every_root_come_from_one_shared_walk():
+    graph = DependencyGraph()
+    chain = [graph.add_node(f"node_modules/dep{i}", f"dep{i}", "1.0.0") for i in range(200)]
+    for src, dst in zip(chain, chain[1:]):
+        graph.add_edge(src, dst)
+    for i in range(500):
+        root = graph.add_node(f"packages/w{i}", f"w{i}", "0.1.0")
+        graph.add_root(root)
+        graph.add_edge(root, chain[i % 200])
+
+    walks = []
+    nearest = graph._nearest
+    graph._nearest = lambda targets: walks.append(targets) or nearest(targets)
+    paths = graph.introducing_paths("dep199")
+
+    assert len(walks) == 1 and len(paths) == 500
+    assert paths["w199@0.1.0"] == ["w199@0.1.0", "dep199@1.0.0"]
+    assert len(paths["w0@0.1.0"]) == 201
+
+
+def test_repeated_queries_reuse_the_walk_until_the_graph_changes(monkeypatch):
+    graph = parse_package_lock(LOCKFILE)
+    walks = []
+    nearest = graph._nearest
+    monkeypatch.setattr(graph, "_nearest", lambda targets: walks.append(targets) or nearest(targets))
+
+    first = graph.introducing_paths("qs")
+    assert graph.introducing_paths("qs") == first
+    assert len(walks) == 1
+
+    graph.introducing_paths("chalk")
+    assert len(walks) == 2
+    # New edges invalidate every memoized walk
+    graph.add_edge(graph.node_id("packages/web"), graph.node_id("node_modules/chalk"))
+    assert "web@0.1.0" in graph.introducing_paths("chalk")
+    assert len(walks) == 3
+
+
+def test_memoized_walks_are_bounded(monkeypatch):
+    from app.services import dependency_graph
+
+    monkeypatch.setattr(dependency_graph, "_NEXT_HOP_CACHE_SIZE", 2)
+    graph = parse_package_lock(LOCKFILE)
+    for name in ("qs", "chalk", "lodash", "qs"):
+        graph.introducing_paths(name)
+    assert list(graph._next_hop) == ["lodash", "qs"]
+
+
+def test_lockfile_v1_nested_dependencies_are_resolved():
+    graph = parse_package_lock({
+        "name": "legacy",
+        "version": "1.0.0",
+        "lockfileVersion": 1,
+        "dependencies": {
+            "express": {"version": "4.16.0", "requires": {"qs": "6.5.1"}},
+            "qs": {"version": "6.5.1"},
+            "request": {
+                "version": "2.88.0",
+                "requires": {"qs": "~6.5.2"},
+                "dependencies": {"qs": {"version": "6.5.2"}},
+            },
+        },
+    })
+    assert [graph.names[r] for r in graph.roots] == ["legacy"]
+    assert sorted(graph.label(n) for n in range(len(graph)) if n not in graph.roots) == [
+        "express@4.16.0", "qs@6.5.1", "qs@6.5.2", "request@2.88.0",
+    ]
+    # qs is required by another package, so it is not treated as a direct dependency
+    assert graph.introducing_paths("qs") == {"legacy@1.0.0": ["legacy@1.0.0", "express@4.16.0", "qs@6.5.1"]}
+    request = graph.node_id("node_modules/request")
+    assert graph.reaches(request, graph.node_id("node_modules/request/node_modules/qs"))
+    assert not graph.reaches(request, graph.node_id("node_modules/qs"))
@@ -0,0 +1,42 @@
+import asyncio
+import socket
+
+from app.services.dns_cache import DnsCache
+from app.services.ssrf_protection import validate_scan_target_async
+
+
+def test_concurrent_lookups_share_one_query_and_failures_are_cached(monkeypatch):
+    calls = []
+
+    def fake_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        calls.append(host)
+        if host == "missing.example":
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("93.184.216.34", 0))] * 2
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    cache = DnsCache(ttl=60, negative_ttl=10)
+
+    async def resolve_all():
+        answers = await asyncio.gather(*(cache.resolve("Example.com.") for _ in range(20)))
+        failures = []
+        for _ in range(3):
+            try:
+                await cache.resolve("missing.example")
+            except socket.gaierror as e:
+                failures.append(e)
+        return answers, failures
+
+    answers, failures = asyncio.run(resolve_all())
+
+    assert answers == [["93.184.216.34"]] * 20
+    assert calls == ["example.com", "missing.example"]
+    assert len(failures) == 3
+    assert cache.resolve_sync("example.com") == ["93.184.216.34"]
+    assert calls == ["example.com", "missing.example"]
+
+
+def test_async_validation_blocks_private_addresses():
+    assert asyncio.run(validate_scan_target_async("http://10.1.2.3/admin"))[0] is False
+    assert asyncio.run(validate_scan_target_async("gopher://93.184.216.34/"))[0] is False
+    assert asyncio.run(validate_scan_target_async("http://93.184.216.34/")) == (True, "OK")
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.http_client import http_client, pin_addresses
+
+
+def test_pinned_host_connects_to_vetted_address_without_dns(monkeypatch):
+    monkeypatch.setattr(get_settings(), "SSRF_ALLOWED_NETWORKS", ["127.0.0.0/8"])
+
+    async def fetch():
+        async def handle(reader, writer):
+            request = await reader.readuntil(b"\r\n\r\n")
+            host = [line for line in request.split(b"\r\n") if line.lower().startswith(b"host:")][0]
+            body = host.split(b":", 1)[1].strip()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            with pin_addresses({"scan-target.invalid": ["127.0.0.1"]}):
+                response = await http_client.get(f"http://scan-target.invalid:{port}/")
+                with pytest.raises(Exception, match="SSRF"):
+                    # Not pinned and resolves to a blocked address
+                    monkeypatch.setattr(get_settings(), "SSRF_ALLOWED_NETWORKS", [])
+                    await http_client.get(f"http://127.0.0.2:{port}/")
+        await http_client.aclose()
+        return port, response
+
+    port, response = asyncio.run(fetch())
+    assert response.status_code == 200
+    assert response.text == f"scan-target.invalid:{port}"
+
+
+def test_pool_stats_endpoint_is_admin_only():
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_current_user
+    from app.main import app
+    from app.models.models import User, UserRole
+
+    user = User(id=2, email="u@example.com", hashed_password="x", full_name="U", role=UserRole.USER, organization_id=1)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        assert client.get("/api/v1/health/http-pool").status_code == 403
+        user.role = UserRole.ADMIN
+        response = client.get("/api/v1/health/http-pool")
+        assert response.status_code == 200 and "by_origin" in response.json()
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _self_signed(tmp_path):
+    import datetime
+
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number()).not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1)).sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = tmp_path / "cert.pem", tmp_path / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption(),
+    ))
+    return str(cert_path), str(key_path)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_legacy_tls_probe_detects_servers_accepting_tls_1_0(tmp_path):
+    import ssl
+
+    from app.services.http_client import _legacy_tls_context
+
+    if _legacy_tls_context() is None:
+        pytest.skip("this OpenSSL build cannot offer TLS 1.0")
+    cert, key = _self_signed(tmp_path)
+
+    def server_context(minimum, maximum):
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        context.minimum_version, context.maximum_version = minimum, maximum
+        context.set_ciphers("ALL:@SECLEVEL=0")
+        return context
+
+    async def probe(context):
+        async def handle(reader, writer):
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, ssl=context)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            result = await http_client.probe_legacy_tls(f"https://127.0.0.1:{port}/")
+        await http_client.aclose()
+        return result
+
+    legacy = asyncio.run(probe(server_context(ssl.TLSVersion.TLSv1, ssl.TLSVersion.TLSv1)))
+    assert legacy["version"] == "TLSv1"
+    modern = asyncio.run(probe(server_context(ssl.TLSVersion.TLSv1_2, ssl.TLSVersion.MAXIMUM_SUPPORTED)))
+    assert modern is None
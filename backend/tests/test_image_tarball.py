@@ -0,0 +1,136 @@
+import hashlib
+import io
+import json
+import tarfile
+
+from app.services.advisory_index import compare_versions
+from app.services.image_tarball import analyze_image_tarball
+
+
+DPKG_STATUS = """Package: openssl
+Status: install ok installed
+Version: 3.0.11-1~deb12u2
+
+Package: curl
+Status: deinstall ok config-files
+Version: 7.88.1-10
+"""
+
+
+def _layer(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for name, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def _docker_save(path, layers, diff_ids=None):
+    digests = ["sha256:" + hashlib.sha256(layer).hexdigest() for layer in layers]
+    config = json.dumps({"rootfs": {"type": "layers", "diff_ids": diff_ids or digests}}).encode()
+    members = {"config.json": config}
+    members.update({f"{i}/layer.tar": layer for i, layer in enumerate(layers)})
+    members["manifest.json"] = json.dumps(
+        [{"Config": "config.json", "Layers": [f"{i}/layer.tar" for i in range(len(layers))]}]
+    ).encode()
+    with tarfile.open(path, mode="w") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return digests
+
+
+def test_packages_are_merged_across_layers_with_whiteouts(tmp_path):
+    base = _layer({
+        "etc/os-release": 'ID=debian\nVERSION_ID="12"\n',
+        "var/lib/dpkg/status": DPKG_STATUS,
+        "app/node_modules/lodash/package.json": '{"name": "lodash", "version": "4.17.20"}',
+    })
+    top = _layer({
+        "app/node_modules/.wh.lodash": "",
+        "usr/lib/python3/dist-packages/requests-2.31.0.dist-info/METADATA": "Name: requests\nVersion: 2.31.0\n",
+    })
+    path = tmp_path / "image.tar"
+    _docker_save(path, [base, top])
+
+    image = analyze_image_tarball(str(path))
+
+    packages = sorted((p["ecosystem"], p["name"], p["version"]) for p in image["packages"])
+    assert packages == [("debian", "openssl", "3.0.11-1~deb12u2"), ("pypi", "requests", "2.31.0")]
+    assert image["layers"] == 2
+
+
+def test_layer_results_are_reused_by_digest(tmp_path):
+    base = _layer({"lib/apk/db/installed": "P:musl\nV:1.2.4-r2\n\nP:zlib\nV:1.3-r0\n"})
+    path = tmp_path / "image.tar"
+    digests = _docker_save(path, [base])
+    cache = {}
+
+    first = analyze_image_tarball(str(path), cache.get, cache.__setitem__)
+    second = analyze_image_tarball(str(path), cache.get, cache.__setitem__)
+
+    assert list(cache) == digests
+    assert (first["cached_layers"], second["cached_layers"]) == (0, 1)
+    assert second["packages"] == first["packages"]
+    assert {p["ecosystem"] for p in first["packages"]} == {"alpine"}
+
+
+def test_layer_cache_is_keyed_on_the_computed_digest(tmp_path):
+    base = _layer({"lib/apk/db/installed": "P:musl\nV:1.2.4-r2\n"})
+    genuine = tmp_path / "genuine.tar"
+    digests = _docker_save(genuine, [base])
+    # Claims the popular base layer's digest but ships different content
+    forged_layer = _layer({"lib/apk/db/installed": "P:musl\nV:9.9.9-r0\n"})
+    forged = tmp_path / "forged.tar"
+    _docker_save(forged, [forged_layer], diff_ids=digests)
+    cache = {}
+
+    planted = analyze_image_tarball(str(forged), cache.get, cache.__setitem__)
+    image = analyze_image_tarball(str(genuine), cache.get, cache.__setitem__)
+
+    assert [p["version"] for p in planted["packages"]] == ["9.9.9-r0"]
+    assert [p["version"] for p in image["packages"]] == ["1.2.4-r2"]
+    assert image["cached_layers"] == 0
+    assert sorted(cache) == sorted(["sha256:" + hashlib.sha256(forged_layer).hexdigest()] + digests)
+
+
+def test_version_ordering():
+    assert compare_versions("debian", "3.0.11-1~deb12u2", "3.0.11-1") < 0
+    assert compare_versions("debian", "1:1.0", "2.0") > 0
+    assert compare_versions("npm", "1.0.0-beta", "1.0.0") < 0
+    assert compare_versions("alpine", "1.2.4-r2", "1.2.4") > 0
+    assert compare_versions("pypi", "2.31.0", "2.9") > 0
+
+
+def test_corrupt_tarballs_are_skipped(tmp_path, monkeypatch):
+    import asyncio
+    import gzip
+
+    from app.services import container_scanner
+    from app.services.container_scanner import ContainerScanner
+    from app.services.result_cache import PersistentCache
+
+    monkeypatch.setattr(container_scanner, "_layer_cache", PersistentCache(str(tmp_path / "layers.db"), 1 << 20))
+    valid = tmp_path / "image.tar"
+    _docker_save(valid, [_layer({"etc/os-release": "ID=alpine\n"})])
+    data = valid.read_bytes()
+
+    garbage = tmp_path / "garbage.tar"
+    garbage.write_bytes(b"not a tarball at all" * 100)
+    truncated = tmp_path / "truncated.tar"
+    truncated.write_bytes(data[: len(data) // 2])
+    truncated_gzip = tmp_path / "truncated.tar.gz"
+    truncated_gzip.write_bytes(gzip.compress(data)[:200])
+    # The outer archive is fine but a layer inside it is not a tar
+    bad_layer = tmp_path / "bad-layer.tar"
+    _docker_save(bad_layer, [b"\x00garbage layer" * 64])
+
+    async def scan(path):
+        return await ContainerScanner().scan_tarball(str(path))
+
+    for path in (garbage, truncated, truncated_gzip, bad_layer):
+        assert asyncio.run(scan(path)) == [], path.name
@@ -0,0 +1,153 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import get_current_user
+from app.db.session import get_db
+from app.main import app
+from app.models.base import Base
+from app.models.models import DependencyInventory, Organization, Scan, User, UserRole
+from app.services.inventory import derive_project, find_affected_scans, make_entry, record_inventory
+
+
+async def _inventory_db(tmp_path):
+    """Two organizations; acme scanned its project twice and lodash was dropped in between."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inventory.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessions() as db:
+        acme, globex = Organization(name="acme"), Organization(name="globex")
+        db.add_all([acme, globex])
+        await db.flush()
+        scans = [
+            Scan(target_url="https://acme.example", scan_type="static", user_id=1, organization_id=acme.id),
+            Scan(target_url="https://acme.example", scan_type="static", user_id=1, organization_id=acme.id),
+            Scan(target_url="https://globex.example", scan_type="static", user_id=1, organization_id=globex.id),
+        ]
+        db.add_all(scans)
+        await db.flush()
+        await record_inventory(db, scans[0], [
+            make_entry("npm", "lodash", "4.17.20", "package-lock.json"),
+            make_entry("pip", "Requests", "2.30.0", "requirements.txt"),
+        ], "dependency-scanner")
+        written = await record_inventory(db, scans[1], [
+            make_entry("pip", "requests", "2.31.0", "requirements.txt"),
+            make_entry("pipenv", "REQUESTS", "2.31.0", "Pipfile.lock"),
+            make_entry("npm", "", "1.0.0"),
+        ], "dependency-scanner")
+        await record_inventory(db, scans[2], [make_entry("python-pkg", "requests", "2.30.0", "/app")], "trivy")
+        await db.commit()
+    return engine, sessions, written
+
+
+def test_record_inventory_dedupes_and_supersedes_earlier_scans(tmp_path):
+    async def main():
+        engine, sessions, written = await _inventory_db(tmp_path)
+        assert written == 1
+        async with sessions() as db:
+            rows = (await db.execute(select(DependencyInventory).order_by(DependencyInventory.id))).scalars().all()
+        assert [(r.scan_id, r.package_name, r.version, r.is_latest) for r in rows] == [
+            (1, "lodash", "4.17.20", False),
+            (1, "requests", "2.30.0", False),
+            (2, "requests", "2.31.0", True),
+            (3, "requests", "2.30.0", True),
+        ]
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_scans_without_a_project_never_supersede_each_other(tmp_path):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inventory.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as db:
+            db.add(Organization(id=1, name="acme"))
+            scans = [
+                Scan(target_url="", scan_type="static", user_id=1, organization_id=1),
+                Scan(target_url="", scan_type="static", user_id=1, organization_id=1),
+                Scan(target_url="", project="npm:shop", scan_type="static", user_id=1, organization_id=1),
+                Scan(target_url="", project="npm:shop", scan_type="static", user_id=1, organization_id=1),
+            ]
+            db.add_all(scans)
+            await db.flush()
+            for scan in scans:
+                await record_inventory(db, scan, [make_entry("npm", "lodash", "4.17.20")], "dependency-scanner")
+            await db.commit()
+            rows = (await db.execute(
+                select(DependencyInventory.scan_id, DependencyInventory.is_latest).order_by(DependencyInventory.scan_id)
+            )).all()
+            affected = await find_affected_scans(db, "npm", "lodash")
+        # Two unrelated code-only scans both stay latest; the named project keeps only its newest scan
+        assert [latest for _, latest in rows] == [True, True, False, True]
+        assert len(affected) == 3
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_project_is_derived_from_a_stable_identifier():
+    assert derive_project(" https://acme.example ", "alpine:3") == "https://acme.example"
+    assert derive_project("", "registry.example.com:5000/team/app:v1.2") == "image:registry.example.com:5000/team/app"
+    assert derive_project("", "alpine@sha256:" + "a" * 64) == "image:alpine"
+    assert derive_project("", None, '{"name": "shop", "lockfileVersion": 3}') == "npm:shop"
+    assert derive_project("", None, "requests==2.31.0") is None
+    assert derive_project("", None, None) is None
+
+
+def test_find_affected_scans_only_reports_latest_scans(tmp_path):
+    async def main():
+        engine, sessions, _ = await _inventory_db(tmp_path)
+        async with sessions() as db:
+            everyone = await find_affected_scans(db, "PyPI", "Requests")
+            pinned = await find_affected_scans(db, "pypi", "requests", versions=["2.30.0"])
+            dropped = await find_affected_scans(db, "npm", "lodash")
+        assert sorted((r["organization_name"], r["version"]) for r in everyone) == [
+            ("acme", "2.31.0"), ("globex", "2.30.0"),
+        ]
+        assert [(r["organization_name"], r["location"]) for r in pinned] == [("globex", "/app")]
+        assert dropped == []
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_affected_endpoint_requires_a_fleet_role_and_truncates(tmp_path):
+    async def seed():
+        return await _inventory_db(tmp_path)
+
+    engine, sessions, _ = asyncio.run(seed())
+    user = User(id=1, email="a@example.com", hashed_password="x", full_name="A", role=UserRole.ADMIN, organization_id=1)
+
+    async def override_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        response = client.get("/api/v1/inventory/affected", params={"ecosystem": "pip", "package": "Requests", "limit": 1})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert (body["ecosystem"], body["package"]) == ("pypi", "requests")
+        # The total counts every affected project, not just the returned page
+        assert body["truncated"] is True and body["total_affected"] == 2 and len(body["results"]) == 1
+
+        response = client.get(
+            "/api/v1/inventory/affected", params={"ecosystem": "pypi", "package": "requests", "version": ["2.31.0"]}
+        )
+        assert [r["project"] for r in response.json()["results"]] == ["https://acme.example"]
+
+        user.role = UserRole.USER
+        response = client.get("/api/v1/inventory/affected", params={"ecosystem": "pypi", "package": "requests"})
+        assert response.status_code == 403
+    finally:
+        app.dependency_overrides.clear()
+        asyncio.run(engine.dispose())
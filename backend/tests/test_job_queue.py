@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.models import JobStatus, Scan, ScanJob, ScanStatus
+from app.services import job_queue
+
+
+async def _queue_with_jobs(tmp_path, monkeypatch, count):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(job_queue, "AsyncSessionLocal", sessions)
+    async with sessions() as db:
+        for i in range(count):
+            scan = Scan(target_url=f"https://example.com/{i}", scan_type="static", user_id=1, organization_id=1)
+            db.add(scan)
+            await job_queue.enqueue(db, scan, "scan", {"scan_uuid": str(i)})
+        await db.commit()
+    return engine, sessions
+
+
+def test_concurrent_claims_never_share_a_job(tmp_path, monkeypatch):
+    async def main():
+        engine, _ = await _queue_with_jobs(tmp_path, monkeypatch, 3)
+        jobs = await asyncio.gather(*(job_queue.claim(f"worker-{i}") for i in range(5)))
+        claimed = [job for job in jobs if job is not None]
+        assert sorted(job.id for job in claimed) == [1, 2, 3]
+        assert len({job.lease_owner for job in claimed}) == 3
+        assert all(job.status == JobStatus.RUNNING.value and job.attempts == 1 for job in claimed)
+        assert await job_queue.claim("worker-late") is None
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_expired_lease_is_reclaimed_and_failures_retry(tmp_path, monkeypatch):
+    async def main():
+        engine, sessions = await _queue_with_jobs(tmp_path, monkeypatch, 1)
+        job = await job_queue.claim("crashed")
+        assert await job_queue.claim("other") is None
+
+        # The crashed worker stops heartbeating; once its lease lapses the job is claimable again
+        async with sessions() as db:
+            (await db.get(ScanJob, job.id)).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+        job = await job_queue.claim("other")
+        assert job.lease_owner == "other" and job.attempts == 2
+        assert not await job_queue.heartbeat(job.id, "crashed")
+        assert await job_queue.heartbeat(job.id, "other")
+
+        # A failure requeues with backoff, so the job is not immediately claimable
+        assert await job_queue.fail(job.id, "other", "boom")
+        assert await job_queue.claim("other") is None
+
+        async with sessions() as db:
+            (await db.get(ScanJob, job.id)).available_at = datetime.utcnow()
+            await db.commit()
+        job = await job_queue.claim("other")
+        assert job.attempts == 3
+        assert not await job_queue.fail(job.id, "other", "boom again")
+        async with sessions() as db:
+            assert (await db.get(ScanJob, job.id)).status == JobStatus.FAILED.value
+            assert (await db.get(Scan, job.scan_id)).status == ScanStatus.FAILED
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_bulk_spool_file_survives_retries_and_is_removed_when_done(tmp_path, monkeypatch):
+    from app import worker
+
+    async def main():
+        engine, sessions = await _queue_with_jobs(tmp_path, monkeypatch, 0)
+        urls = tmp_path / "urls.txt"
+        urls.write_text("example.com\n")
+        async with sessions() as db:
+            scan = Scan(target_url="bulk:1 urls", scan_type="bulk-headers", user_id=1, organization_id=1)
+            db.add(scan)
+            await job_queue.enqueue(db, scan, "bulk-headers", {"scan_uuid": "x", "urls_path": str(urls)})
+            await db.commit()
+
+        attempts = []
+
+        async def flaky(payload):
+            attempts.append(open(payload["urls_path"]).read())
+            if len(attempts) == 1:
+                raise RuntimeError("worker lost its network")
+
+        monkeypatch.setitem(worker.JOB_HANDLERS, "bulk-headers", flaky)
+        monkeypatch.setattr(job_queue.settings, "SCAN_JOB_RETRY_BACKOFF_SECONDS", 0)
+        scan_worker = worker.ScanWorker(worker_id="w")
+        await scan_worker._execute(await job_queue.claim("w"))
+        assert urls.exists()
+        await scan_worker._execute(await job_queue.claim("w"))
+        assert attempts == ["example.com\n", "example.com\n"]
+        assert not urls.exists()
+        async with sessions() as db:
+            assert (await db.get(ScanJob, 1)).status == JobStatus.COMPLETED.value
+        await engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import socket
+
+import pytest
+
+from app.core.config import get_settings
+from app.services.network_scanner import (
+    NetworkScanner, NmapXmlStream, _diff_ports, _group_by_host, expand_targets, shard_targets,
+)
+
+
+def _host(addr, port, state="open"):
+    return (
+        f'<host><status state="up"/><address addr="{addr}" addrtype="ipv4"/><ports>'
+        f'<port protocol="tcp" portid="{port}"><state state="{state}"/>'
+        f'<service name="ssh" product="OpenSSH" version="9.6"/></port></ports></host>'
+    )
+
+
+def test_hosts_are_emitted_as_they_complete():
+    stream = NmapXmlStream("scanme.example")
+    header = '<?xml version="1.0"?>\n<!DOCTYPE nmaprun>\n<nmaprun scanner="nmap">'
+    first = stream.feed(header + _host("203.0.113.1", 22))
+    second = stream.feed(_host("203.0.113.2", 8081, state="closed") + _host("203.0.113.3", 23)[:40])
+    rest = stream.feed(_host("203.0.113.3", 23)[40:] + "<runstats/></nmaprun>") + stream.close()
+
+    assert [f["location"] for f in first] == ["203.0.113.1:22"]
+    assert second == []
+    assert [(f["location"], f["severity"]) for f in rest] == [("203.0.113.3:23", "high")]
+    assert first[0]["evidence"] == "State: open | Service: OpenSSH 9.6"
+
+
+def test_targets_expand_and_shard_across_workers():
+    hosts = expand_targets(["198.51.100.0/30", "scanme.example", "198.51.100.1"], max_hosts=16)
+    assert hosts == ["198.51.100.1", "198.51.100.2", "scanme.example"]
+    with pytest.raises(ValueError):
+        expand_targets(["10.0.0.0/16"], max_hosts=1024)
+
+    assert shard_targets(hosts, "1-1000", 2) == [(["198.51.100.1", "scanme.example"], "1-1000"), (["198.51.100.2"], "1-1000")]
+    assert shard_targets(["198.51.100.1"], "-", 4) == [
+        (["198.51.100.1"], "1-16384"), (["198.51.100.1"], "16385-32768"),
+        (["198.51.100.1"], "32769-49152"), (["198.51.100.1"], "49153-65535"),
+    ]
+
+
+def test_tcp_connect_fallback_finds_loopback_listener(monkeypatch):
+    monkeypatch.setattr(get_settings(), "SSRF_ALLOWED_NETWORKS", ["127.0.0.0/8"])
+
+    async def scan():
+        async def greet(reader, writer):
+            writer.write(b"SSH-2.0-OpenSSH_9.6\r\n")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(greet, "127.0.0.1", 0)
+        open_port = server.sockets[0].getsockname()[1]
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            closed_port = probe.getsockname()[1]
+        async with server:
+            scanner = NetworkScanner(nmap_path="/nonexistent/nmap")
+            return open_port, await scanner.scan("127.0.0.1", f"{open_port},{closed_port}")
+
+    open_port, findings = asyncio.run(scan())
+
+    assert [f["location"] for f in findings] == [f"127.0.0.1:{open_port}"]
+    assert findings[0]["metadata"]["scanner"] == "tcp-connect"
+    assert findings[0]["metadata"]["service"] == "ssh"
+    assert "SSH-2.0-OpenSSH_9.6" in findings[0]["evidence"]
+
+
+def test_loopback_is_blocked_without_allow_list():
+    findings = asyncio.run(NetworkScanner(nmap_path="/nonexistent/nmap").scan("127.0.0.1", "22"))
+    assert findings[0]["title"] == "Network Scan Target Blocked"
+
+
+def test_port_diff_marks_new_unchanged_and_closed():
+    def port(p):
+        return NetworkScanner._port_finding("203.0.113.5", str(p), "tcp", "svc", "svc")
+
+    previous = {key: {"finding": f, "verified_at": 0} for key, f in _group_by_host([port(22), port(80)])["203.0.113.5"].items()}
+    current = {key: {"finding": f, "verified_at": 1} for key, f in _group_by_host([port(22), port(443)])["203.0.113.5"].items()}
+
+    statuses = {f["location"]: f["metadata"]["port_status"] for f in _diff_ports("203.0.113.5", previous, current)}
+    assert statuses == {"203.0.113.5:22": "unchanged", "203.0.113.5:443": "new", "203.0.113.5:80": "closed"}
+
+
+_FAKE_NMAP = '''#!{python}
+import os, sys
+args = sys.argv[1:]
+requested = set(args[args.index("-p") + 1].split(","))
+service = ' name="http" product="nginx" version="1.25"' if "-sV" in args else ' name="unknown"'
+ports = "".join(
+    f'<port protocol="tcp" portid="{{p}}"><state state="open"/><service{{service}}/></port>'
+    for p in os.environ["FAKE_NMAP_OPEN"].split(",") if p in requested
+)
+print(f'<?xml version="1.0"?><nmaprun><host><address addr="{{args[-1]}}" addrtype="ipv4"/>'
+      f'<ports>{{ports}}</ports></host></nmaprun>')
+'''
+
+
+def test_incremental_scan_with_one_nmap_slot_does_not_deadlock(tmp_path, monkeypatch):
+    import sys
+    from app.services import network_scanner
+    from app.services.process_runner import ConcurrencyLimiter
+    from app.services.result_cache import PersistentCache
+
+    nmap = tmp_path / "nmap"
+    nmap.write_text(_FAKE_NMAP.format(python=sys.executable))
+    nmap.chmod(0o755)
+    monkeypatch.setattr(get_settings(), "SSRF_ALLOWED_NETWORKS", ["127.0.0.0/8"])
+    monkeypatch.setattr(network_scanner, "_nmap_limiter", ConcurrencyLimiter(1))
+    monkeypatch.setattr(network_scanner, "_network_cache", PersistentCache(str(tmp_path / "net.db"), 1 << 20))
+
+    async def scan(open_ports, owner="org-1"):
+        monkeypatch.setenv("FAKE_NMAP_OPEN", open_ports)
+        scanner = NetworkScanner(nmap_path=str(nmap), use_cache=True, owner=owner)
+        return await asyncio.wait_for(scanner.scan("127.0.0.1", "22,80"), 20)
+
+    asyncio.run(scan("22"))
+    # Port 80 is new, so discovery is followed by a -sV pass on just that port
+    findings = asyncio.run(scan("22,80"))
+    by_port = {f["metadata"]["port"]: f["metadata"] for f in findings}
+    assert by_port["80"]["port_status"] == "new" and by_port["80"]["version"] == "1.25"
+    assert by_port["22"]["port_status"] == "unchanged"
+
+    # Another organization never sees org-1's port state: no diff, no "closed" findings
+    other = asyncio.run(scan("80", owner="org-2"))
+    assert [(f["metadata"]["port"], f["metadata"]["port_status"]) for f in other] == [("80", "new")]
+
+
+def test_nmap_scans_only_vetted_addresses(tmp_path, monkeypatch):
+    import sys
+    from app.services import network_scanner
+
+    log = tmp_path / "argv.log"
+    nmap = tmp_path / "nmap"
+    nmap.write_text(
+        f"#!{sys.executable}\nimport json, sys\n"
+        f"open({str(log)!r}, 'a').write(json.dumps(sys.argv[1:]) + '\\n')\n"
+        "print('<?xml version=\"1.0\"?><nmaprun></nmaprun>')\n"
+    )
+    nmap.chmod(0o755)
+    dns = {
+        "dual.example": ["2606:4700::1111", "93.184.216.34"],
+        "v6.example": ["2606:4700::1111"],
+        "gone.example": [],  # resolve_scan_target allows a failed lookup through with no addresses
+    }
+
+    async def resolve(url):
+        return True, "OK", dns[url.split("//", 1)[1]]
+
+    monkeypatch.setattr(network_scanner, "resolve_scan_target", resolve)
+    scanner = NetworkScanner(nmap_path=str(nmap))
+
+    assert asyncio.run(scanner.scan("dual.example", "443")) == []
+    assert asyncio.run(scanner.scan("v6.example", "443")) == []
+    blocked = asyncio.run(scanner.scan("gone.example", "443"))
+    assert blocked[0]["title"] == "Network Scan Target Blocked"
+
+    runs = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(runs) == 2
+    assert all("-n" in argv for argv in runs)
+    assert runs[0][-2:] == ["--", "93.184.216.34"] and "-6" not in runs[0]
+    assert runs[1][-2:] == ["--", "2606:4700::1111"] and "-6" in runs[1]
+
+    # A mixed batch is split into one run per address family
+    log.unlink()
+    asyncio.run(scanner.scan_many(["dual.example", "v6.example", "gone.example"], "443", workers=1))
+    runs = [json.loads(line) for line in log.read_text().splitlines()]
+    assert sorted(argv[argv.index("--") + 1:] for argv in runs) == [["2606:4700::1111"], ["93.184.216.34"]]
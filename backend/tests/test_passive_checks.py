@@ -0,0 +1,51 @@
+from app.services.passive_checks import PassiveResponse, evaluate
+
+
+def _titles(findings):
+    return [f["title"] for f in findings]
+
+
+def test_every_cookie_and_redirect_hop_is_checked():
+    resp = PassiveResponse(
+        url="https://shop.example/",
+        final_url="http://shop.example/home",
+        status_code=200,
+        headers={
+            "content-security-policy": "default-src 'self'",
+            "strict-transport-security": "max-age=63072000",
+            "x-content-type-options": "nosniff",
+            "referrer-policy": "no-referrer",
+            "permissions-policy": "camera=()",
+            "server": "nginx/1.25.3",
+        },
+        set_cookies=[
+            "session=abc; Path=/; HttpOnly; SameSite=Lax",
+            "tracking=xyz; Path=/",
+        ],
+        redirect_chain=[(301, "https://shop.example/")],
+        tls={"version": "TLSv1.1", "cipher": "ECDHE-RSA-AES128-SHA"},
+    )
+    findings = evaluate(resp)
+
+    assert _titles(findings) == [
+        "Server Version Disclosure",
+        "Cookie Missing SameSite Attribute — CSRF Risk",
+        "Cookie Missing HttpOnly Flag",
+        "Redirect Downgrades HTTPS to HTTP",
+        "Legacy TLS Protocol Negotiated",
+    ]
+    assert findings[0]["description"].startswith('Server header reveals version info: "nginx/1.25.3"')
+    assert findings[1]["evidence"] == "Set-Cookie: tracking=xyz; Path=/"
+    assert all(f["location"] == "https://shop.example/" for f in findings)
+
+
+def test_bare_response_reports_missing_headers():
+    resp = PassiveResponse(url="https://t.example/", final_url="https://t.example/", status_code=200, headers={})
+    assert _titles(evaluate(resp)) == [
+        "Missing Content-Security-Policy Header",
+        "Missing HTTP Strict-Transport-Security (HSTS)",
+        "Missing X-Frame-Options — Clickjacking Risk",
+        "Missing X-Content-Type-Options Header",
+        "Missing Referrer-Policy Header",
+        "Missing Permissions-Policy Header",
+    ]
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from app.services.process_runner import ConcurrencyLimiter, run_process
+
+_SLEEPER = "import os, sys, time\nwith open(sys.argv[1], 'w') as f:\n    f.write(str(os.getpid()))\ntime.sleep(10)\n"
+
+
+def _sleeper(tmp_path):
+    pidfile = tmp_path / "child.pid"
+    return [sys.executable, "-c", _SLEEPER, str(pidfile)], pidfile
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+async def _started(pidfile):
+    while not pidfile.exists() or not pidfile.read_text():
+        await asyncio.sleep(0.02)
+    return int(pidfile.read_text())
+
+
+def test_timeout_kills_and_reaps_the_child(tmp_path):
+    cmd, pidfile = _sleeper(tmp_path)
+
+    async def main():
+        started = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await run_process(cmd, timeout=1)
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) < 5
+    assert not _is_running(int(pidfile.read_text()))
+
+
+def test_cancellation_kills_and_reaps_the_child(tmp_path):
+    cmd, pidfile = _sleeper(tmp_path)
+
+    async def main():
+        task = asyncio.create_task(run_process(cmd, timeout=30))
+        pid = await _started(pidfile)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return pid
+
+    assert not _is_running(asyncio.run(main()))
+
+
+def test_limiter_caps_concurrent_children():
+    limiter = ConcurrencyLimiter(2)
+    cmd = [sys.executable, "-c", "import time; s = time.time(); time.sleep(0.3); print(s, time.time())"]
+
+    async def main():
+        return await asyncio.gather(*(run_process(cmd, timeout=30, limiter=limiter) for _ in range(5)))
+
+    spans = []
+    for returncode, stdout, _ in asyncio.run(main()):
+        assert returncode == 0
+        spans.append(tuple(map(float, stdout.split())))
+    overlap = max(sum(1 for s, e in spans if s <= start < e) for start, _ in spans)
+    assert overlap == 2
@@ -0,0 +1,247 @@
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.models import DependencyInventory, Scan, ScanStage, ScanStatus, Vulnerability, VulnerabilitySeverity
+from app.services import finding_writer, scan_pipeline
+from app.services.inventory import make_entry, record_inventory
+from app.services.scan_pipeline import ScanPipeline
+
+
+def _finding(title, severity="high"):
+    return {"title": title, "description": "d", "severity": severity, "location": "x", "metadata": {}}
+
+
+async def _pipeline_db(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pipeline.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(scan_pipeline, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(finding_writer, "AsyncSessionLocal", sessions)
+    return engine, sessions
+
+
+def test_resume_skips_finished_stages_and_discards_partial_output(tmp_path, monkeypatch):
+    async def main():
+        engine, sessions = await _pipeline_db(tmp_path, monkeypatch)
+
+        # A previous worker finished the static stage and died during the container stage
+        async with sessions() as db:
+            scan = Scan(target_url="", scan_type="hybrid", user_id=1, organization_id=1)
+            db.add(scan)
+            await db.flush()
+            db.add_all([
+                ScanStage(scan_id=scan.id, name="static", status="completed", attempts=1, findings=1,
+                          output={"engines": {"semgrep": {"status": "completed", "findings": 1}}}),
+                ScanStage(scan_id=scan.id, name="container", status="running", attempts=1),
+                Vulnerability(scan_id=scan.id, title="static finding", description="d", location="x",
+                              severity=VulnerabilitySeverity.HIGH, vuln_metadata={"stage": "static"}),
+                Vulnerability(scan_id=scan.id, title="partial container finding", description="d", location="x",
+                              severity=VulnerabilitySeverity.LOW, vuln_metadata={"stage": "container"}),
+            ])
+            await db.commit()
+            scan_uuid, scan_id = str(scan.uuid), scan.id
+
+        async def must_not_run(self, stage):
+            raise AssertionError("finished stage was rerun")
+
+        async def container(self, stage):
+            return await self.writer.write([_finding("CVE-2024-0001", "critical")], stage)
+
+        monkeypatch.setattr(ScanPipeline, "_engine_semgrep", must_not_run)
+        monkeypatch.setattr(ScanPipeline, "_engine_iac", must_not_run)
+        monkeypatch.setattr(ScanPipeline, "_engine_container", container)
+        await ScanPipeline(scan_uuid, "code", "", container_image="alpine:3").run()
+
+        async with sessions() as db:
+            scan = await db.get(Scan, scan_id)
+            titles = sorted((await db.execute(select(Vulnerability.title))).scalars())
+            stages = {s.name: (s.status, s.attempts) for s in (await db.execute(select(ScanStage))).scalars()}
+        assert titles == ["CVE-2024-0001", "static finding"]
+        assert stages == {"static": ("completed", 1), "container": ("completed", 2), "normalize": ("completed", 1)}
+        assert scan.status == ScanStatus.COMPLETED
+        assert scan.results["vulnerabilities_count"] == 2
+        assert set(scan.results["engines"]) == {"semgrep", "container"}
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_interrupted_stage_keeps_the_previous_scans_inventory_latest(tmp_path, monkeypatch):
+    async def main():
+        engine, sessions = await _pipeline_db(tmp_path, monkeypatch)
+        async with sessions() as db:
+            previous = Scan(target_url="", project="image:alpine", scan_type="hybrid", user_id=1, organization_id=1)
+            scan = Scan(target_url="", project="image:alpine", scan_type="hybrid", user_id=1, organization_id=1)
+            db.add_all([previous, scan])
+            await db.flush()
+            await record_inventory(db, previous, [make_entry("apk", "musl", "1.2.3", "alpine:3")], "trivy")
+            db.add_all([
+                ScanStage(scan_id=scan.id, name="static", status="completed", attempts=1),
+                Vulnerability(scan_id=scan.id, title="untagged leftover", description="d", location="x",
+                              severity=VulnerabilitySeverity.LOW, vuln_metadata={}),
+            ])
+            await db.commit()
+            scan_uuid, previous_id = str(scan.uuid), previous.id
+
+        async def latest():
+            async with sessions() as db:
+                rows = await db.execute(select(DependencyInventory.scan_id, DependencyInventory.is_latest))
+                return sorted(rows.all())
+
+        async def crashes_midway(self, stage):
+            await self.writer.write_inventory([make_entry("apk", "musl", "1.2.4", "alpine:3")], "trivy", latest=False)
+            await asyncio.sleep(30)
+
+        async def container(self, stage):
+            await self.writer.write_inventory([make_entry("apk", "musl", "1.2.5", "alpine:3")], "trivy", latest=False)
+            return await self.writer.write([_finding("CVE-2024-0001")], stage)
+
+        # The worker dies during the container stage after writing part of its inventory
+        monkeypatch.setattr(ScanPipeline, "_engine_container", crashes_midway)
+        pipeline = ScanPipeline(scan_uuid, "", "", container_image="alpine:3")
+        try:
+            await asyncio.wait_for(pipeline.run(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+        scan_id = pipeline.scan_id
+        assert await latest() == [(previous_id, True), (scan_id, False)]
+
+        monkeypatch.setattr(ScanPipeline, "_engine_container", container)
+        await ScanPipeline(scan_uuid, "", "", container_image="alpine:3").run()
+
+        async with sessions() as db:
+            titles = (await db.execute(select(Vulnerability.title))).scalars().all()
+            versions = (await db.execute(
+                select(DependencyInventory.version).where(DependencyInventory.scan_id == scan_id)
+            )).scalars().all()
+        assert titles == ["CVE-2024-0001"]
+        assert versions == ["1.2.5"]
+        assert await latest() == [(previous_id, False), (scan_id, True)]
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_dependency_scan_is_its_own_checkpointed_stage(tmp_path, monkeypatch):
+    async def main():
+        engine, sessions = await _pipeline_db(tmp_path, monkeypatch)
+
+        # The static stage finished; the worker died while auditing dependencies
+        async with sessions() as db:
+            scan = Scan(target_url="", scan_type="static", user_id=1, organization_id=1)
+            db.add(scan)
+            await db.flush()
+            db.add_all([
+                ScanStage(scan_id=scan.id, name="static", status="completed", attempts=1, findings=0,
+                          output={"engines": {"semgrep": {"status": "completed", "findings": 0}}}),
+                ScanStage(scan_id=scan.id, name="dependencies", status="running", attempts=1),
+            ])
+            await db.commit()
+            scan_uuid, scan_id = str(scan.uuid), scan.id
+
+        statuses = []
+
+        async def must_not_run(self, stage):
+            raise AssertionError("finished static stage was rerun")
+
+        async def dependencies(self, stage):
+            async with sessions() as db:
+                statuses.append((await db.get(Scan, scan_id)).status)
+            return await self.writer.write([_finding("CVE-2024-0002")], stage)
+
+        monkeypatch.setattr(ScanPipeline, "_engine_semgrep", must_not_run)
+        monkeypatch.setattr(ScanPipeline, "_engine_iac", must_not_run)
+        monkeypatch.setattr(ScanPipeline, "_engine_dependencies", dependencies)
+        await ScanPipeline(scan_uuid, '{"name": "shop", "lockfileVersion": 3}', "").run()
+
+        async with sessions() as db:
+            scan = await db.get(Scan, scan_id)
+            stages = {s.name: (s.status, s.attempts) for s in (await db.execute(select(ScanStage))).scalars()}
+            tags = (await db.execute(select(Vulnerability.vuln_metadata))).scalars().all()
+        assert statuses == [ScanStatus.DEPENDENCY_SCAN]
+        assert stages == {"static": ("completed", 1), "dependencies": ("completed", 2), "normalize": ("completed", 1)}
+        assert [tag["stage"] for tag in tags] == ["dependencies"]
+        assert scan.status == ScanStatus.COMPLETED
+        assert scan.results["engines"]["dependencies"]["status"] == "completed"
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_engine_timeouts_and_failures_do_not_stop_other_engines(tmp_path, monkeypatch):
+    async def main():
+        engine, sessions = await _pipeline_db(tmp_path, monkeypatch)
+        async with sessions() as db:
+            scan = Scan(target_url="", scan_type="hybrid", user_id=1, organization_id=1)
+            db.add(scan)
+            await db.commit()
+            scan_uuid, scan_id = str(scan.uuid), scan.id
+
+        async def hangs(self, stage):
+            await asyncio.sleep(30)
+
+        async def crashes(self, stage):
+            raise RuntimeError("checkov exploded")
+
+        async def container(self, stage):
+            await asyncio.sleep(0.2)
+            return await self.writer.write([_finding("CVE-2024-0001")], stage)
+
+        monkeypatch.setattr(scan_pipeline.settings, "SCAN_SEMGREP_TIMEOUT_SECONDS", 0.5)
+        monkeypatch.setattr(ScanPipeline, "_engine_semgrep", hangs)
+        monkeypatch.setattr(ScanPipeline, "_engine_iac", crashes)
+        monkeypatch.setattr(ScanPipeline, "_engine_container", container)
+        started = time.monotonic()
+        await ScanPipeline(scan_uuid, "code", "", container_image="alpine:3").run()
+        elapsed = time.monotonic() - started
+
+        async with sessions() as db:
+            scan = await db.get(Scan, scan_id)
+        engines = scan.results["engines"]
+        assert elapsed < 5
+        assert engines["semgrep"]["status"] == "timeout"
+        assert engines["iac"] == {**engines["iac"], "status": "failed", "error": "checkov exploded"}
+        assert engines["container"]["status"] == "completed" and engines["container"]["findings"] == 1
+        assert scan.results["stages"]["static"]["status"] == "timeout"
+        assert scan.status == ScanStatus.COMPLETED and scan.results["vulnerabilities_count"] == 1
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_semgrep_runs_off_the_event_loop_and_is_killed_on_timeout(tmp_path, monkeypatch):
+    import sys
+
+    from app.services import scanner
+    from app.services.scanner import ScannerService
+
+    semgrep = tmp_path / "semgrep"
+    semgrep.write_text(f"#!{sys.executable}\nimport time\ntime.sleep(30)\n")
+    semgrep.chmod(0o755)
+    monkeypatch.setattr(sys, "executable", str(tmp_path / "python"))
+    monkeypatch.setattr(scanner, "SEMGREP_TIMEOUT", 0.5)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        results = await ScannerService().run_semgrep("eval(user_input)")
+        task.cancel()
+        return ticks, results
+
+    ticks, results = asyncio.run(main())
+    assert ticks >= 5
+    # Falls back to the rule-based scanner
+    assert results and all(r["metadata"]["scanner"] != "semgrep" for r in results)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import socket
+import sys
+
+import pytest
+
+from app.services import container_scanner
+from app.services.container_scanner import ContainerScanner
+from app.services.trivy_server import TrivyServer
+
+_FAKE_TRIVY = """#!{python}
+import json, os, sys
+args = sys.argv[1:]
+with open(os.environ["FAKE_TRIVY_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if args[0] == "server":
+    if os.environ.get("FAKE_TRIVY_SERVER") == "crash":
+        sys.exit(1)
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    host, port = args[args.index("--listen") + 1].rsplit(":", 1)
+
+    class Health(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200 if self.path == "/healthz" else 404)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer((host, int(port)), Health).serve_forever()
+if "--server" in args and os.environ.get("FAKE_TRIVY_CLIENT") == "fail":
+    sys.exit(2)
+print(json.dumps({{"Results": [{{"Target": "t", "Type": "alpine", "Vulnerabilities": [
+    {{"VulnerabilityID": "CVE-2024-0001", "PkgName": "musl", "Severity": "HIGH"}}]}}]}}))
+"""
+
+
+@pytest.fixture
+def fake_trivy(tmp_path, monkeypatch):
+    log = tmp_path / "argv.log"
+    script = tmp_path / "trivy"
+    script.write_text(_FAKE_TRIVY.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setenv("FAKE_TRIVY_LOG", str(log))
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        addr = f"127.0.0.1:{sock.getsockname()[1]}"
+
+    def runs():
+        return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+
+    return str(script), addr, runs
+
+
+def test_server_starts_once_is_reused_and_stops_without_blocking(fake_trivy):
+    path, addr, runs = fake_trivy
+    server = TrivyServer(path, addr, startup_timeout=10)
+
+    async def main():
+        assert await server.ensure_running() == f"http://{addr}"
+        proc = server._proc
+        assert await server.ensure_running() == f"http://{addr}"
+        assert server._proc is proc
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await server.stop()
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return proc, ticks
+
+    proc, ticks = asyncio.run(main())
+    assert proc.returncode is not None and ticks > 0
+    assert [argv[0] for argv in runs()] == ["server"]
+
+
+def test_server_that_never_becomes_healthy_falls_back_with_backoff(fake_trivy, monkeypatch):
+    path, addr, runs = fake_trivy
+    monkeypatch.setenv("FAKE_TRIVY_SERVER", "crash")
+    server = TrivyServer(path, addr, startup_timeout=10)
+
+    async def main():
+        return await server.ensure_running(), await server.ensure_running()
+
+    assert asyncio.run(main()) == (None, None)
+    # The second call is inside RETRY_BACKOFF and does not try to start another server
+    assert len(runs()) == 1
+
+
+def test_failing_server_client_is_retried_standalone(fake_trivy, monkeypatch):
+    path, addr, runs = fake_trivy
+    monkeypatch.setenv("FAKE_TRIVY_CLIENT", "fail")
+    server = TrivyServer(path, addr, startup_timeout=10)
+    monkeypatch.setattr(container_scanner, "_trivy_server", server)
+    monkeypatch.setattr(container_scanner.settings, "CONTAINER_CACHE_ENABLED", False)
+
+    async def main():
+        try:
+            return await ContainerScanner(trivy_path=path).scan_image("alpine:3.19")
+        finally:
+            await server.stop()
+
+    findings = asyncio.run(main())
+    assert [f["metadata"]["vuln_id"] for f in findings] == ["CVE-2024-0001"]
+    clients = [argv for argv in runs() if argv[0] == "image"]
+    assert ["--server", f"http://{addr}"] == clients[0][-4:-2]
+    assert "--server" not in clients[1]
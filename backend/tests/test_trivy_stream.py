@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from app.services.trivy_stream import TrivyReportStream, parse_trivy_report
+
+
+REPORT = {
+    "SchemaVersion": 2,
+    "ArtifactName": "python:3.12-slim",
+    "Metadata": {"OS": {"Family": "debian", "Name": "12.5"}, "Size": 130000000},
+    "Results": [
+        {
+            "Target": "python:3.12-slim (debian 12.5)",
+            "Class": "os-pkgs",
+            "Type": "debian",
+            "Packages": [{"Name": "openssl", "Version": "3.0.11-1"}, {"Name": "zlib1g", "Version": "1.2.13"}],
+            "Vulnerabilities": [
+                {"VulnerabilityID": "CVE-2024-0727", "PkgName": "openssl", "Severity": "MEDIUM", "CVSS": {"nvd": {"V3Score": 5.5}}},
+                {"VulnerabilityID": "CVE-2023-45853", "PkgName": "zlib1g", "Severity": "CRITICAL"},
+            ],
+        },
+        {"Target": "usr/local/lib/python3.12/site-packages", "Class": "lang-pkgs", "Type": "python-pkg", "Vulnerabilities": None},
+    ],
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 4096])
+def test_events_match_full_parse_at_any_chunk_size(chunk_size):
+    events = parse_trivy_report(json.dumps(REPORT, indent=2).encode(), chunk_size)
+
+    vulns = [(target, kind_type, item["VulnerabilityID"]) for kind, target, kind_type, item in events if kind == "vulnerability"]
+    packages = [item["Name"] for kind, _, _, item in events if kind == "package"]
+    assert vulns == [
+        ("python:3.12-slim (debian 12.5)", "debian", "CVE-2024-0727"),
+        ("python:3.12-slim (debian 12.5)", "debian", "CVE-2023-45853"),
+    ]
+    assert packages == ["openssl", "zlib1g"]
+
+
+def test_items_are_emitted_before_the_report_ends():
+    data = json.dumps(REPORT).encode()
+    cut = data.index(b"CVE-2023-45853")
+    stream = TrivyReportStream()
+    early = stream.feed(data[:cut])
+    assert [item["VulnerabilityID"] for kind, _, _, item in early if kind == "vulnerability"] == ["CVE-2024-0727"]
+    late = stream.feed(data[cut:]) + stream.close()
+    assert [item["VulnerabilityID"] for kind, _, _, item in late if kind == "vulnerability"] == ["CVE-2023-45853"]
+
+
+def test_truncated_report_raises():
+    data = json.dumps(REPORT).encode()
+    with pytest.raises(ValueError):
+        parse_trivy_report(data[:-40])
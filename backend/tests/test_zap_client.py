@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import zap_client
+from app.services.zap_client import AsyncZapClient, ZapError
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Virtual monotonic clock advanced only by the client's sleeps, which are recorded."""
+    now = [0.0]
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(zap_client, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(zap_client.asyncio, "sleep", sleep)
+    monkeypatch.setattr(zap_client.settings, "ZAP_POLL_MAX_SECONDS", 30.0)
+    return sleeps
+
+
+def _status(progress):
+    progress = iter(progress)
+
+    async def status(scan_id):
+        return next(progress)
+
+    return status
+
+
+def test_alerts_are_fetched_in_pages():
+    client = AsyncZapClient("zap.invalid", 8080, "key")
+    alerts = [{"name": f"alert-{i}"} for i in range(7)]
+    requests = []
+
+    async def fake_alerts(baseurl, start, count):
+        requests.append((start, count))
+        return alerts[start:start + count]
+
+    client.alerts = fake_alerts
+
+    async def collect():
+        return [len(page) async for page in client.iter_alerts("https://t.example", page_size=3)]
+
+    assert asyncio.run(collect()) == [3, 3, 1]
+    assert requests == [(0, 3), (3, 3), (6, 3)]
+
+
+def test_polling_follows_progress_and_backs_off_while_stalled(fake_clock):
+    client = AsyncZapClient("zap.invalid", 8080, "key")
+    asyncio.run(client.wait_for(_status([0, 0, 10, 10, 10, 10, 90, 100]), "1", "Spider"))
+    # Doubling while stalled, a quarter of the estimated remaining time once it moves, capped at the max
+    assert fake_clock == pytest.approx([1.0, 2.0, 6.75, 13.5, 27.0, 30.0, 80.25 / 90 * 10 / 4])
+
+
+def test_polling_gives_up_at_the_deadline(fake_clock, monkeypatch):
+    monkeypatch.setattr(zap_client.settings, "ZAP_SCAN_TIMEOUT_SECONDS", 60)
+    client = AsyncZapClient("zap.invalid", 8080, "key")
+
+    async def stuck(scan_id):
+        return 5
+
+    with pytest.raises(ZapError, match=r"Active scan did not finish within 60s \(5%\)"):
+        asyncio.run(client.wait_for(stuck, "1", "Active scan"))
+    # The last sleep is cut short so the final poll lands on the deadline
+    assert fake_clock == [0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 28.5]
+
+
+def test_api_key_is_sent_only_in_the_header(monkeypatch):
+    import httpx
+
+    requests = []
+
+    async def get(url, params=None, headers=None):
+        requests.append(httpx.Request("GET", url, params=params, headers=headers))
+        return httpx.Response(200, json={"version": "2.15.0"})
+
+    monkeypatch.setattr(zap_client.http_client, "get", get)
+    assert asyncio.run(AsyncZapClient("zap.invalid", 8080, "s3cret").version()) == "2.15.0"
+    [request] = requests
+    assert request.headers["X-ZAP-API-Key"] == "s3cret"
+    assert "s3cret" not in str(request.url)
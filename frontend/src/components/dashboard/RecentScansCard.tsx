@@ -16,6 +16,11 @@ interface ScanEntry {
   vulnerabilities: any[];
 }
 
+// "running" plus the backend's pipeline stage statuses
+const ACTIVE_STATUSES = [
+  'running', 'static_scan', 'dependency_scan', 'container_scan', 'dynamic_scan', 'network_scan', 'normalizing',
+];
+
 function countBySeverity(vulns: any[]) {
   return vulns.reduce(
     (acc, v) => {
@@ -50,9 +55,10 @@ export function RecentScansCard() {
   }, []);
 
   const statusIcon = (status: string) => {
+    if (ACTIVE_STATUSES.includes(status)) {
+      return <Clock size={14} className="text-primary-400" />;
+    }
     switch (status) {
-      case 'running':
-        return <Clock size={14} className="text-primary-400" />;
       case 'completed':
         return <Check size={14} className="text-severity-low" />;
       case 'failed':
@@ -134,7 +140,7 @@ export function RecentScansCard() {
                     </Badge>
                   </div>
 
-                  {scan.status === 'running' && (
+                  {ACTIVE_STATUSES.includes(scan.status) && (
                     <div className="mt-2">
                       <Progress value={40} showLabel size="sm" />
                     </div>
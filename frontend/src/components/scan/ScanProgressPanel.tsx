@@ -33,6 +33,16 @@ const RUNNING_LOGS = [
   "Writing findings to database...",
 ];
 
+// Backend pipeline stages; each counts as "running" and gets its own log line
+const STAGE_LOGS: Record<string, string> = {
+  static_scan: "Stage: static analysis (Semgrep / IaC rules)...",
+  dependency_scan: "Stage: dependency analysis...",
+  container_scan: "Stage: container image scan...",
+  dynamic_scan: "Stage: dynamic analysis (ZAP / crawler)...",
+  network_scan: "Stage: network scan...",
+  normalizing: "Stage: normalizing and scoring findings...",
+};
+
 export function ScanProgressPanel({ 
   scanId, 
   scanName, 
@@ -86,7 +96,10 @@ export function ScanProgressPanel({
             });
             pendingLogIndex++;
           }
-        } else if (status === 'running') {
+        } else if (status === 'running' || status in STAGE_LOGS) {
+          if (status in STAGE_LOGS) {
+            setLogs(prev => prev.includes(STAGE_LOGS[status]) ? prev : [...prev, STAGE_LOGS[status]]);
+          }
           // Progress moves from 10% toward 90% smoothly
           setProgress(prev => {
             const next = prev + (90 - prev) * 0.15;